@@ -4,15 +4,19 @@ A voice-enabled assistant that provides weather information
 """
 
 import asyncio
+import functools
 import logging
 import os
-from typing import Annotated
+import time
+from typing import Annotated, Awaitable, List, Optional
+from aiohttp import web
 from dotenv import load_dotenv
 
 from livekit import rtc
 from livekit.agents import (
     AutoSubscribe,
     JobContext,
+    JobProcess,
     WorkerOptions,
     cli,
     llm,
@@ -20,7 +24,33 @@ from livekit.agents import (
 from livekit.agents.voice_assistant import VoiceAssistant
 from livekit.plugins import openai, silero
 
-from weather_api import WeatherAPI, format_weather_response, format_forecast_response
+from config import (
+    AGENT_CONTEXT_MAX_TOKENS,
+    AGENT_CONTEXT_MAX_TURNS,
+    AGENT_FAST_PATH,
+    AGENT_GREETING_BUDGET,
+    AGENT_METRICS_PORT,
+    AGENT_METRICS_PORT_RANGE,
+    AGENT_TRACE_PATH,
+    AGENT_TTS_CACHE_DISK_MAX_BYTES,
+    AGENT_TTS_CACHE_MAX_BYTES,
+    AGENT_TTS_CACHE_PATH,
+    WEATHER_COMPARE_MAX_CITIES,
+)
+from context_window import prune_history, trim_chat_context
+from intent import detect_intent, format_answer, is_simple_request
+from metrics import CONTENT_TYPE, REGISTRY
+from prefetch import WeatherPrefetcher
+from profiling import profiled, request_capture
+from tracing import TracedLLM, TracedSTT, TracedTTS, TraceWriter, TurnTracer
+from tts_cache import CachedTTS
+from weather_api import (
+    RANKINGS,
+    AsyncWeatherAPI,
+    format_comparison_response,
+    format_forecast_response,
+    format_weather_response,
+)
 
 # Load environment variables
 load_dotenv()
@@ -29,17 +59,111 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize weather API
-weather_api = WeatherAPI()
+# Initialize weather API (non-blocking, one connection pool per worker process;
+# built on import, which happens while the process is prewarmed)
+weather_api = AsyncWeatherAPI()
+
+# Tool latency split into the upstream fetch and response formatting
+TOOL_SECONDS = REGISTRY.histogram(
+    "agent_tool_seconds", "Time spent in each stage of an agent tool call", ["tool", "stage"]
+)
+REGISTRY.register_collector(weather_api.collect_metrics)
+
+# Job start latency: entrypoint to room connected, and participant joined to
+# the greeting starting to play
+JOB_START_SECONDS = REGISTRY.histogram(
+    "agent_job_start_seconds", "Agent job start latency by phase", ["phase"]
+)
+GREETING_OVER_BUDGET = REGISTRY.counter(
+    "agent_greeting_over_budget_total", "Greetings that started later than AGENT_GREETING_BUDGET"
+)
+
+# Warms the cache for a city the user names while the LLM decides on a tool call
+prefetcher = WeatherPrefetcher(weather_api)
+
+# Voice turns by route: answered locally (fast path) or by the LLM
+TURNS = REGISTRY.counter("agent_turns_total", "User turns by how they were answered", ["route"])
+
+# Size of each LLM prompt after context trimming, and what trimming removed
+PROMPT_TOKENS = REGISTRY.histogram(
+    "agent_prompt_tokens", "Estimated LLM prompt size per user turn",
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+)
+CONTEXT_TRIMMED_TURNS = REGISTRY.counter(
+    "agent_context_trimmed_turns_total", "Older turns removed from LLM prompts", ["action"]
+)
+
+# Per-turn traces as JSON lines (histograms are recorded either way)
+trace_writer = TraceWriter(AGENT_TRACE_PATH) if AGENT_TRACE_PATH else None
+
+# Metrics HTTP server of this process (started by the first job)
+_metrics_runner: Optional[web.AppRunner] = None
+
+
+async def start_metrics_server() -> None:
+    """Serve /metrics for this worker process on the first free configured port"""
+    global _metrics_runner
+    if _metrics_runner is not None or AGENT_METRICS_PORT <= 0:
+        return
+    
+    async def handle_metrics(request: web.Request) -> web.Response:
+        return web.Response(body=REGISTRY.render().encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+    
+    async def handle_profile(request: web.Request) -> web.Response:
+        payload, status = request_capture(request.headers.get("X-Admin-Token", ""), request.query.get("seconds"))
+        return web.json_response(payload, status=status)
+    
+    metrics_app = web.Application()
+    metrics_app.router.add_get("/metrics", handle_metrics)
+    metrics_app.router.add_post("/admin/profile", handle_profile)
+    runner = web.AppRunner(metrics_app, access_log=None)
+    await runner.setup()
+    for port in range(AGENT_METRICS_PORT, AGENT_METRICS_PORT + max(AGENT_METRICS_PORT_RANGE, 1)):
+        try:
+            await web.TCPSite(runner, "0.0.0.0", port).start()
+        except OSError:
+            continue
+        _metrics_runner = runner
+        logger.info(f"Serving agent metrics on port {port}")
+        return
+    
+    await runner.cleanup()
+    logger.warning("No free port for agent metrics in range starting at %d", AGENT_METRICS_PORT)
+
+
+def traced_tool(func):
+    """
+    Record a tool call as a span of the current turn (keeps the signature for the LLM schema)
+    
+    Tool calls are also eligible for sampled profiling, see profiling.profiled().
+    """
+    func = profiled(f"tool:{func.__name__}")(func)
+    
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        if self.tracer is None:
+            return await func(self, *args, **kwargs)
+        with self.tracer.span(f"tool:{func.__name__}"):
+            return await func(self, *args, **kwargs)
+    return wrapper
 
 
 class WeatherAssistantFunctions(llm.FunctionContext):
     """Weather assistant function definitions for LLM"""
     
+    def __init__(self, tracer: Optional[TurnTracer] = None):
+        """
+        Args:
+            tracer: Turn tracer of the room, timing each tool call
+        """
+        self.tracer = tracer
+        super().__init__()
+    
     @llm.ai_callable(
         description="Get the current weather for a specific city. "
         "Use this when user asks about current weather, temperature, or conditions."
     )
+    @traced_tool
     async def get_weather(
         self,
         city: Annotated[str, llm.TypeInfo(description="The name of the city to get weather for")]
@@ -56,41 +180,220 @@ class WeatherAssistantFunctions(llm.FunctionContext):
         logger.info(f"Fetching weather for city: {city}")
         
         # Get weather data
-        weather_data = weather_api.get_current_weather(city)
+        start = time.perf_counter()
+        weather_data = await weather_api.get_current_weather(city)
+        fetched = time.perf_counter()
         
         # Format response
         response = format_weather_response(weather_data)
+        TOOL_SECONDS.observe(fetched - start, "get_weather", "upstream")
+        TOOL_SECONDS.observe(time.perf_counter() - fetched, "get_weather", "format")
         
         logger.info(f"Weather response: {response}")
         return response
     
     @llm.ai_callable(
-        description="Get weather forecast for tomorrow for a specific city. "
+        description="Get weather forecast for tomorrow (or another of the next few days) for a specific city. "
         "Use this when user asks about tomorrow's weather, future weather, or rain probability."
     )
+    @traced_tool
     async def get_forecast(
         self,
-        city: Annotated[str, llm.TypeInfo(description="The name of the city to get forecast for")]
+        city: Annotated[str, llm.TypeInfo(description="The name of the city to get forecast for")],
+        days_ahead: Annotated[int, llm.TypeInfo(description="Days from today: 1 for tomorrow, 2 for the day after, up to 5")] = 1
     ) -> str:
         """
         Fetch weather forecast for a city
         
         Args:
             city: Name of the city
+            days_ahead: Day to forecast (1 = tomorrow)
             
         Returns:
             Formatted forecast information
         """
-        logger.info(f"Fetching forecast for city: {city}")
+        logger.info(f"Fetching forecast for city: {city} ({days_ahead} days ahead)")
         
-        # Get forecast data
-        forecast_data = weather_api.get_forecast(city)
+        # Get forecast data (follow-up days are served from the cached 5-day series)
+        start = time.perf_counter()
+        forecast_data = await weather_api.get_forecast(city, days_ahead=days_ahead)
+        fetched = time.perf_counter()
         
         # Format response
         response = format_forecast_response(forecast_data)
+        TOOL_SECONDS.observe(fetched - start, "get_forecast", "upstream")
+        TOOL_SECONDS.observe(time.perf_counter() - fetched, "get_forecast", "format")
         
         logger.info(f"Forecast response: {response}")
         return response
+    
+    @llm.ai_callable(
+        description="Compare the current weather of several cities in one call. "
+        "Use this when the user asks which of two or more cities is warmer, colder, more humid or windier, "
+        "or asks to compare cities, instead of calling get_weather once per city."
+    )
+    @traced_tool
+    async def compare_weather(
+        self,
+        cities: Annotated[List[str], llm.TypeInfo(description="Names of the cities to compare")],
+        ranking: Annotated[str, llm.TypeInfo(
+            description="How to rank the cities",
+            choices=list(RANKINGS)
+        )] = "warmest"
+    ) -> str:
+        """
+        Fetch current weather for several cities concurrently and rank them
+        
+        Args:
+            cities: Names of the cities
+            ranking: Key of RANKINGS to order the cities by
+            
+        Returns:
+            One combined comparison
+        """
+        cities = list(dict.fromkeys(cities))[:WEATHER_COMPARE_MAX_CITIES]
+        if not cities:
+            return "Please tell me which cities to compare."
+        logger.info(f"Comparing weather for cities: {cities} ({ranking})")
+        
+        # All cities in one round trip instead of one tool call each
+        start = time.perf_counter()
+        results = await weather_api.get_current_weather_many(cities)
+        fetched = time.perf_counter()
+        
+        # Format response
+        response = format_comparison_response(results, ranking if ranking in RANKINGS else "warmest")
+        TOOL_SECONDS.observe(fetched - start, "compare_weather", "upstream")
+        TOOL_SECONDS.observe(time.perf_counter() - fetched, "compare_weather", "format")
+        
+        logger.info(f"Comparison response: {response}")
+        return response
+
+
+class LocalReplyStream(llm.LLMStream):
+    """LLM stream yielding one reply computed locally instead of by the model"""
+    
+    def __init__(self, chat_ctx: llm.ChatContext, reply: Awaitable[str]):
+        super().__init__(chat_ctx=chat_ctx, fnc_ctx=None)
+        self._reply = reply
+        self._done = False
+    
+    async def __anext__(self) -> llm.ChatChunk:
+        if self._done:
+            raise StopAsyncIteration
+        self._done = True
+        text = await self._reply
+        return llm.ChatChunk(choices=[llm.Choice(delta=llm.ChoiceDelta(role="assistant", content=text))])
+
+
+async def answer_locally(text: str) -> str:
+    """
+    Answer a plain weather request without the LLM
+    
+    Args:
+        text: User's transcribed question (must pass is_simple_request)
+        
+    Returns:
+        Spoken answer
+    """
+    intent = detect_intent(text)
+    city = prefetcher.gazetteer.find(text).name
+    logger.info(f"Fast path: {intent.kind} weather for {city}")
+    if intent.kind == "forecast":
+        weather_data = await weather_api.get_forecast(city, days_ahead=intent.days_ahead)
+    else:
+        weather_data = await weather_api.get_current_weather(city)
+    return format_answer(intent, weather_data)
+
+
+def before_llm(assistant: VoiceAssistant, chat_ctx: llm.ChatContext, tracer: Optional[TurnTracer] = None):
+    """
+    Answer simple weather turns locally, or prefetch weather for the LLM
+    
+    With AGENT_FAST_PATH, a plain "weather in X" / "tomorrow in X" question
+    about a known city is answered from the weather API and spoken as-is;
+    the reply still goes through TTS and into the chat context. Otherwise
+    the lookup for a city in the message starts now and overlaps with the
+    LLM's first pass, so the get_weather or get_forecast call that follows
+    finds the result cached (or joins the in-flight request). Returning
+    None keeps the default LLM behaviour.
+    
+    Prompts going to the LLM are trimmed to the last AGENT_CONTEXT_MAX_TURNS
+    turns and AGENT_CONTEXT_MAX_TOKENS, with older turns summarized, so
+    their size (and LLM latency) stays flat over a long session.
+    
+    The route taken is recorded on the room's turn tracer, if given.
+    """
+    if not chat_ctx.messages or chat_ctx.messages[-1].role != "user":
+        return None
+    text = chat_ctx.messages[-1].content
+    if not isinstance(text, str):
+        return None
+    
+    if AGENT_FAST_PATH and is_simple_request(text):
+        TURNS.inc("fast_path")
+        if tracer is not None:
+            tracer.set_route("fast_path")
+        reply = asyncio.get_running_loop().create_task(answer_locally(text))
+        return LocalReplyStream(chat_ctx, reply)
+    
+    TURNS.inc("llm")
+    if tracer is not None:
+        tracer.set_route("llm")
+    prefetcher.observe(text)
+    
+    # chat_ctx is a copy made for this reply; the stored history is pruned separately
+    trimmed = trim_chat_context(chat_ctx, AGENT_CONTEXT_MAX_TURNS, AGENT_CONTEXT_MAX_TOKENS)
+    PROMPT_TOKENS.observe(trimmed.tokens)
+    if trimmed.summarized:
+        CONTEXT_TRIMMED_TURNS.inc("summarized", amount=trimmed.summarized)
+    if trimmed.dropped:
+        CONTEXT_TRIMMED_TURNS.inc("dropped", amount=trimmed.dropped)
+    prune_history(assistant.chat_ctx, AGENT_CONTEXT_MAX_TURNS)
+    logger.debug(f"Prompt: ~{trimmed.tokens} tokens, {trimmed.kept} turns kept, {trimmed.summarized} summarized")
+    return None
+
+
+def tts_cache_metrics(tts: CachedTTS):
+    """Expose TTS cache counters to the metrics registry"""
+    stats = tts.stats()
+    return [
+        ("agent_tts_cache_lookups_total", "counter", "Synthesized speech cache lookups by result", [
+            ({"result": "hit"}, stats["hits"]),
+            ({"result": "disk_hit"}, stats["disk_hits"]),
+            ({"result": "miss"}, stats["misses"])
+        ]),
+        ("agent_tts_cache_bytes", "gauge", "PCM bytes held by the in-memory TTS cache",
+         [({}, stats["bytes"])]),
+        ("agent_tts_cache_evictions_total", "counter", "LRU evictions from the TTS cache",
+         [({}, stats["evictions"])])
+    ]
+
+
+def prewarm(proc: JobProcess):
+    """
+    Load models and create plugin clients once per worker process
+    
+    Runs while the process sits idle in the pool, so jobs start without
+    loading the VAD model or setting up API clients.
+    
+    Args:
+        proc: JobProcess whose userdata is shared by every job it runs
+    """
+    proc.userdata["vad"] = silero.VAD.load()  # Voice Activity Detection
+    proc.userdata["stt"] = openai.STT()  # Speech-to-Text
+    proc.userdata["llm"] = openai.LLM(model="gpt-4o-mini")  # Language Model
+    # Text-to-Speech, replaying cached audio for repeated sentences
+    tts = CachedTTS(
+        openai.TTS(voice="alloy"),
+        voice="openai/tts-1/alloy",
+        max_bytes=AGENT_TTS_CACHE_MAX_BYTES,
+        disk_path=AGENT_TTS_CACHE_PATH,
+        disk_max_bytes=AGENT_TTS_CACHE_DISK_MAX_BYTES
+    )
+    proc.userdata["tts"] = tts
+    REGISTRY.register_collector(lambda: tts_cache_metrics(tts))
+    logger.info("Worker process prewarmed")
 
 
 async def entrypoint(ctx: JobContext):
@@ -100,6 +403,8 @@ async def entrypoint(ctx: JobContext):
     Args:
         ctx: JobContext from LiveKit
     """
+    job_start = time.perf_counter()
+    
     # System prompt for the assistant
     initial_ctx = llm.ChatContext().append(
         role="system",
@@ -108,6 +413,7 @@ async def entrypoint(ctx: JobContext):
             "You help users get weather information for any city they ask about. "
             "When a user asks about weather, use the get_weather function to fetch current weather data. "
             "When they ask about tomorrow or future weather, use the get_forecast function. "
+            "When they compare several cities, call compare_weather once with all of them. "
             "Always mention the city name in your response. "
             "Be conversational and helpful. "
             "If the user greets you, greet them back warmly. "
@@ -115,24 +421,41 @@ async def entrypoint(ctx: JobContext):
         ),
     )
     
+    await start_metrics_server()
+    
     logger.info("Connecting to room: %s", ctx.room.name)
     
     # Connect to the room
     await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
+    JOB_START_SECONDS.observe(time.perf_counter() - job_start, "connect")
     
     # Wait for the first participant to join
     participant = await ctx.wait_for_participant()
+    joined = time.perf_counter()
     logger.info(f"Participant joined: {participant.identity}")
     
-    # Initialize the voice assistant
+    # Initialize the voice assistant with the plugins loaded by prewarm(),
+    # wrapped to timestamp each stage of every turn
+    userdata = ctx.proc.userdata
+    tracer = TurnTracer(ctx.room.name, trace_writer)
     assistant = VoiceAssistant(
-        vad=silero.VAD.load(),  # Voice Activity Detection
-        stt=openai.STT(),  # Speech-to-Text
-        llm=openai.LLM(model="gpt-4o-mini"),  # Language Model
-        tts=openai.TTS(voice="alloy"),  # Text-to-Speech
+        vad=userdata["vad"],
+        stt=TracedSTT(userdata["stt"], tracer),
+        llm=TracedLLM(userdata["llm"], tracer),
+        tts=TracedTTS(userdata["tts"], tracer),
         chat_ctx=initial_ctx,
-        fnc_ctx=WeatherAssistantFunctions(),  # Weather functions
+        fnc_ctx=WeatherAssistantFunctions(tracer),  # Weather functions
+        before_llm_cb=functools.partial(before_llm, tracer=tracer),  # Fast path, prefetch, context trimming
     )
+    tracer.attach(assistant)
+    
+    @assistant.once("agent_started_speaking")
+    def on_greeting_started():
+        elapsed = time.perf_counter() - joined
+        JOB_START_SECONDS.observe(elapsed, "greeting")
+        if elapsed > AGENT_GREETING_BUDGET:
+            GREETING_OVER_BUDGET.inc()
+            logger.warning(f"Greeting started {elapsed:.2f}s after join (budget {AGENT_GREETING_BUDGET:.2f}s)")
     
     # Start the assistant
     assistant.start(ctx.room, participant)
@@ -154,6 +477,7 @@ if __name__ == "__main__":
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
+            prewarm_fnc=prewarm,
             request_fnc=request_fnc,
         )
     )
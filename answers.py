@@ -0,0 +1,247 @@
+"""
+Answer Planning Module
+Request handling shared by the Flask (app.py) and ASGI (asgi.py) servers:
+questions are turned into a Plan naming one weather client lookup, and the
+lookup's result into a JSON answer and its freshness. The servers only run
+the lookup, blocking or awaited
+"""
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from config import WEATHER_BATCH_MAX_ITEMS
+from intent import Comparison, detect_comparison, detect_intent, extract_city, format_answer
+from metrics import REGISTRY
+from quota import BATCH, INTERACTIVE
+from weather_api import format_comparison_response, format_weather_response
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "weather_stage_seconds", "Time spent in each stage of answering a query", ["stage"]
+)
+
+# (JSON payload, seconds until its underlying weather data expires)
+Answer = Tuple[Dict, float]
+
+
+class Plan(NamedTuple):
+    """One weather client lookup and how to turn its result into an answer"""
+    method: Optional[str]  # WeatherAPI / AsyncWeatherAPI method (None = nothing to look up)
+    args: Tuple
+    kwargs: Dict
+    finish: Callable[[Any], Answer]  # builds the answer from the lookup's result
+
+
+def error_payload(message: str) -> Dict:
+    """JSON body of a failed request"""
+    return {'response': message, 'success': False}
+
+
+def json_body_error(is_json: bool, data: Any) -> Optional[Tuple[Dict, int]]:
+    """
+    Check the body of a POST /api/weather request
+
+    Args:
+        is_json: Whether the request's Content-Type is JSON
+        data: Body parsed without raising (None if it is not valid JSON)
+
+    Returns:
+        (error payload, HTTP status), or None if the body is a JSON object
+    """
+    if not is_json:
+        return error_payload("The request body must be JSON."), 415
+    if not isinstance(data, dict):
+        return error_payload("The request body must be a JSON object."), 400
+    return None
+
+
+def _ready(answer: Answer) -> Plan:
+    # An answer that needs no upstream lookup
+    return Plan(None, (), {}, lambda _: answer)
+
+
+def _weather_answer(weather_api, intent, city: str) -> Callable[[Dict], Answer]:
+    def finish(weather_data: Dict) -> Answer:
+        with STAGE_SECONDS.time('format'):
+            response = format_answer(intent, weather_data)
+        return {'response': response, 'success': weather_data['success']}, weather_api.freshness(intent.kind, city)
+    return finish
+
+
+def plan_query(weather_api, query: str, lane: int = INTERACTIVE) -> Plan:
+    """
+    Plan the answer to a free-text question
+
+    Args:
+        weather_api: WeatherAPI or AsyncWeatherAPI (used for cache freshness)
+        query: User's query string
+        lane: Quota priority lane for upstream lookups
+
+    Returns:
+        Plan whose finish() gives the answer dictionary and its freshness
+    """
+    query = query.lower()
+
+    with STAGE_SECONDS.time('intent'):
+        intent = detect_intent(query)
+        # Comparisons cover current weather; forecast questions name one city
+        comparison = detect_comparison(query) if intent.kind == 'current' else None
+
+    if comparison is not None:
+        return plan_comparison(weather_api, comparison, lane)
+
+    with STAGE_SECONDS.time('extract_city'):
+        city = extract_city(query)
+
+    if not city:
+        return _ready((error_payload(
+            "I'm sorry, I couldn't understand which city you're asking about. Please try again."
+        ), 0.0))
+
+    finish = _weather_answer(weather_api, intent, city)
+    if intent.kind == 'forecast':
+        return Plan('get_forecast', (city,), {'days_ahead': intent.days_ahead, 'lane': lane}, finish)
+    return Plan('get_current_weather', (city,), {'lane': lane}, finish)
+
+
+def plan_comparison(weather_api, comparison: Comparison, lane: int = INTERACTIVE) -> Plan:
+    """
+    Plan a comparison: every city is fetched concurrently, answered in one sentence
+
+    Args:
+        weather_api: WeatherAPI or AsyncWeatherAPI (used for cache freshness)
+        comparison: Cities and ranking detected in the question
+        lane: Quota priority lane for upstream lookups
+
+    Returns:
+        Plan whose answer is as fresh as its stalest city
+    """
+    def finish(results: List[Dict]) -> Answer:
+        with STAGE_SECONDS.time('format'):
+            response = format_comparison_response(results, comparison.ranking)
+        freshness = min(weather_api.freshness('current', city) for city in comparison.cities)
+        return {'response': response, 'success': any(r['success'] for r in results)}, freshness
+
+    return Plan('get_current_weather_many', (comparison.cities,), {'lane': lane}, finish)
+
+
+def plan_location(weather_api, lat: float, lon: float, query: str = '', lane: int = INTERACTIVE) -> Plan:
+    """
+    Plan the answer to a question about the weather at a GPS coordinate
+
+    Nearby coordinates fall in the same geo tile and share its cached result.
+
+    Args:
+        weather_api: WeatherAPI or AsyncWeatherAPI
+        lat: Latitude in degrees
+        lon: Longitude in degrees
+        query: Optional question text (e.g. "will it rain tomorrow")
+        lane: Quota priority lane for upstream lookups
+
+    Returns:
+        Plan whose finish() gives the answer dictionary and its freshness
+    """
+    with STAGE_SECONDS.time('intent'):
+        intent = detect_intent(query)
+
+    tile = weather_api.geo_tile(lat, lon)
+
+    def finish(weather_data: Dict) -> Answer:
+        with STAGE_SECONDS.time('format'):
+            response = format_answer(intent, weather_data)
+        freshness = weather_api.freshness(intent.kind, tile) if tile else 0.0
+        return {'response': response, 'success': weather_data['success']}, freshness
+
+    if intent.kind == 'forecast':
+        return Plan('get_forecast_at', (lat, lon), {'days_ahead': intent.days_ahead, 'lane': lane}, finish)
+    return Plan('get_current_weather_at', (lat, lon), {'lane': lane}, finish)
+
+
+def plan_batch_item(weather_api, kind: str, value: str) -> Plan:
+    """
+    Plan one entry of a batch request
+
+    Batch items use the BATCH quota lane, so they yield upstream budget to
+    interactive queries.
+
+    Args:
+        weather_api: WeatherAPI or AsyncWeatherAPI
+        kind: 'city' for a plain city name, 'query' for a free-text question
+        value: City name or query text
+
+    Returns:
+        Plan whose finish() gives the item's result dictionary and freshness
+    """
+    if kind == 'query':
+        plan = plan_query(weather_api, value, lane=BATCH)
+
+        def finish_query(data: Any) -> Answer:
+            result, freshness = plan.finish(data)
+            return {'query': value, **result}, freshness
+
+        return plan._replace(finish=finish_query)
+
+    def finish(weather_data: Dict) -> Answer:
+        return {
+            'city': value,
+            'response': format_weather_response(weather_data),
+            'success': weather_data['success'],
+            'data': weather_data
+        }, weather_api.freshness('current', value)
+
+    return Plan('get_current_weather', (value,), {'lane': BATCH}, finish)
+
+
+def batch_item_error(kind: str, value: str, error: Exception) -> Answer:
+    """Turn a failed batch item into a per-item error instead of failing the batch"""
+    return {kind: value, 'response': f"An unexpected error occurred: {str(error)}", 'success': False}, 0.0
+
+
+def validate_batch(cities: Any, queries: Any) -> Tuple[List[Tuple[str, str]], Optional[str]]:
+    """
+    Check the cities and queries of a batch request
+
+    Args:
+        cities: 'cities' of the request body (or repeated ?city= values)
+        queries: 'queries' of the request body (or repeated ?query= values)
+
+    Returns:
+        ([(kind, value), ...] items in request order, None), or ([], error message)
+    """
+    if not isinstance(cities, list) or not isinstance(queries, list) or \
+            not all(isinstance(item, str) for item in cities + queries):
+        return [], "'cities' and 'queries' must be lists of strings."
+
+    items = [('city', city) for city in cities] + [('query', query) for query in queries]
+    if not items:
+        return [], "Please provide 'cities' or 'queries'."
+    if len(items) > WEATHER_BATCH_MAX_ITEMS:
+        return [], f"A batch can contain at most {WEATHER_BATCH_MAX_ITEMS} items."
+    return items, None
+
+
+def batch_answer(answers: List[Answer]) -> Answer:
+    """Combine per-item answers into the batch response"""
+    results = [result for result, _ in answers]
+    # The batch is only as fresh as its stalest item
+    max_age = min(freshness for _, freshness in answers)
+    return {'results': results, 'success': all(r['success'] for r in results)}, max_age
+
+
+def read_coordinates(data) -> Optional[Tuple[float, float]]:
+    """
+    Read the optional 'lat' and 'lon' of a weather request
+
+    Args:
+        data: Query arguments or JSON body
+
+    Returns:
+        (lat, lon), or None if the request has neither
+
+    Raises:
+        ValueError: If only one is given or either is not a number
+    """
+    if data.get('lat') is None and data.get('lon') is None:
+        return None
+    try:
+        return float(data.get('lat')), float(data.get('lon'))
+    except (TypeError, ValueError):
+        raise ValueError("'lat' and 'lon' must both be numbers.")
@@ -5,10 +5,31 @@ Uses Web Speech API for simpler testing without LiveKit server
 
 import os
 import json
-from flask import Flask, render_template, request, jsonify
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+from flask import Flask, Response, g, render_template, request, jsonify
 from dotenv import load_dotenv
 
-from weather_api import WeatherAPI, format_weather_response, format_forecast_response
+from answers import (
+    Answer,
+    Plan,
+    STAGE_SECONDS,
+    batch_answer,
+    batch_item_error,
+    error_payload,
+    json_body_error,
+    plan_batch_item,
+    plan_location,
+    plan_query,
+    read_coordinates,
+    validate_batch,
+)
+from config import WEATHER_BATCH_MAX_WORKERS, WEATHER_HTTP_POOL_SIZE
+from http_cache import compress_response, set_cache_headers
+from metrics import CONTENT_TYPE, REGISTRY
+from profiling import profiled, request_capture
+from weather_api import WeatherAPI
 
 # Load environment variables
 load_dotenv()
@@ -16,8 +37,61 @@ load_dotenv()
 # Initialize Flask app
 app = Flask(__name__)
 
-# Initialize weather API
-weather_api = WeatherAPI()
+# Initialize weather API (enough pooled connections for a full batch)
+weather_api = WeatherAPI(pool_size=max(WEATHER_HTTP_POOL_SIZE, WEATHER_BATCH_MAX_WORKERS))
+
+# Bounded worker pool shared by all batch requests
+batch_executor = ThreadPoolExecutor(max_workers=WEATHER_BATCH_MAX_WORKERS, thread_name_prefix="weather-batch")
+
+# Latency per request (per-stage latency is recorded by answers.py)
+REQUEST_SECONDS = REGISTRY.histogram(
+    "weather_http_request_seconds", "HTTP request latency by route and status", ["route", "status"]
+)
+REGISTRY.register_collector(weather_api.collect_metrics)
+
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        # Label by route pattern, not raw path, to keep the series count bounded
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        REQUEST_SECONDS.observe(time.perf_counter() - start, route, str(response.status_code))
+    return response
+
+
+@app.after_request
+def compress(response):
+    """Gzip larger text and JSON bodies for clients that accept it"""
+    if response.status_code != 200 or response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return response
+    
+    compress_response(response, response.get_data(), request.accept_encodings['gzip'] > 0)
+    return response
+
+
+def cacheable_json(payload: Dict, max_age: float):
+    """
+    JSON response whose HTTP caching follows the freshness of its weather data
+    
+    Sets Cache-Control and a weak ETag; a GET whose If-None-Match matches
+    gets an empty 304 instead.
+    
+    Args:
+        payload: Response body
+        max_age: Seconds until the underlying cached data expires
+        
+    Returns:
+        Flask response
+    """
+    response = jsonify(payload)
+    set_cache_headers(response, response.get_data(), max_age)
+    return response.make_conditional(request)
 
 
 @app.route('/')
@@ -26,96 +100,93 @@ def index():
     return render_template('index.html')
 
 
-@app.route('/api/weather', methods=['POST'])
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
+@app.route('/admin/profile', methods=['POST'])
+def start_profile():
+    """Profile the whole process for the next ?seconds=N (needs PROFILE_DIR and X-Admin-Token)"""
+    payload, status = request_capture(request.headers.get('X-Admin-Token', ''), request.args.get('seconds'))
+    return jsonify(payload), status
+
+
+@app.route('/api/weather', methods=['GET', 'POST'])
+@profiled('api_weather')
 def get_weather():
-    """API endpoint to get weather information"""
-    data = request.json
-    query = data.get('query', '').lower()
+    """
+    API endpoint to get weather information (GET ?query=... is cacheable)
     
-    # Enhanced intent detection
-    # Check for tomorrow/forecast queries (explicit future)
-    tomorrow_keywords = ['tomorrow', 'forecast', 'next day']
-    is_tomorrow_query = any(keyword in query for keyword in tomorrow_keywords)
+    With 'lat' and 'lon', the weather at that coordinate is returned and
+    'query' only decides between current weather and forecast.
+    """
+    data = request.args if request.method == 'GET' else request.get_json(silent=True)
+    if request.method == 'POST':
+        error = json_body_error(request.is_json, data)
+        if error is not None:
+            payload, status = error
+            return jsonify(payload), status
+    query = data.get('query', '')
     
-    # Check for rain queries without "tomorrow" - should check forecast
-    rain_query_without_tomorrow = ('rain' in query or 'raining' in query) and not any(word in query for word in ['today', 'now', 'current', 'currently'])
+    try:
+        coordinates = read_coordinates(data)
+    except ValueError as e:
+        return jsonify(error_payload(str(e))), 400
+    
+    if coordinates is not None:
+        return cacheable_json(*answer(plan_location(weather_api, *coordinates, query)))
+    return cacheable_json(*answer(plan_query(weather_api, query)))
+
+
+@app.route('/api/weather/batch', methods=['GET', 'POST'])
+def get_weather_batch():
+    """
+    API endpoint to get weather for many cities and/or queries in one call
     
-    if is_tomorrow_query or (rain_query_without_tomorrow and 'tomorrow' not in query):
-        # Get forecast for tomorrow
-        city = extract_city(query)
-        if city:
-            forecast_data = weather_api.get_forecast(city)
-            response = format_forecast_response(forecast_data)
-            return jsonify({'response': response, 'success': forecast_data['success']})
+    GET takes repeated ?city=...&query=... parameters and is cacheable.
+    """
+    if request.method == 'GET':
+        cities = request.args.getlist('city')
+        queries = request.args.getlist('query')
     else:
-        # Get current weather (for today, now, or general weather questions)
-        city = extract_city(query)
-        if city:
-            weather_data = weather_api.get_current_weather(city)
-            
-            # If asking about rain today, mention rain probability from current data
-            if 'rain' in query and 'today' in query:
-                if weather_data['success']:
-                    weather_desc = weather_data['description'].lower()
-                    if 'rain' in weather_desc or 'drizzle' in weather_desc:
-                        response = f"Yes, it's currently raining in {weather_data['city']}. The weather is {weather_data['description']} with a temperature of {weather_data['temperature']}°C."
-                    else:
-                        response = f"No, it's not raining in {weather_data['city']} right now. The weather is {weather_data['description']} with a temperature of {weather_data['temperature']}°C."
-                else:
-                    response = format_weather_response(weather_data)
-            else:
-                response = format_weather_response(weather_data)
-            
-            return jsonify({'response': response, 'success': weather_data['success']})
+        data = request.get_json(silent=True) or {}
+        cities = data.get('cities', [])
+        queries = data.get('queries', [])
+    
+    items, message = validate_batch(cities, queries)
+    if message is not None:
+        return jsonify(error_payload(message)), 400
     
-    return jsonify({
-        'response': "I'm sorry, I couldn't understand which city you're asking about. Please try again.",
-        'success': False
-    })
+    # Fan out over the shared bounded pool; results keep the request order
+    answers: List[Answer] = list(batch_executor.map(lambda item: answer_batch_item(*item), items))
+    return cacheable_json(*batch_answer(answers))
 
 
-def extract_city(query: str) -> str:
+def answer(plan: Plan) -> Answer:
     """
-    Enhanced city extraction from query
+    Run a plan's upstream lookup on the calling thread and build its answer
     
     Args:
-        query: User's query string
+        plan: Plan from answers.py
         
     Returns:
-        Extracted city name or empty string
+        (answer dictionary, seconds until the underlying data expires)
     """
-    query_lower = query.lower()
-    
-    # Remove common words and weather-related adjectives
-    words_to_remove = [
-        'what', 'is', 'the', 'weather', 'in', 'at', 'for', 'about',
-        'how', 'will', 'it', 'rain', 'tomorrow', 'today', 'forecast',
-        'temperature', 'like', 'whats', "what's", 'tell', 'me', 'please',
-        'be', 'there', 'a', 'chance', 'of', 'going', 'to',
-        # Weather condition words to remove
-        'cold', 'hot', 'warm', 'cool', 'sunny', 'rainy', 'cloudy',
-        'humid', 'dry', 'windy', 'foggy', 'snowy', 'stormy', 'wet'
-    ]
-    
-    # Try to find city after "in" or "at" preposition (most common pattern)
-    for prep in [' in ', ' at ']:
-        if prep in query_lower:
-            after_prep = query_lower.split(prep)[-1]
-            # Take words after preposition, stopping at common question words
-            city_part = after_prep.split('today')[0].split('tomorrow')[0].split('?')[0]
-            city = city_part.strip()
-            if city:
-                return city.title()
-    
-    # Fallback: remove common words
-    words = query_lower.split()
-    city_words = [w for w in words if w not in words_to_remove and w.strip('?.,!')]
-    
-    # Join remaining words as city name
-    city = ' '.join(city_words).strip()
-    
-    # Capitalize first letter of each word
-    return city.title() if city else ""
+    data = None
+    if plan.method is not None:
+        with STAGE_SECONDS.time('upstream'):
+            data = getattr(weather_api, plan.method)(*plan.args, **plan.kwargs)
+    return plan.finish(data)
+
+
+def answer_batch_item(kind: str, value: str) -> Answer:
+    """Answer one entry of a batch request, turning failures into per-item errors"""
+    try:
+        return answer(plan_batch_item(weather_api, kind, value))
+    except Exception as e:
+        return batch_item_error(kind, value, e)
 
 
 if __name__ == '__main__':
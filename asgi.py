@@ -0,0 +1,223 @@
+"""
+Weather Voice Assistant Demo - ASGI Server
+Async variant of app.py for production: the same routes and JSON contract,
+served by uvicorn with one shared non-blocking upstream client per process
+
+Run with:
+    python asgi.py
+or:
+    uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 4
+"""
+
+import asyncio
+import time
+from typing import Dict
+
+import uvicorn
+from dotenv import load_dotenv
+from quart import Quart, Response, g, jsonify, render_template, request
+
+from answers import (
+    Answer,
+    Plan,
+    STAGE_SECONDS,
+    batch_answer,
+    batch_item_error,
+    error_payload,
+    json_body_error,
+    plan_batch_item,
+    plan_location,
+    plan_query,
+    read_coordinates,
+    validate_batch,
+)
+from config import (
+    ASGI_HOST,
+    ASGI_PORT,
+    ASGI_SHUTDOWN_TIMEOUT,
+    ASGI_UPSTREAM_POOL_SIZE,
+    ASGI_WORKERS,
+)
+from http_cache import compress_response, set_cache_headers
+from metrics import CONTENT_TYPE, REGISTRY
+from profiling import profiled, request_capture
+from weather_api import AsyncWeatherAPI
+
+# Load environment variables
+load_dotenv()
+
+# Initialize Quart app (Flask API, async handlers)
+app = Quart(__name__)
+
+# Shared non-blocking weather client; its connection pool is opened on the
+# server's event loop by the first request and closed on shutdown
+weather_api = AsyncWeatherAPI(pool_size=ASGI_UPSTREAM_POOL_SIZE)
+
+# Same metrics as the Flask app
+REQUEST_SECONDS = REGISTRY.histogram(
+    "weather_http_request_seconds", "HTTP request latency by route and status", ["route", "status"]
+)
+REGISTRY.register_collector(weather_api.collect_metrics)
+
+
+@app.after_serving
+async def close_weather_api():
+    """Close upstream connections once in-flight requests have finished"""
+    await weather_api.aclose()
+
+
+@app.before_request
+async def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+async def record_request(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        # Label by route pattern, not raw path, to keep the series count bounded
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        REQUEST_SECONDS.observe(time.perf_counter() - start, route, str(response.status_code))
+    return response
+
+
+@app.after_request
+async def compress(response):
+    """Gzip larger text and JSON bodies for clients that accept it"""
+    if response.status_code != 200 or 'Content-Encoding' in response.headers:
+        return response
+
+    compress_response(response, await response.get_data(), request.accept_encodings['gzip'] > 0)
+    return response
+
+
+async def cacheable_json(payload: Dict, max_age: float):
+    """
+    JSON response whose HTTP caching follows the freshness of its weather data
+
+    Args:
+        payload: Response body
+        max_age: Seconds until the underlying cached data expires
+
+    Returns:
+        Quart response, or an empty 304 if the client's If-None-Match matches
+    """
+    response = jsonify(payload)
+    set_cache_headers(response, await response.get_data(), max_age)
+    await response.make_conditional(request)
+    return response
+
+
+@app.route('/')
+async def index():
+    """Serve the main HTML page"""
+    return await render_template('index.html')
+
+
+@app.route('/metrics')
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
+@app.route('/admin/profile', methods=['POST'])
+async def start_profile():
+    """Profile the whole process for the next ?seconds=N (needs PROFILE_DIR and X-Admin-Token)"""
+    payload, status = request_capture(request.headers.get('X-Admin-Token', ''), request.args.get('seconds'))
+    return jsonify(payload), status
+
+
+@app.route('/api/weather', methods=['GET', 'POST'])
+@profiled('api_weather')
+async def get_weather():
+    """
+    API endpoint to get weather information (GET ?query=... is cacheable)
+
+    With 'lat' and 'lon', the weather at that coordinate is returned and
+    'query' only decides between current weather and forecast.
+    """
+    data = request.args if request.method == 'GET' else (await request.get_json(silent=True))
+    if request.method == 'POST':
+        error = json_body_error(request.is_json, data)
+        if error is not None:
+            payload, status = error
+            return jsonify(payload), status
+    query = data.get('query', '')
+
+    try:
+        coordinates = read_coordinates(data)
+    except ValueError as e:
+        return jsonify(error_payload(str(e))), 400
+
+    if coordinates is not None:
+        return await cacheable_json(*await answer(plan_location(weather_api, *coordinates, query)))
+    return await cacheable_json(*await answer(plan_query(weather_api, query)))
+
+
+@app.route('/api/weather/batch', methods=['GET', 'POST'])
+async def get_weather_batch():
+    """
+    API endpoint to get weather for many cities and/or queries in one call
+
+    GET takes repeated ?city=...&query=... parameters and is cacheable.
+    """
+    if request.method == 'GET':
+        cities = request.args.getlist('city')
+        queries = request.args.getlist('query')
+    else:
+        data = await request.get_json(silent=True) or {}
+        cities = data.get('cities', [])
+        queries = data.get('queries', [])
+
+    items, message = validate_batch(cities, queries)
+    if message is not None:
+        return jsonify(error_payload(message)), 400
+
+    # All items run concurrently on the event loop; results keep the request order
+    answers = await asyncio.gather(*(answer_batch_item(*item) for item in items))
+    return await cacheable_json(*batch_answer(answers))
+
+
+async def answer(plan: Plan) -> Answer:
+    """
+    Await a plan's upstream lookup and build its answer
+
+    Args:
+        plan: Plan from answers.py
+
+    Returns:
+        (answer dictionary, seconds until the underlying data expires)
+    """
+    data = None
+    if plan.method is not None:
+        with STAGE_SECONDS.time('upstream'):
+            data = await getattr(weather_api, plan.method)(*plan.args, **plan.kwargs)
+    return plan.finish(data)
+
+
+async def answer_batch_item(kind: str, value: str) -> Answer:
+    """Answer one entry of a batch request, turning failures into per-item errors"""
+    try:
+        return await answer(plan_batch_item(weather_api, kind, value))
+    except Exception as e:
+        return batch_item_error(kind, value, e)
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Weather Voice Assistant Demo (ASGI) Starting...")
+    print("=" * 60)
+    print(f"\nListening on http://{ASGI_HOST}:{ASGI_PORT} with {ASGI_WORKERS} worker(s)")
+    print("=" * 60)
+
+    # On SIGTERM/SIGINT uvicorn stops accepting connections and waits up to
+    # ASGI_SHUTDOWN_TIMEOUT seconds for in-flight requests before closing
+    uvicorn.run(
+        "asgi:app",
+        host=ASGI_HOST,
+        port=ASGI_PORT,
+        workers=ASGI_WORKERS,
+        backlog=4096,
+        timeout_graceful_shutdown=ASGI_SHUTDOWN_TIMEOUT,
+        access_log=False
+    )
@@ -0,0 +1,183 @@
+"""
+Fake OpenWeatherMap Server
+Local stand-in for api.openweathermap.org with configurable latency and errors
+
+Run standalone:
+    python benchmarks/fake_owm.py --port 8089 --latency-ms 150 --error-rate 0.01
+then set OPENWEATHER_BASE_URL=http://127.0.0.1:8089/data/2.5
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+# Conditions cycled through by the generated payloads: (id, main, description)
+CONDITIONS = [
+    (800, "Clear", "clear sky"),
+    (802, "Clouds", "scattered clouds"),
+    (500, "Rain", "light rain"),
+    (721, "Haze", "haze"),
+]
+
+
+def _city_name(params: Dict[str, str]) -> str:
+    if "id" in params:
+        return f"City {params['id']}"
+    if "lat" in params:
+        return f"Location {params['lat']},{params['lon']}"
+    return params.get("q", "Unknown").title()
+
+
+def _current_payload(name: str, city_id: int) -> Dict:
+    seed = random.Random(name)
+    condition_id, main, description = seed.choice(CONDITIONS)
+    temp = seed.uniform(5, 38)
+    return {
+        "id": city_id,
+        "name": name,
+        "sys": {"country": "IN"},
+        "main": {"temp": temp, "feels_like": temp + seed.uniform(-4, 4), "humidity": seed.randint(20, 95)},
+        "weather": [{"id": condition_id, "main": main, "description": description}],
+        "wind": {"speed": round(seed.uniform(0, 12), 1)}
+    }
+
+
+def _forecast_payload(name: str) -> Dict:
+    seed = random.Random(name)
+    start = int(time.time()) // 10800 * 10800
+    slots = []
+    for i in range(40):
+        condition_id, main, description = seed.choice(CONDITIONS)
+        slot = {
+            "dt": start + i * 10800,
+            "main": {"temp": seed.uniform(5, 38)},
+            "weather": [{"id": condition_id, "main": main, "description": description}],
+            "pop": round(seed.random(), 2)
+        }
+        if main == "Rain":
+            slot["rain"] = {"3h": round(seed.uniform(0.1, 5), 1)}
+        slots.append(slot)
+    return {"city": {"name": name, "country": "IN", "timezone": 19800}, "list": slots}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The stdlib default backlog of 5 drops connections under load
+    request_queue_size = 1024
+
+
+class FakeOpenWeatherMap:
+    """
+    Threaded HTTP server imitating the OpenWeatherMap endpoints used by WeatherAPI
+
+    Names starting with "unknown" return 404. A fraction of requests (error_rate)
+    return 503. Every response is delayed by latency_ms plus up to jitter_ms.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 100,
+        jitter_ms: float = 20,
+        error_rate: float = 0.0
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.calls: Counter = Counter()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                fake._handle(self)
+
+        self.server = _Server((host, port), Handler)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/data/2.5"
+
+    def start(self) -> "FakeOpenWeatherMap":
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.calls.clear()
+
+    def total_calls(self) -> int:
+        with self._lock:
+            return sum(self.calls.values())
+
+    def _handle(self, request: BaseHTTPRequestHandler) -> None:
+        url = urlparse(request.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        endpoint = url.path.rsplit("/", 1)[-1]
+        with self._lock:
+            self.calls[endpoint] += 1
+
+        time.sleep((self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000)
+
+        name = _city_name(params)
+        if random.random() < self.error_rate:
+            self._send(request, 503, {"cod": 503, "message": "service unavailable"})
+        elif name.lower().startswith("unknown"):
+            self._send(request, 404, {"cod": "404", "message": "city not found"})
+        elif endpoint == "weather":
+            self._send(request, 200, _current_payload(name, int(params.get("id", abs(hash(name)) % 10 ** 7))))
+        elif endpoint == "forecast":
+            self._send(request, 200, _forecast_payload(name))
+        elif endpoint == "group":
+            ids = [int(city_id) for city_id in params.get("id", "").split(",") if city_id]
+            items = [_current_payload(f"City {city_id}", city_id) for city_id in ids]
+            self._send(request, 200, {"cnt": len(items), "list": items})
+        else:
+            self._send(request, 404, {"cod": "404", "message": "unknown endpoint"})
+
+    @staticmethod
+    def _send(request: BaseHTTPRequestHandler, status: int, payload: Dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a fake OpenWeatherMap server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    fake = FakeOpenWeatherMap(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate)
+    print(f"Fake OpenWeatherMap listening on {fake.base_url}")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        fake.stop()
@@ -0,0 +1,279 @@
+"""
+Benchmark Harness
+Load-tests the weather assistant against a local fake OpenWeatherMap server
+
+Usage:
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --compare results.json --output new.json
+
+Reports throughput, p50/p95/p99 latency and upstream call counts per
+scenario and concurrency level, and writes them as JSON for comparison.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_owm import FakeOpenWeatherMap  # noqa: E402
+
+QUERY_TEMPLATES = [
+    "What's the weather in {city}?",
+    "Will it rain tomorrow in {city}?",
+    "How hot is it in {city} today",
+    "forecast for {city}",
+]
+
+HOT_CITIES = ["Mumbai", "Delhi", "Bangalore", "Pune", "Chennai", "Kolkata", "Hyderabad", "London"]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(name: str, concurrency: int, latencies: List[float], elapsed: float,
+              errors: int, upstream_calls: Optional[int]) -> Dict:
+    latencies.sort()
+    return {
+        "name": name,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "upstream_calls": upstream_calls
+    }
+
+
+def make_workload(count: int, cold_cities: int, hot_share: float, seed: int) -> List[str]:
+    """Mix of a few hot cities and a long tail of distinct (cold) ones"""
+    rng = random.Random(seed)
+    cold = [f"Town{i}" for i in range(cold_cities)]
+    return [
+        rng.choice(HOT_CITIES) if rng.random() < hot_share or not cold else rng.choice(cold)
+        for _ in range(count)
+    ]
+
+
+def bench_function(name: str, fn: Callable, inputs: List, iterations: int) -> Dict:
+    """Single-threaded micro-benchmark of a pure function"""
+    latencies = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        arg = inputs[i % len(inputs)]
+        t0 = time.perf_counter()
+        fn(arg)
+        latencies.append(time.perf_counter() - t0)
+    return summarize(name, 1, latencies, time.perf_counter() - start, 0, None)
+
+
+def bench_http(base_url: str, fake: FakeOpenWeatherMap, queries: List[str], concurrency: int) -> Dict:
+    """Drive POST /api/weather with a fixed number of concurrent clients"""
+    import requests
+
+    local = threading.local()
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def one(query: str) -> None:
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        t0 = time.perf_counter()
+        try:
+            response = session.post(f"{base_url}/api/weather", json={"query": query}, timeout=30)
+            failed = response.status_code != 200
+        except requests.RequestException:
+            failed = True
+        elapsed = time.perf_counter() - t0
+        with lock:
+            latencies.append(elapsed)
+            errors[0] += failed
+
+    fake.reset_counts()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, queries))
+    return summarize("api_weather", concurrency, latencies, time.perf_counter() - start,
+                     errors[0], fake.total_calls())
+
+
+def bench_agent_tools(fake: FakeOpenWeatherMap, cities: List[str], concurrency: int) -> Dict:
+    """Call the agent's get_weather/get_forecast tools concurrently on one event loop"""
+    try:
+        import agent
+        tools = agent.WeatherAssistantFunctions()
+        get_weather, get_forecast = tools.get_weather, tools.get_forecast
+        name = "agent_tools"
+        client = agent.weather_api
+    except ImportError:
+        # livekit is not installed: exercise the same client + formatter path
+        from weather_api import AsyncWeatherAPI, format_forecast_response, format_weather_response
+        client = AsyncWeatherAPI()
+
+        async def get_weather(city):
+            return format_weather_response(await client.get_current_weather(city))
+
+        async def get_forecast(city):
+            return format_forecast_response(await client.get_forecast(city))
+        name = "agent_tools[no-livekit]"
+
+    async def run() -> Dict:
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies: List[float] = []
+
+        async def one(i: int, city: str) -> None:
+            async with semaphore:
+                t0 = time.perf_counter()
+                await (get_forecast(city) if i % 4 == 0 else get_weather(city))
+                latencies.append(time.perf_counter() - t0)
+
+        client.cache.clear()
+        fake.reset_counts()
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i, city) for i, city in enumerate(cities)))
+        elapsed = time.perf_counter() - start
+        await client.aclose()
+        return summarize(name, concurrency, latencies, elapsed, 0, fake.total_calls())
+
+    return asyncio.run(run())
+
+
+def compare(previous_path: str, results: List[Dict]) -> None:
+    with open(previous_path) as f:
+        previous = {(r["name"], r["concurrency"]): r for r in json.load(f)["results"]}
+
+    print(f"\nComparison with {previous_path}")
+    print(f"{'scenario':<28}{'conc':>5}{'rps':>12}{'p95 ms':>14}{'upstream':>12}")
+    for result in results:
+        old = previous.get((result["name"], result["concurrency"]))
+        if old is None:
+            continue
+
+        def delta(key: str) -> str:
+            if not old[key]:
+                return "n/a"
+            return f"{(result[key] - old[key]) / old[key] * 100:+.1f}%"
+
+        upstream = "n/a" if result["upstream_calls"] is None else \
+            f"{old['upstream_calls']}->{result['upstream_calls']}"
+        print(f"{result['name']:<28}{result['concurrency']:>5}{delta('throughput_rps'):>12}"
+              f"{delta('p95_ms'):>14}{upstream:>12}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the weather assistant")
+    parser.add_argument("--latency-ms", type=float, default=100, help="fake upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=20, help="fake upstream latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of upstream 503s")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated client counts")
+    parser.add_argument("--requests", type=int, default=200, help="requests per concurrency level")
+    parser.add_argument("--cold-cities", type=int, default=100, help="size of the long-tail city set")
+    parser.add_argument("--hot-share", type=float, default=0.8, help="fraction of requests for hot cities")
+    parser.add_argument("--iterations", type=int, default=20000, help="iterations for micro-benchmarks")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="previous JSON results to compare against")
+    args = parser.parse_args()
+
+    fake = FakeOpenWeatherMap(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                              error_rate=args.error_rate).start()
+
+    # Must be set before the app modules read their configuration
+    os.environ["OPENWEATHER_BASE_URL"] = fake.base_url
+    os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark-key")
+    if os.environ["OPENWEATHER_API_KEY"] == "your_api_key_here":
+        os.environ["OPENWEATHER_API_KEY"] = "benchmark-key"
+
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    import app
+    from intent import extract_city
+    from weather_api import format_forecast_response, format_weather_response
+
+    levels = [int(level) for level in args.concurrency.split(",") if level]
+    cities = make_workload(args.requests, args.cold_cities, args.hot_share, args.seed)
+    queries = [random.Random(args.seed + i).choice(QUERY_TEMPLATES).format(city=city)
+               for i, city in enumerate(cities)]
+    results = []
+
+    # Pure functions
+    results.append(bench_function("extract_city", extract_city, queries, args.iterations))
+    weather_sample = {
+        "success": True, "city": "Pune", "country": "IN", "temperature": 31, "feels_like": 35,
+        "description": "haze", "humidity": 84, "wind_speed": 3.1, "main_weather": "Haze"
+    }
+    forecast_sample = {
+        "success": True, "city": "Pune", "country": "IN", "temperature": 27,
+        "description": "light rain", "rain_probability": 64
+    }
+    results.append(bench_function("format_weather_response", format_weather_response,
+                                  [weather_sample], args.iterations))
+    results.append(bench_function("format_forecast_response", format_forecast_response,
+                                  [forecast_sample], args.iterations))
+
+    # HTTP endpoint, served by a threaded WSGI server on a free port
+    server = make_server("127.0.0.1", 0, app.app, threaded=True, request_handler=QuietHandler)
+    server.socket.listen(1024)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    app_url = f"http://127.0.0.1:{server.server_port}"
+    for level in levels:
+        app.weather_api.cache.clear()
+        app.weather_api.negative_cache.clear()
+        results.append(bench_http(app_url, fake, queries, level))
+    server.shutdown()
+
+    # Agent tools on an event loop
+    for level in levels:
+        results.append(bench_agent_tools(fake, cities, level))
+
+    fake.stop()
+
+    print(f"{'scenario':<28}{'conc':>5}{'reqs':>7}{'rps':>11}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'p99 ms':>10}{'errors':>8}{'upstream':>10}")
+    for r in results:
+        upstream = "-" if r["upstream_calls"] is None else r["upstream_calls"]
+        print(f"{r['name']:<28}{r['concurrency']:>5}{r['requests']:>7}{r['throughput_rps']:>11}"
+              f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['errors']:>8}{upstream:>10}")
+
+    if args.compare:
+        compare(args.compare, results)
+
+    if args.output:
+        report = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "args": vars(args)
+            },
+            "results": results
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,7 +13,7 @@ class Config:
     
     # OpenWeatherMap API
     OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY")
-    OPENWEATHER_BASE_URL = "https://api.openweathermap.org/data/2.5"
+    OPENWEATHER_BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "https://api.openweathermap.org/data/2.5")
     
     # OpenAI API (for LiveKit agent)
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -43,9 +43,118 @@ class Config:
 
 
 # Weather API settings
+WEATHER_API_BASE_URL = Config.OPENWEATHER_BASE_URL  # override to point at a local stand-in
 WEATHER_API_TIMEOUT = 10  # seconds
+WEATHER_CONNECT_TIMEOUT = float(os.getenv("WEATHER_CONNECT_TIMEOUT", "3.05"))  # seconds
+WEATHER_READ_TIMEOUT = float(os.getenv("WEATHER_READ_TIMEOUT", str(WEATHER_API_TIMEOUT)))  # seconds
 WEATHER_UNITS = "metric"  # Use Celsius
 
+# Response cache settings (per endpoint TTL, LRU bounded)
+WEATHER_CACHE_TTL_CURRENT = int(os.getenv("WEATHER_CACHE_TTL_CURRENT", "300"))  # seconds
+WEATHER_CACHE_TTL_FORECAST = int(os.getenv("WEATHER_CACHE_TTL_FORECAST", "1800"))  # seconds
+WEATHER_CACHE_MAX_ENTRIES = int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", "1024"))
+WEATHER_NEGATIVE_CACHE_TTL = int(os.getenv("WEATHER_NEGATIVE_CACHE_TTL", "60"))  # seconds, for unknown cities
+
+# Optional SQLite file shared by all app/agent processes on the host (empty disables)
+WEATHER_CACHE_PATH = os.getenv("WEATHER_CACHE_PATH", "")
+WEATHER_CACHE_DISK_MAX_ENTRIES = int(os.getenv("WEATHER_CACHE_DISK_MAX_ENTRIES", "10000"))
+
+# Stale-while-revalidate: expired entries are served for this long while a
+# background refresh runs (0 disables)
+WEATHER_CACHE_STALE_TTL = int(os.getenv("WEATHER_CACHE_STALE_TTL", "120"))  # seconds
+
+# Proactive refresh of the most requested cities (top N = 0 disables)
+WEATHER_REFRESH_TOP_N = int(os.getenv("WEATHER_REFRESH_TOP_N", "0"))
+WEATHER_REFRESH_BUDGET_PER_MINUTE = int(os.getenv("WEATHER_REFRESH_BUDGET_PER_MINUTE", "30"))
+WEATHER_REFRESH_INTERVAL = float(os.getenv("WEATHER_REFRESH_INTERVAL", "5"))  # seconds between scheduler runs
+WEATHER_REFRESH_LEAD_TIME = float(os.getenv("WEATHER_REFRESH_LEAD_TIME", "30"))  # seconds before expiry
+
+# Upstream HTTP connection pool and retry policy
+WEATHER_HTTP_POOL_SIZE = int(os.getenv("WEATHER_HTTP_POOL_SIZE", "10"))
+WEATHER_RETRY_TOTAL = int(os.getenv("WEATHER_RETRY_TOTAL", "2"))
+WEATHER_RETRY_BACKOFF = float(os.getenv("WEATHER_RETRY_BACKOFF", "0.3"))  # seconds, doubled per retry
+
+# Opt-in micro-batching of current weather lookups into OpenWeatherMap group
+# requests (0 disables; the provider accepts up to 20 city IDs per call)
+WEATHER_GROUP_BATCH_WINDOW_MS = int(os.getenv("WEATHER_GROUP_BATCH_WINDOW_MS", "0"))
+WEATHER_GROUP_BATCH_MAX = int(os.getenv("WEATHER_GROUP_BATCH_MAX", "20"))
+
+# Batch endpoint (concurrent fan-out). With as many workers as items, a full
+# batch takes about as long as its slowest lookup; fewer workers save threads
+# and upstream connections but run a full batch in several waves
+WEATHER_BATCH_MAX_ITEMS = int(os.getenv("WEATHER_BATCH_MAX_ITEMS", "50"))
+WEATHER_BATCH_MAX_WORKERS = int(os.getenv("WEATHER_BATCH_MAX_WORKERS", str(WEATHER_BATCH_MAX_ITEMS)))
+
+# Comparison questions ("is it warmer in Pune or Delhi?"): most cities fetched
+# concurrently for one answer
+WEATHER_COMPARE_MAX_CITIES = int(os.getenv("WEATHER_COMPARE_MAX_CITIES", "5"))
+
+# Coordinate lookups are snapped to grid cells of about this size, so nearby
+# users share one cached result (0 = exact coordinates, ~10 m cells)
+WEATHER_GEO_TILE_KM = float(os.getenv("WEATHER_GEO_TILE_KM", "5"))
+
+# Client-side upstream quota matching the OpenWeatherMap plan (0 = unlimited;
+# the free plan allows 60 calls per minute). Interactive and batch callers
+# wait up to WEATHER_QUOTA_MAX_WAIT seconds for budget, background refreshes never wait
+WEATHER_QUOTA_PER_MINUTE = int(os.getenv("WEATHER_QUOTA_PER_MINUTE", "0"))
+WEATHER_QUOTA_PER_DAY = int(os.getenv("WEATHER_QUOTA_PER_DAY", "0"))
+WEATHER_QUOTA_MAX_WAIT = float(os.getenv("WEATHER_QUOTA_MAX_WAIT", "2"))
+
+# Compression of HTTP responses (bodies smaller than this are sent as-is)
+HTTP_GZIP_MIN_BYTES = int(os.getenv("HTTP_GZIP_MIN_BYTES", "1024"))
+HTTP_GZIP_LEVEL = int(os.getenv("HTTP_GZIP_LEVEL", "6"))
+
+# ASGI serving mode (asgi.py): bind address, worker processes and how long
+# shutdown waits for in-flight requests
+ASGI_HOST = os.getenv("ASGI_HOST", "0.0.0.0")
+ASGI_PORT = int(os.getenv("ASGI_PORT", "5000"))
+ASGI_WORKERS = int(os.getenv("ASGI_WORKERS", "1"))
+ASGI_SHUTDOWN_TIMEOUT = int(os.getenv("ASGI_SHUTDOWN_TIMEOUT", "10"))  # seconds
+# Upstream connections per ASGI process; idle sockets are cheap on an event
+# loop, so this can be far larger than the thread-bound WEATHER_HTTP_POOL_SIZE
+ASGI_UPSTREAM_POOL_SIZE = int(os.getenv("ASGI_UPSTREAM_POOL_SIZE", "100"))
+
+# Agent worker metrics endpoint (0 disables). Each job runs in its own process,
+# so a process takes the first free port in [port, port + range)
+AGENT_METRICS_PORT = int(os.getenv("AGENT_METRICS_PORT", "9465"))
+AGENT_METRICS_PORT_RANGE = int(os.getenv("AGENT_METRICS_PORT_RANGE", "16"))
+
+# Time budget from a participant joining to the greeting starting to play;
+# slower job starts are logged as warnings
+AGENT_GREETING_BUDGET = float(os.getenv("AGENT_GREETING_BUDGET", "1.5"))  # seconds
+
+# Cache of synthesized speech for repeated utterances, keyed by voice and text.
+# The optional directory is shared by all worker processes on the host
+AGENT_TTS_CACHE_MAX_BYTES = int(os.getenv("AGENT_TTS_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+AGENT_TTS_CACHE_PATH = os.getenv("AGENT_TTS_CACHE_PATH", "")
+AGENT_TTS_CACHE_DISK_MAX_BYTES = int(os.getenv("AGENT_TTS_CACHE_DISK_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Answer plain "weather in X" / "tomorrow in X" voice turns about a known city
+# directly from the weather API, skipping both LLM round trips
+AGENT_FAST_PATH = os.getenv("AGENT_FAST_PATH", "false").lower() in ("1", "true", "yes")
+
+# Bounded chat context: each LLM prompt holds the system prompt, a short
+# summary of older turns and the last AGENT_CONTEXT_MAX_TURNS turns, trimmed
+# further to about AGENT_CONTEXT_MAX_TOKENS tokens (0 = no limit)
+AGENT_CONTEXT_MAX_TURNS = int(os.getenv("AGENT_CONTEXT_MAX_TURNS", "8"))
+AGENT_CONTEXT_MAX_TOKENS = int(os.getenv("AGENT_CONTEXT_MAX_TOKENS", "2000"))
+
+# Per-turn latency traces of the agent, appended as JSON lines (empty = off;
+# the stage histograms are recorded either way)
+AGENT_TRACE_PATH = os.getenv("AGENT_TRACE_PATH", "")
+
+# Opt-in sampling profiler of the web apps and the agent (empty PROFILE_DIR =
+# off, no overhead). A PROFILE_SAMPLE_RATE fraction of /api/weather requests
+# and agent tool calls is sampled every PROFILE_INTERVAL_MS; their folded
+# stacks are written to PROFILE_DIR every PROFILE_FLUSH_INTERVAL seconds.
+# POST /admin/profile?seconds=N with an X-Admin-Token header matching
+# PROFILE_ADMIN_TOKEN profiles the whole process for N seconds
+PROFILE_DIR = os.getenv("PROFILE_DIR", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.01"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_FLUSH_INTERVAL = float(os.getenv("PROFILE_FLUSH_INTERVAL", "60"))  # seconds
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+
 # Assistant personality settings
 ASSISTANT_NAME = "Weather Bot"
 ASSISTANT_GREETING = "Hello! I'm your weather assistant. Ask me about the weather in any city!"
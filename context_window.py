@@ -0,0 +1,161 @@
+"""
+Chat Context Window Module
+Keeps the prompt sent to the LLM bounded in long voice sessions: the system
+prompt and recent turns are kept verbatim, older turns are folded into a
+short summary
+"""
+
+from typing import List, NamedTuple, Tuple
+
+from livekit.agents import llm
+
+# Rough size of English text in tokens (avoids a tokenizer dependency)
+CHARS_PER_TOKEN = 4
+# Per-message overhead of the chat format, in tokens
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Older turns are summarized in one line each, most recent ones only
+SUMMARY_MAX_LINES = 8
+SUMMARY_LINE_CHARS = 120
+
+Turn = List[llm.ChatMessage]
+
+
+class TrimResult(NamedTuple):
+    """What trim_chat_context() did to one prompt"""
+    tokens: int  # estimated prompt size after trimming
+    kept: int  # turns sent verbatim
+    summarized: int  # older turns folded into the summary
+    dropped: int  # older turns left out entirely
+
+
+def _text(message: llm.ChatMessage) -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(part for part in content if isinstance(part, str))
+    return ""
+
+
+def estimate_tokens(messages: List[llm.ChatMessage]) -> int:
+    """
+    Estimate the prompt size of a list of chat messages
+
+    Args:
+        messages: Messages as sent to the LLM
+
+    Returns:
+        Approximate token count (text, tool call arguments and per-message overhead)
+    """
+    chars = 0
+    for message in messages:
+        chars += len(_text(message))
+        for call in message.tool_calls or ():
+            chars += len(call.function_info.name) + len(call.raw_arguments)
+    return chars // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS * len(messages)
+
+
+def _split_turns(messages: List[llm.ChatMessage]) -> Tuple[List[llm.ChatMessage], List[Turn]]:
+    """Separate the leading system messages and group the rest into turns, each starting at a user message"""
+    start = 0
+    while start < len(messages) and messages[start].role == "system":
+        start += 1
+
+    turns: List[Turn] = []
+    for message in messages[start:]:
+        if message.role == "user" or not turns:
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return messages[:start], turns
+
+
+def _without_tools(turn: Turn) -> Turn:
+    # A tool call and its result are removed together, so the provider never
+    # sees a result without its call
+    return [message for message in turn if message.role != "tool" and not message.tool_calls]
+
+
+def _summary_line(turn: Turn) -> str:
+    # The question and the reply each get part of the line
+    parts = [message for message in _without_tools(turn) if message.role in ("user", "assistant")]
+    limit = SUMMARY_LINE_CHARS // max(len(parts), 1)
+    line = []
+    for message in parts:
+        text = " ".join(_text(message).split())
+        if len(text) > limit:
+            text = text[:limit - 3] + "..."
+        if text:
+            line.append(f"{message.role.title()}: {text}")
+    return " / ".join(line)
+
+
+def trim_chat_context(chat_ctx: llm.ChatContext, max_turns: int, max_tokens: int) -> TrimResult:
+    """
+    Bound the prompt of one LLM call, editing chat_ctx in place
+
+    The leading system messages are always kept. The last max_turns turns
+    (the new user message counts as one) are kept verbatim, except that tool
+    calls and results older than the previous turn are removed, since the
+    assistant's spoken replies already state what they returned. If the
+    estimate is still above max_tokens, more of the oldest turns are
+    removed, down to the new user message alone. Removed turns are
+    summarized in one line each (the most recent SUMMARY_MAX_LINES of them)
+    in a system message placed before the kept turns.
+
+    Args:
+        chat_ctx: Copy of the conversation about to be sent to the LLM
+        max_turns: Turns to keep verbatim (0 = all)
+        max_tokens: Estimated prompt budget (0 = no limit)
+
+    Returns:
+        TrimResult with the final size and what was removed
+    """
+    system, turns = _split_turns(chat_ctx.messages)
+    split = max(len(turns) - max_turns, 0) if max_turns > 0 else 0
+    older, kept = turns[:split], turns[split:]
+    kept = [_without_tools(turn) for turn in kept[:-2]] + kept[-2:]
+
+    if max_tokens > 0:
+        budget = max_tokens - estimate_tokens(system)
+        sizes = [estimate_tokens(turn) for turn in kept]
+        while len(kept) > 1 and sum(sizes) > budget:
+            older.append(kept.pop(0))
+            sizes.pop(0)
+
+    lines = [line for line in (_summary_line(turn) for turn in older[-SUMMARY_MAX_LINES:]) if line]
+    messages = list(system)
+    if lines:
+        messages.append(llm.ChatMessage.create(
+            text="Summary of the earlier conversation, oldest first:\n" + "\n".join(lines),
+            role="system"
+        ))
+    for turn in kept:
+        messages.extend(turn)
+
+    chat_ctx.messages[:] = messages
+    return TrimResult(estimate_tokens(messages), len(kept), len(lines), len(older) - len(lines))
+
+
+def prune_history(chat_ctx: llm.ChatContext, max_turns: int) -> int:
+    """
+    Forget turns that trim_chat_context() can no longer send or summarize
+
+    Keeps the session's stored conversation from growing for the life of
+    the room.
+
+    Args:
+        chat_ctx: The assistant's persistent chat context
+        max_turns: Same value as passed to trim_chat_context()
+
+    Returns:
+        Number of turns removed
+    """
+    system, turns = _split_turns(chat_ctx.messages)
+    excess = len(turns) - max_turns - SUMMARY_MAX_LINES
+    if max_turns <= 0 or excess <= 0:
+        return 0
+
+    chat_ctx.messages[:] = system + [message for turn in turns[excess:] for message in turn]
+    return excess
@@ -0,0 +1,168 @@
+"""
+Forecast Store Module
+Columnar copy of the full 5-day / 3-hour forecast with per-day aggregates
+"""
+
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+SECONDS_PER_DAY = 86400
+
+
+class ForecastSeries:
+    """
+    One city's forecast stored as parallel typed arrays
+
+    Each column is a compact array (no per-slot dicts), so a day's aggregates
+    are computed with C-level sum/min/max over an array slice and a Counter
+    over the condition codes, instead of Python loops over JSON objects.
+    """
+
+    __slots__ = ("city", "country", "tz_offset", "timestamps", "temps",
+                 "rain_pops", "codes", "descriptions")
+
+    def __init__(
+        self,
+        city: str,
+        country: str,
+        tz_offset: int,
+        timestamps: array,
+        temps: array,
+        rain_pops: array,
+        codes: array,
+        descriptions: Dict[int, str]
+    ):
+        """
+        Args:
+            city: City name reported by the provider
+            country: Country code
+            tz_offset: City's UTC offset in seconds
+            timestamps: Slot start times (UTC epoch seconds, ascending)
+            temps: Slot temperatures in °C
+            rain_pops: Precipitation probability (0-1) of slots with rain, else 0
+            codes: OpenWeatherMap condition codes
+            descriptions: Condition code -> description text
+        """
+        self.city = city
+        self.country = country
+        self.tz_offset = tz_offset
+        self.timestamps = timestamps
+        self.temps = temps
+        self.rain_pops = rain_pops
+        self.codes = codes
+        self.descriptions = descriptions
+
+    @classmethod
+    def from_response(cls, data: Dict) -> "ForecastSeries":
+        """
+        Build a series from an OpenWeatherMap /forecast response
+
+        Args:
+            data: Decoded JSON body
+
+        Returns:
+            ForecastSeries
+        """
+        slots: List[Dict] = data["list"]
+        descriptions = {}
+        for slot in slots:
+            condition = slot["weather"][0]
+            descriptions.setdefault(condition["id"], condition["description"])
+
+        return cls(
+            city=data["city"]["name"],
+            country=data["city"]["country"],
+            tz_offset=data["city"].get("timezone", 0),
+            timestamps=array("q", [slot["dt"] for slot in slots]),
+            temps=array("d", [slot["main"]["temp"] for slot in slots]),
+            # Rain chance only counts slots that actually forecast rain
+            rain_pops=array("d", [slot.get("pop", 0) if "rain" in slot else 0 for slot in slots]),
+            codes=array("H", [slot["weather"][0]["id"] for slot in slots]),
+            descriptions=descriptions
+        )
+
+    def to_dict(self) -> Dict:
+        """Serialize to JSON-compatible types (for the shared disk cache)"""
+        return {
+            "city": self.city,
+            "country": self.country,
+            "tz_offset": self.tz_offset,
+            "timestamps": self.timestamps.tolist(),
+            "temps": self.temps.tolist(),
+            "rain_pops": self.rain_pops.tolist(),
+            "codes": self.codes.tolist(),
+            "descriptions": {str(code): text for code, text in self.descriptions.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ForecastSeries":
+        """Restore a series serialized with to_dict()"""
+        return cls(
+            city=data["city"],
+            country=data["country"],
+            tz_offset=data["tz_offset"],
+            timestamps=array("q", data["timestamps"]),
+            temps=array("d", data["temps"]),
+            rain_pops=array("d", data["rain_pops"]),
+            codes=array("H", data["codes"]),
+            descriptions={int(code): text for code, text in data["descriptions"].items()}
+        )
+
+    def day_slice(self, days_ahead: int, now: Optional[float] = None) -> slice:
+        """
+        Locate the slots of a calendar day in the city's local time
+
+        Args:
+            days_ahead: 0 for today, 1 for tomorrow, ...
+            now: Current UTC epoch seconds (defaults to the clock)
+
+        Returns:
+            Slice into the columns (may be empty)
+        """
+        now = time.time() if now is None else now
+        local_midnight = (int(now) + self.tz_offset) // SECONDS_PER_DAY * SECONDS_PER_DAY - self.tz_offset
+        start = local_midnight + days_ahead * SECONDS_PER_DAY
+        return slice(
+            bisect_left(self.timestamps, start),
+            bisect_left(self.timestamps, start + SECONDS_PER_DAY)
+        )
+
+    def summary(self, days_ahead: int = 1, now: Optional[float] = None) -> Dict:
+        """
+        Aggregate one day of the forecast
+
+        Args:
+            days_ahead: 0 for today, 1 for tomorrow, ...
+            now: Current UTC epoch seconds (defaults to the clock)
+
+        Returns:
+            Dictionary with forecast information for that day
+        """
+        day = self.day_slice(days_ahead, now)
+        temps = self.temps[day]
+        if not temps:
+            return {
+                "success": False,
+                "error": "forecast_unavailable",
+                "message": f"Sorry, I don't have a forecast for {self.city} that far ahead."
+            }
+
+        code, _ = Counter(self.codes[day]).most_common(1)[0]
+        date = datetime.fromtimestamp(self.timestamps[day.start] + self.tz_offset, timezone.utc)
+
+        return {
+            "success": True,
+            "city": self.city,
+            "country": self.country,
+            "temperature": round(sum(temps) / len(temps)),
+            "min_temperature": round(min(temps)),
+            "max_temperature": round(max(temps)),
+            "description": self.descriptions[code],
+            "rain_probability": round(max(self.rain_pops[day]) * 100),
+            "date": date.date().isoformat(),
+            "days_ahead": days_ahead
+        }
@@ -0,0 +1,242 @@
+"""
+City Gazetteer Module
+Offline index of known cities used to find and resolve city names in queries
+"""
+
+import csv
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+# Bundled list of cities (OpenWeatherMap city IDs, names, aliases, coordinates)
+DEFAULT_GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cities.csv")
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class City(NamedTuple):
+    """A known city resolved from the gazetteer"""
+    id: int
+    name: str
+    country: str
+    lat: float
+    lon: float
+
+
+def tokenize(text: str) -> Tuple[str, ...]:
+    """
+    Split text into lower-case ASCII word tokens
+
+    Args:
+        text: Free text (accents are folded, punctuation dropped)
+
+    Returns:
+        Tuple of tokens
+    """
+    folded = unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode("ascii")
+    return tuple(_TOKEN_RE.findall(folded))
+
+
+class Gazetteer:
+    """
+    Token n-gram index over city names and aliases
+
+    Every name is stored as a token tuple, and every proper prefix of a name
+    is kept in a prefix set, so a query can be scanned left to right while
+    extending each candidate span only as long as some known name continues it.
+    """
+
+    def __init__(self, cities: List[Tuple[City, List[str]]]):
+        """
+        Args:
+            cities: (city, aliases) pairs to index
+        """
+        self._names: Dict[Tuple[str, ...], City] = {}
+        prefixes = set()
+
+        for city, aliases in cities:
+            for name in [city.name] + aliases:
+                tokens = tokenize(name)
+                if not tokens:
+                    continue
+                # First entry wins for names shared by several cities
+                self._names.setdefault(tokens, city)
+                for i in range(1, len(tokens)):
+                    prefixes.add(tokens[:i])
+
+        self._prefixes: FrozenSet[Tuple[str, ...]] = frozenset(prefixes)
+        self._spellings = [(" ".join(tokens), city) for tokens, city in self._names.items()]
+        self.cities = {city.id: city for city, _ in cities}
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_GAZETTEER_PATH) -> "Gazetteer":
+        """
+        Build a gazetteer from a CSV file
+
+        Args:
+            path: CSV with id, name, country, lat, lon and '|'-separated aliases
+
+        Returns:
+            Loaded Gazetteer
+        """
+        cities = []
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                city = City(
+                    id=int(row["id"]),
+                    name=row["name"],
+                    country=row["country"],
+                    lat=float(row["lat"]),
+                    lon=float(row["lon"])
+                )
+                aliases = [alias for alias in (row.get("aliases") or "").split("|") if alias]
+                cities.append((city, aliases))
+        return cls(cities)
+
+    def lookup(self, name: str) -> Optional[City]:
+        """
+        Resolve an exact city name or alias
+
+        Args:
+            name: City name as typed or transcribed
+
+        Returns:
+            Matching City, or None if unknown
+        """
+        return self._names.get(tokenize(name))
+
+    def find(self, query: str) -> Optional[City]:
+        """
+        Find the longest known city name mentioned anywhere in a query
+
+        Args:
+            query: Free-text user query
+
+        Returns:
+            City for the longest matching span (earliest on ties), or None
+        """
+        match = self.find_span(tokenize(query))
+        return match[0] if match else None
+
+    def find_span(self, tokens: Tuple[str, ...]) -> Optional[Tuple[City, int, int]]:
+        """
+        Locate the longest known city name in a tokenized query
+
+        Args:
+            tokens: Output of tokenize()
+
+        Returns:
+            (city, start, end) token positions of the match, or None
+        """
+        best: Optional[Tuple[City, int, int]] = None
+        best_len = 0
+
+        for start in range(len(tokens)):
+            end = start + 1
+            while end <= len(tokens):
+                span = tokens[start:end]
+                city = self._names.get(span)
+                if city is not None and end - start > best_len:
+                    best, best_len = (city, start, end), end - start
+                if span not in self._prefixes:
+                    break
+                end += 1
+
+        return best
+
+    def find_all(self, query: str) -> List[City]:
+        """
+        Find every known city mentioned in a query, in order of mention
+
+        Args:
+            query: Free-text user query
+
+        Returns:
+            Distinct cities for non-overlapping matches (longest first at
+            each position, so "New Delhi" is not also read as "Delhi")
+        """
+        tokens = tokenize(query)
+        found: List[City] = []
+        start = 0
+        while start < len(tokens):
+            match = None
+            end = start + 1
+            while end <= len(tokens):
+                span = tokens[start:end]
+                city = self._names.get(span)
+                if city is not None:
+                    match = (city, end)
+                if span not in self._prefixes:
+                    break
+                end += 1
+
+            if match is None:
+                start += 1
+                continue
+            city, start = match
+            if city not in found:
+                found.append(city)
+        return found
+
+    def suggest(self, name: str) -> Optional[City]:
+        """
+        Suggest the closest known city for a misspelled or misheard name
+
+        Args:
+            name: Unknown city name (e.g. "Mumbay")
+
+        Returns:
+            Closest City within a length-scaled edit distance, or None
+        """
+        target = " ".join(tokenize(name))
+        if not target or tuple(target.split()) in self._names:
+            return None
+
+        # Allow roughly one edit per four characters
+        max_distance = 1 if len(target) <= 4 else 2 if len(target) <= 8 else 3
+        best: Optional[City] = None
+        for spelling, city in self._spellings:
+            distance = edit_distance(target, spelling, max_distance)
+            if distance <= max_distance:
+                best, max_distance = city, distance - 1
+                if max_distance < 1:
+                    break
+        return best
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Levenshtein distance between two strings, bounded for speed
+
+    Args:
+        a: First string
+        b: Second string
+        max_distance: Largest distance of interest
+
+    Returns:
+        Edit distance, or max_distance + 1 once it is known to be larger
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+@lru_cache(maxsize=1)
+def get_gazetteer() -> Gazetteer:
+    """Return the process-wide gazetteer built from the bundled city list"""
+    return Gazetteer.load()
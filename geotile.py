@@ -0,0 +1,73 @@
+"""
+Geo Tile Module
+Snaps GPS coordinates to a grid of roughly square cells so that nearby
+lookups share one cached weather result
+"""
+
+import math
+import re
+from typing import Optional, Tuple
+
+# Kilometres per degree of latitude (and of longitude at the equator)
+KM_PER_DEGREE = 111.32
+
+# Tiles are addressed like cities, by the name of their center point
+_TILE_RE = re.compile(r"^@(-?\d+(?:\.\d+)?),(-?\d+(?:\.\d+)?)$")
+
+
+def valid_coordinates(lat: float, lon: float) -> bool:
+    """Check that a coordinate pair is finite and on the globe"""
+    return math.isfinite(lat) and math.isfinite(lon) and -90 <= lat <= 90 and -180 <= lon <= 180
+
+
+def snap(lat: float, lon: float, tile_km: float) -> Tuple[float, float]:
+    """
+    Find the center of the grid cell containing a coordinate
+
+    Rows are tile_km high everywhere; each row is split into columns about
+    tile_km wide at its own latitude, so cells stay roughly square instead of
+    shrinking towards the poles.
+
+    Args:
+        lat: Latitude in degrees
+        lon: Longitude in degrees
+        tile_km: Cell size in kilometres (0 keeps the coordinate, rounded to ~10 m)
+
+    Returns:
+        (lat, lon) of the cell center, rounded to 4 decimals
+    """
+    if tile_km <= 0:
+        return round(lat, 4), round(lon, 4)
+
+    lat_step = tile_km / KM_PER_DEGREE
+    rows = math.ceil(180 / lat_step)
+    row = min(int((lat + 90) / lat_step), rows - 1)
+    center_lat = min(-90 + (row + 0.5) * lat_step, 90.0)
+
+    columns = max(1, math.floor(360 * KM_PER_DEGREE * math.cos(math.radians(center_lat)) / tile_km))
+    lon_step = 360 / columns
+    column = int((lon + 180) / lon_step) % columns
+    center_lon = -180 + (column + 0.5) * lon_step
+
+    return round(center_lat, 4), round(center_lon, 4)
+
+
+def tile_name(lat: float, lon: float) -> str:
+    """Name a snapped coordinate so it can be cached and refreshed like a city"""
+    return f"@{lat:.4f},{lon:.4f}"
+
+
+def parse_tile_name(name: str) -> Optional[Tuple[float, float]]:
+    """
+    Read the coordinate back from a tile name
+
+    Args:
+        name: Output of tile_name(), or any city name
+
+    Returns:
+        (lat, lon), or None if name is not a tile
+    """
+    match = _TILE_RE.match(name)
+    if match is None:
+        return None
+    return float(match.group(1)), float(match.group(2))
@@ -0,0 +1,84 @@
+"""
+HTTP Caching Module
+Cache-Control, ETag and gzip helpers shared by the Flask and ASGI apps
+"""
+
+import gzip
+import hashlib
+from typing import Optional
+
+from config import HTTP_GZIP_LEVEL, HTTP_GZIP_MIN_BYTES, WEATHER_CACHE_STALE_TTL
+
+# Response types worth compressing
+COMPRESSIBLE_TYPES = ("application/json", "text/html", "text/plain")
+
+
+def cache_control(max_age: float) -> str:
+    """
+    Build a Cache-Control value matching the freshness of the weather data
+
+    Args:
+        max_age: Seconds until the underlying cache entry expires
+
+    Returns:
+        Header value; answers without remaining freshness must be revalidated
+    """
+    seconds = int(max_age)
+    if seconds <= 0:
+        return "no-cache"
+    # Edge caches may keep serving a stale answer while they revalidate, like
+    # the server-side cache does
+    return f"public, max-age={seconds}, stale-while-revalidate={WEATHER_CACHE_STALE_TTL}"
+
+
+def etag(body: bytes) -> str:
+    """Weak validator for a response body (weak, since gzip changes the bytes)"""
+    return hashlib.blake2b(body, digest_size=12).hexdigest()
+
+
+def gzip_body(body: bytes, content_type: Optional[str], accepts_gzip: bool) -> Optional[bytes]:
+    """
+    Compress a response body if the client accepts gzip and it is worth it
+
+    Args:
+        body: Uncompressed response body
+        content_type: Response Content-Type
+        accepts_gzip: Whether Accept-Encoding allows gzip
+
+    Returns:
+        Gzipped body, or None to send the body as-is
+    """
+    if not accepts_gzip or len(body) < HTTP_GZIP_MIN_BYTES:
+        return None
+    if not content_type or not content_type.startswith(COMPRESSIBLE_TYPES):
+        return None
+    return gzip.compress(body, compresslevel=HTTP_GZIP_LEVEL)
+
+
+def set_cache_headers(response, body: bytes, max_age: float) -> None:
+    """
+    Set Cache-Control and a weak ETag on a Flask or Quart response
+
+    Args:
+        response: Response to update
+        body: Its uncompressed body
+        max_age: Seconds until the underlying cached data expires
+    """
+    response.headers["Cache-Control"] = cache_control(max_age)
+    response.set_etag(etag(body), weak=True)
+
+
+def compress_response(response, body: bytes, accepts_gzip: bool) -> None:
+    """
+    Gzip a successful Flask or Quart response in place when worth it
+
+    Args:
+        response: Response to update (status 200, not yet encoded)
+        body: Its uncompressed body
+        accepts_gzip: Whether the request's Accept-Encoding allows gzip
+    """
+    response.vary.add("Accept-Encoding")
+    compressed = gzip_body(body, response.content_type, accepts_gzip)
+    if compressed is not None:
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = "gzip"
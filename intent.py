@@ -0,0 +1,209 @@
+"""
+Intent Detection Module
+Keyword-based intent classification and city extraction for weather questions
+"""
+
+from typing import Dict, List, NamedTuple, Optional
+
+from config import WEATHER_COMPARE_MAX_CITIES
+from gazetteer import get_gazetteer, tokenize
+from weather_api import format_forecast_response, format_weather_response
+
+
+class Intent(NamedTuple):
+    """What a weather question asks for"""
+    kind: str  # "current" or "forecast"
+    days_ahead: int  # forecast day (1 = tomorrow)
+    rain_today: bool  # current-weather question about rain today
+
+
+class Comparison(NamedTuple):
+    """A question comparing the current weather of several cities"""
+    cities: List[str]
+    ranking: str  # key of weather_api.RANKINGS
+
+
+# Common words and weather-related adjectives that are never part of a city name
+WORDS_TO_REMOVE = frozenset([
+    'what', 'is', 'the', 'weather', 'in', 'at', 'for', 'about',
+    'how', 'will', 'it', 'rain', 'tomorrow', 'today', 'forecast',
+    'temperature', 'like', 'whats', "what's", 'tell', 'me', 'please',
+    'be', 'there', 'a', 'chance', 'of', 'going', 'to',
+    # Weather condition words to remove
+    'cold', 'hot', 'warm', 'cool', 'sunny', 'rainy', 'cloudy',
+    'humid', 'dry', 'windy', 'foggy', 'snowy', 'stormy', 'wet'
+])
+
+# Words that make a question about the weather (rather than small talk)
+WEATHER_WORDS = frozenset([
+    'weather', 'temperature', 'forecast', 'rain', 'raining',
+    'cold', 'hot', 'warm', 'cool', 'sunny', 'rainy', 'cloudy',
+    'humid', 'dry', 'windy', 'foggy', 'snowy', 'stormy', 'wet'
+])
+
+# Everything a plain "weather in X" / "tomorrow in X" request may contain
+# besides the city; any other word leaves the turn to the LLM
+SIMPLE_REQUEST_WORDS = WORDS_TO_REMOVE | WEATHER_WORDS | frozenset([
+    's', 'now', 'right', 'currently', 'current', 'day', 'after', 'next',
+    'can', 'could', 'you', 'i', 'get', 'check', 'give', 'know', 'want',
+    'does', 'do', 'look', 'looks', 'outside', 'hey', 'ok', 'okay', 'so'
+])
+
+# Words that say how to rank a comparison; the first one in the question wins
+RANKING_WORDS = {
+    **dict.fromkeys(['warmer', 'warmest', 'hotter', 'hottest', 'warm', 'hot'], 'warmest'),
+    **dict.fromkeys(['colder', 'coldest', 'cooler', 'coolest', 'cold', 'cool'], 'coldest'),
+    **dict.fromkeys(['humid', 'humider', 'humidity', 'muggier', 'muggy'], 'most_humid'),
+    **dict.fromkeys(['drier', 'driest', 'dry'], 'driest'),
+    **dict.fromkeys(['windier', 'windiest', 'windy', 'wind'], 'windiest'),
+    **dict.fromkeys(['calmer', 'calmest', 'calm'], 'calmest'),
+}
+
+# Words that make a question naming several cities a comparison: explicit
+# cues, and comparatives or superlatives of a ranking ("warmer", "driest")
+COMPARISON_WORDS = frozenset([
+    'compare', 'comparing', 'comparison', 'vs', 'versus', 'or', 'between', 'than', 'which'
+]) | frozenset(word for word in RANKING_WORDS if word.endswith(('er', 'est')))
+
+
+def detect_intent(query: str) -> Intent:
+    """
+    Decide whether a question is about current weather or the forecast
+
+    Args:
+        query: User's query string
+
+    Returns:
+        Intent of the question
+    """
+    query = query.lower()
+
+    # Check for tomorrow/forecast queries (explicit future)
+    tomorrow_keywords = ['tomorrow', 'forecast', 'next day']
+    is_tomorrow_query = any(keyword in query for keyword in tomorrow_keywords)
+
+    # Check for rain queries without "tomorrow" - should check forecast
+    rain_query_without_tomorrow = ('rain' in query or 'raining' in query) and not any(word in query for word in ['today', 'now', 'current', 'currently'])
+
+    if is_tomorrow_query or (rain_query_without_tomorrow and 'tomorrow' not in query):
+        # Tomorrow, or the day after, from the same cached series
+        days_ahead = 2 if 'day after tomorrow' in query else 1
+        return Intent('forecast', days_ahead, False)
+
+    # Current weather (for today, now, or general weather questions)
+    return Intent('current', 0, 'rain' in query and 'today' in query)
+
+
+def detect_comparison(query: str) -> Optional[Comparison]:
+    """
+    Recognize a question about several known cities at once
+
+    "Is it warmer in Pune or Delhi?" and "compare Mumbai, Chennai and
+    Kolkata" are comparisons: the question names two or more gazetteer
+    cities and has a comparison cue (COMPARISON_WORDS). "I'm in Pune, what's
+    the weather in Mumbai" is not. Cities are ranked by temperature unless
+    the question asks otherwise.
+
+    Args:
+        query: User's query string
+
+    Returns:
+        Comparison of up to WEATHER_COMPARE_MAX_CITIES cities, or None if
+        fewer than two known cities are mentioned or nothing asks to compare
+    """
+    tokens = tokenize(query)
+    if not any(token in COMPARISON_WORDS for token in tokens):
+        return None
+    cities = get_gazetteer().find_all(query)
+    if len(cities) < 2:
+        return None
+
+    ranking = next((RANKING_WORDS[token] for token in tokens if token in RANKING_WORDS), 'warmest')
+    return Comparison([city.name for city in cities[:WEATHER_COMPARE_MAX_CITIES]], ranking)
+
+
+def extract_city(query: str) -> str:
+    """
+    Enhanced city extraction from query
+
+    Args:
+        query: User's query string
+
+    Returns:
+        Extracted city name or empty string
+    """
+    # Known cities: longest matching span from the offline gazetteer
+    known = get_gazetteer().find(query)
+    if known:
+        return known.name
+
+    query_lower = query.lower()
+
+    # Try to find city after "in" or "at" preposition (most common pattern)
+    for prep in [' in ', ' at ']:
+        if prep in query_lower:
+            after_prep = query_lower.split(prep)[-1]
+            # Take words after preposition, stopping at common question words
+            city_part = after_prep.split('today')[0].split('tomorrow')[0].split('?')[0]
+            city = city_part.strip()
+            if city:
+                return city.title()
+
+    # Fallback: remove common words
+    words = query_lower.split()
+    city_words = [w for w in words if w not in WORDS_TO_REMOVE and w.strip('?.,!')]
+
+    # Join remaining words as city name
+    city = ' '.join(city_words).strip()
+
+    # Capitalize first letter of each word
+    return city.title() if city else ""
+
+
+def is_simple_request(query: str) -> bool:
+    """
+    Check that a question is a plain weather request about one known city
+
+    True only if the gazetteer finds a city and every other word is a
+    weather keyword or filler, so the answer cannot depend on conversation
+    context or need the LLM's judgement.
+
+    Args:
+        query: User's query string
+
+    Returns:
+        True if the question can be answered without the LLM
+    """
+    tokens = tokenize(query)
+    match = get_gazetteer().find_span(tokens)
+    if match is None:
+        return False
+
+    _, start, end = match
+    rest = tokens[:start] + tokens[end:]
+    return any(token in WEATHER_WORDS for token in rest) and \
+        all(token in SIMPLE_REQUEST_WORDS for token in rest)
+
+
+def format_answer(intent: Intent, weather_data: Dict) -> str:
+    """
+    Phrase a lookup result as the answer to the question
+
+    Args:
+        intent: Intent the data was fetched for
+        weather_data: Result of get_current_weather() or get_forecast()
+
+    Returns:
+        Natural language answer
+    """
+    if intent.kind == 'forecast':
+        return format_forecast_response(weather_data)
+
+    # If asking about rain today, mention rain probability from current data
+    if intent.rain_today and weather_data['success']:
+        weather_desc = weather_data['description'].lower()
+        if 'rain' in weather_desc or 'drizzle' in weather_desc:
+            return f"Yes, it's currently raining in {weather_data['city']}. The weather is {weather_data['description']} with a temperature of {weather_data['temperature']}°C."
+        return f"No, it's not raining in {weather_data['city']} right now. The weather is {weather_data['description']} with a temperature of {weather_data['temperature']}°C."
+
+    return format_weather_response(weather_data)
@@ -0,0 +1,108 @@
+"""
+Micro-batching Module
+Groups lookups that arrive within a short window into one bulk upstream call
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+
+class _Batch:
+    """Keys collected during one batching window"""
+
+    def __init__(self):
+        self.futures: Dict[Hashable, Future] = {}
+
+
+class MicroBatcher:
+    """
+    Collects keys submitted by concurrent threads and fetches them together
+
+    The first thread to submit into an empty window becomes the batch leader:
+    it waits for the window to elapse (or for the batch to fill up), performs
+    the bulk fetch, and hands each waiting thread its own result. No helper
+    threads are started.
+    """
+
+    def __init__(
+        self,
+        fetch_many: Callable[[List[Hashable]], Dict[Hashable, Any]],
+        window: float,
+        max_batch: int
+    ):
+        """
+        Args:
+            fetch_many: Bulk fetch returning a result per key (missing keys map to
+                None; an exception counts as an empty result)
+            window: Seconds to wait for more keys after the first one arrives
+            max_batch: Provider limit of keys per bulk call
+        """
+        self.fetch_many = fetch_many
+        self.window = window
+        self.max_batch = max_batch
+        self._cond = threading.Condition()
+        self._batch: Optional[_Batch] = None
+
+        # Counters
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, key: Hashable) -> Any:
+        """
+        Fetch one key as part of the current batch
+
+        Args:
+            key: Identifier understood by fetch_many
+
+        Returns:
+            Result for key, or None if the bulk response did not include it
+            or the bulk call failed
+        """
+        with self._cond:
+            batch = self._batch
+            leader = batch is None
+            if leader:
+                batch = self._batch = _Batch()
+
+            future = batch.futures.get(key)
+            if future is None:
+                future = batch.futures[key] = Future()
+
+            if len(batch.futures) >= self.max_batch:
+                # Batch is full: close it and wake its leader
+                self._batch = None
+                self._cond.notify_all()
+
+            if leader:
+                deadline = time.monotonic() + self.window
+                while self._batch is batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._batch = None
+                        break
+                    self._cond.wait(remaining)
+
+        if leader:
+            self._run(batch)
+        return future.result()
+
+    def _run(self, batch: _Batch) -> None:
+        keys = list(batch.futures)
+        with self._cond:
+            self.batches += 1
+            self.items += len(keys)
+        try:
+            results = self.fetch_many(keys)
+        except Exception:
+            # Same as a failed bulk response: every caller falls back to its
+            # own single lookup, which reports any error itself
+            results = {}
+
+        for key, future in batch.futures.items():
+            future.set_result(results.get(key))
+
+    def stats(self) -> Dict:
+        """Return the number of bulk calls made and keys served by them"""
+        return {"batches": self.batches, "items": self.items}
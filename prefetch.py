@@ -0,0 +1,85 @@
+"""
+Speculative Prefetch Module
+Starts weather lookups for a city mentioned in a transcript before the LLM
+asks for them, so the tool call is answered from a warm cache
+"""
+
+import asyncio
+import logging
+from typing import Optional, Set
+
+from gazetteer import City, get_gazetteer
+from intent import detect_intent
+from metrics import REGISTRY
+from quota import BACKGROUND
+from weather_api import AsyncWeatherAPI
+
+logger = logging.getLogger(__name__)
+
+PREFETCHES = REGISTRY.counter(
+    "agent_prefetch_total", "Speculative weather lookups by endpoint and outcome", ["endpoint", "result"]
+)
+
+
+class WeatherPrefetcher:
+    """
+    Watches user transcripts and warms the weather cache for the city they name
+
+    Only cities found by the offline gazetteer are prefetched, so a stray
+    word never costs an upstream call, and only the lookup the question's
+    intent calls for (current weather or forecast). Lookups go through the
+    client's cache and single-flight group: a tool call arriving while a
+    prefetch is still running joins it instead of starting a second request.
+    Prefetches use the background quota lane, so they never take budget from
+    real lookups, and they do not count towards a city's popularity for the
+    hot-city refresher.
+    """
+
+    def __init__(self, weather_api: AsyncWeatherAPI):
+        """
+        Args:
+            weather_api: Client whose cache the tools read from
+        """
+        self.weather_api = weather_api
+        self.gazetteer = get_gazetteer()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def observe(self, transcript: str) -> Optional[City]:
+        """
+        Start the current weather or forecast lookup for a city in transcript
+
+        Must be called from the event loop; returns immediately.
+
+        Args:
+            transcript: Interim or final user transcript
+
+        Returns:
+            The city being prefetched, or None if no known city was found
+        """
+        city = self.gazetteer.find(transcript)
+        if city is None:
+            return None
+
+        endpoint = detect_intent(transcript).kind
+        lookup = self.weather_api.get_forecast if endpoint == "forecast" else self.weather_api.get_current_weather
+        logger.debug(f"Prefetching {endpoint} weather for {city.name}")
+        task = asyncio.get_running_loop().create_task(self._prefetch(endpoint, lookup, city.name))
+        # Keep a reference so the task is not garbage collected mid-flight
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return city
+
+    @staticmethod
+    async def _prefetch(endpoint: str, lookup, city: str) -> None:
+        try:
+            result = await lookup(city, lane=BACKGROUND)
+        except Exception:
+            logger.exception(f"Prefetch of {endpoint} weather for {city} failed")
+            result = {"success": False}
+        PREFETCHES.inc(endpoint, "success" if result["success"] else "failed")
+
+    async def aclose(self) -> None:
+        """Cancel prefetches that are still running"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,274 @@
+"""
+Sampling Profiler Module
+Opt-in, low-overhead stack sampling for the Flask app and the agent worker.
+Profiles are written as folded stacks ("frame;frame;frame count" lines), the
+input format of flamegraph.pl, speedscope and similar tools
+"""
+
+import asyncio
+import functools
+import hmac
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import (
+    PROFILE_ADMIN_TOKEN,
+    PROFILE_DIR,
+    PROFILE_FLUSH_INTERVAL,
+    PROFILE_INTERVAL_MS,
+    PROFILE_SAMPLE_RATE,
+)
+
+logger = logging.getLogger(__name__)
+
+# Length of an on-demand capture, by default and at most
+DEFAULT_CAPTURE_SECONDS = 30
+MAX_CAPTURE_SECONDS = 300
+
+
+def _fold(frame) -> str:
+    """Render a frame's stack root first, one "file:function" entry per frame"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class _Capture:
+    """An on-demand profile of every thread until a deadline"""
+
+    def __init__(self, deadline: float, path: str):
+        self.deadline = deadline
+        self.path = path
+        self.stacks: Counter = Counter()
+
+
+class SamplingProfiler:
+    """
+    Samples thread stacks with sys._current_frames() from a background thread
+
+    Two kinds of profile are collected:
+    - sampled operations: while a thread runs an operation picked by
+      profiled(), its stacks are counted under the operation's name and
+      written to requests-<pid>-<time>.folded every PROFILE_FLUSH_INTERVAL
+      seconds;
+    - captures: capture(seconds) samples every thread of the process for
+      that long and writes capture-<pid>-<time>.folded.
+
+    The sampling thread only wakes up while there is something to sample.
+    """
+
+    def __init__(self, directory: str, interval: float, flush_interval: float):
+        """
+        Args:
+            directory: Where profiles are written
+            interval: Seconds between samples
+            flush_interval: Seconds between writes of sampled-operation profiles
+        """
+        self.directory = directory
+        self.interval = interval
+        self.flush_interval = flush_interval
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._tracked: Dict[int, List] = {}  # thread id -> [operation name, nesting depth]
+        self._stacks: Counter = Counter()
+        self._captures: List[_Capture] = []
+        self._last_flush = time.monotonic()
+        self._thread: Optional[threading.Thread] = None
+
+        # Counters
+        self.samples = 0
+
+    def _start(self) -> None:
+        # Called with the lock held
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    @contextmanager
+    def sampled(self, name: str) -> Iterator[None]:
+        """
+        Sample the calling thread while the block runs
+
+        In asyncio code this samples the event loop thread, i.e. everything
+        the loop does while the operation is in flight.
+
+        Args:
+            name: Operation name, the root frame of its stacks
+        """
+        thread_id = threading.get_ident()
+        with self._lock:
+            entry = self._tracked.setdefault(thread_id, [name, 0])
+            entry[0] = name
+            entry[1] += 1
+            self._start()
+        try:
+            yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] <= 0:
+                    del self._tracked[thread_id]
+
+    def capture(self, seconds: float) -> str:
+        """
+        Profile every thread of the process for the next few seconds
+
+        Returns immediately; the profile is written when the time is up.
+
+        Args:
+            seconds: Capture length (capped at MAX_CAPTURE_SECONDS)
+
+        Returns:
+            Path the profile will be written to
+        """
+        seconds = min(max(seconds, self.interval), MAX_CAPTURE_SECONDS)
+        path = self._path("capture")
+        with self._lock:
+            self._captures.append(_Capture(time.monotonic() + seconds, path))
+            self._start()
+        return path
+
+    def _path(self, kind: str) -> str:
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        return os.path.join(self.directory, f"{kind}-{os.getpid()}-{stamp}-{random.randrange(16 ** 4):04x}.folded")
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while True:
+            with self._lock:
+                idle = not self._tracked and not self._captures
+                if idle:
+                    self._wake.clear()
+            if idle:
+                self._flush()
+                self._wake.wait(self.flush_interval)
+                continue
+
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            now = time.monotonic()
+            with self._lock:
+                for thread_id, (name, _) in self._tracked.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        self._stacks[f"{name};{_fold(frame)}"] += 1
+                if self._captures:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                    stacks = Counter(
+                        f"{names.get(thread_id, thread_id)};{_fold(frame)}"
+                        for thread_id, frame in frames.items() if thread_id != own_id
+                    )
+                    for capture in self._captures:
+                        capture.stacks.update(stacks)
+                finished = [capture for capture in self._captures if now >= capture.deadline]
+                self._captures = [capture for capture in self._captures if now < capture.deadline]
+                self.samples += 1
+            del frames
+
+            for capture in finished:
+                self._write(capture.path, capture.stacks)
+            if now - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def _flush(self) -> None:
+        """Write the sampled-operation stacks collected since the last flush"""
+        with self._lock:
+            stacks, self._stacks = self._stacks, Counter()
+            self._last_flush = time.monotonic()
+        if stacks:
+            self._write(self._path("requests"), stacks)
+
+    @staticmethod
+    def _write(path: str, stacks: Counter) -> None:
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            logger.info(f"Wrote profile {path}")
+        except OSError:
+            logger.warning("Could not write profile to %s", path)
+
+
+@functools.lru_cache(maxsize=1)
+def get_profiler() -> Optional[SamplingProfiler]:
+    """Return the process-wide profiler, or None if profiling is off (PROFILE_DIR unset)"""
+    if not PROFILE_DIR:
+        return None
+    return SamplingProfiler(PROFILE_DIR, PROFILE_INTERVAL_MS / 1000, PROFILE_FLUSH_INTERVAL)
+
+
+def profiled(name: str):
+    """
+    Decorator sampling a PROFILE_SAMPLE_RATE fraction of calls to a function
+
+    With profiling off this returns the function itself, so it costs nothing.
+
+    Args:
+        name: Operation name the samples are recorded under
+    """
+    def decorate(func):
+        profiler = get_profiler()
+        if profiler is None or PROFILE_SAMPLE_RATE <= 0:
+            return func
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if random.random() >= PROFILE_SAMPLE_RATE:
+                    return await func(*args, **kwargs)
+                with profiler.sampled(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if random.random() >= PROFILE_SAMPLE_RATE:
+                return func(*args, **kwargs)
+            with profiler.sampled(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorate
+
+
+def request_capture(token: str, seconds: Optional[str]) -> Tuple[Dict, int]:
+    """
+    Handle an admin request to profile the next few seconds
+
+    Shared by the admin endpoints of the Flask, ASGI and agent processes.
+
+    Args:
+        token: Value of the request's X-Admin-Token header
+        seconds: Requested capture length (None = DEFAULT_CAPTURE_SECONDS)
+
+    Returns:
+        (JSON payload, HTTP status)
+    """
+    profiler = get_profiler()
+    if profiler is None:
+        return {"response": "Profiling is disabled (set PROFILE_DIR).", "success": False}, 404
+    if not PROFILE_ADMIN_TOKEN or not hmac.compare_digest(token.encode(), PROFILE_ADMIN_TOKEN.encode()):
+        return {"response": "Invalid admin token.", "success": False}, 403
+    try:
+        length = float(seconds) if seconds is not None else DEFAULT_CAPTURE_SECONDS
+    except ValueError:
+        length = 0.0
+    if not length > 0:
+        return {"response": "'seconds' must be a positive number.", "success": False}, 400
+
+    length = min(length, MAX_CAPTURE_SECONDS)
+    path = profiler.capture(length)
+    return {"response": f"Profiling for {length:g} seconds.", "path": path, "seconds": length, "success": True}, 202
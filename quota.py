@@ -0,0 +1,197 @@
+"""
+Upstream Quota Module
+Client-side token bucket enforcing the provider's per-minute and per-day
+limits, with priority lanes for interactive, batch and background calls
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+# Priority lanes, highest first
+INTERACTIVE = 0
+BATCH = 1
+BACKGROUND = 2
+LANE_NAMES = ("interactive", "batch", "background")
+
+# Share of the bucket (and of the daily allowance) a lane must leave untouched,
+# so batch jobs and refreshes never starve voice and tool calls
+LANE_RESERVE = (0.0, 0.2, 0.5)
+
+
+class QuotaExceeded(Exception):
+    """No upstream budget became available for a request within its wait limit"""
+
+
+class QuotaScheduler:
+    """
+    Token bucket shared by all upstream calls of one client
+
+    The per-minute bucket holds up to per_minute tokens and refills
+    continuously; the per-day allowance resets at midnight UTC. A lane may
+    only take a token while no higher lane is waiting and enough tokens
+    remain above its reserve. After a 429 the bucket is drained and nothing
+    is granted until the provider's Retry-After (or a full minute) passes.
+    """
+
+    def __init__(self, per_minute: int, per_day: int, max_wait: float):
+        """
+        Args:
+            per_minute: Requests allowed per minute (0 = unlimited)
+            per_day: Requests allowed per UTC day (0 = unlimited)
+            max_wait: Longest an interactive or batch caller waits for a token
+        """
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.max_wait = max_wait
+
+        self._lock = threading.Lock()
+        self._tokens = float(per_minute)
+        self._refilled_at = time.monotonic()
+        self._cooldown_until = 0.0
+        self._day = self._today()
+        self._day_used = 0
+        self._waiting = [0, 0, 0]
+
+        # Counters per lane
+        self.granted = [0, 0, 0]
+        self.denied = [0, 0, 0]
+        self.rate_limited = 0
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).date().isoformat()
+
+    def _refill(self, now: float) -> None:
+        if self.per_minute > 0:
+            elapsed = now - self._refilled_at
+            self._tokens = min(float(self.per_minute), self._tokens + elapsed * self.per_minute / 60)
+        self._refilled_at = now
+
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self._day_used = 0
+
+    def _try_take(self, lane: int, now: float) -> Tuple[bool, Optional[float]]:
+        """
+        Take a token for lane if its priority and reserve allow
+
+        Returns:
+            (granted, seconds worth waiting before retrying; None if hopeless)
+        """
+        self._refill(now)
+        if now < self._cooldown_until:
+            return False, self._cooldown_until - now
+        if self.per_minute <= 0 and self.per_day <= 0:
+            # Unlimited: no budget to save for higher lanes
+            self._day_used += 1
+            self.granted[lane] += 1
+            return True, None
+        if any(self._waiting[:lane]):
+            # A higher lane is queued; it gets the next token
+            return False, 0.05
+
+        if self.per_day > 0 and self.per_day - self._day_used <= LANE_RESERVE[lane] * self.per_day:
+            # Daily allowance used up for this lane until midnight UTC
+            return False, None
+
+        if self.per_minute > 0:
+            needed = 1 + LANE_RESERVE[lane] * self.per_minute
+            if self._tokens < needed:
+                return False, (needed - self._tokens) * 60 / self.per_minute
+            self._tokens -= 1
+
+        self._day_used += 1
+        self.granted[lane] += 1
+        return True, None
+
+    def acquire(self, lane: int = INTERACTIVE) -> None:
+        """
+        Wait (up to max_wait; background never waits) for a token
+
+        Args:
+            lane: Priority lane of the request
+
+        Raises:
+            QuotaExceeded: If no token became available in time
+        """
+        deadline = time.monotonic() + self._wait_limit(lane)
+        with self._lock:
+            self._waiting[lane] += 1
+        try:
+            while True:
+                now = time.monotonic()
+                with self._lock:
+                    granted, wait = self._try_take(lane, now)
+                if granted:
+                    return
+                if wait is None or now + wait > deadline:
+                    break
+                time.sleep(wait)
+        finally:
+            with self._lock:
+                self._waiting[lane] -= 1
+
+        self._deny(lane)
+
+    async def acquire_async(self, lane: int = INTERACTIVE) -> None:
+        """Like acquire(), but waits without blocking the event loop"""
+        deadline = time.monotonic() + self._wait_limit(lane)
+        with self._lock:
+            self._waiting[lane] += 1
+        try:
+            while True:
+                now = time.monotonic()
+                with self._lock:
+                    granted, wait = self._try_take(lane, now)
+                if granted:
+                    return
+                if wait is None or now + wait > deadline:
+                    break
+                await asyncio.sleep(wait)
+        finally:
+            with self._lock:
+                self._waiting[lane] -= 1
+
+        self._deny(lane)
+
+    def _wait_limit(self, lane: int) -> float:
+        return 0.0 if lane == BACKGROUND else self.max_wait
+
+    def _deny(self, lane: int) -> None:
+        with self._lock:
+            self.denied[lane] += 1
+        raise QuotaExceeded(f"upstream quota exhausted for {LANE_NAMES[lane]} requests")
+
+    def penalize(self, retry_after: Optional[float] = None) -> None:
+        """
+        Record a 429 from the provider: drain the bucket and pause all lanes
+
+        Args:
+            retry_after: Seconds the provider asked us to wait (default 60)
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.rate_limited += 1
+            self._refill(now)
+            self._tokens = 0.0
+            self._cooldown_until = max(self._cooldown_until, now + (retry_after if retry_after else 60))
+
+    def stats(self) -> Dict:
+        """Return budget usage and per-lane grant/deny counters"""
+        now = time.monotonic()
+        with self._lock:
+            self._refill(now)
+            return {
+                "per_minute": self.per_minute,
+                "per_day": self.per_day,
+                "tokens": round(self._tokens, 2) if self.per_minute > 0 else None,
+                "day_used": self._day_used,
+                "cooldown": round(max(0.0, self._cooldown_until - now), 1),
+                "granted": dict(zip(LANE_NAMES, self.granted)),
+                "denied": dict(zip(LANE_NAMES, self.denied)),
+                "rate_limited": self.rate_limited
+            }
@@ -0,0 +1,156 @@
+"""
+Background Refresh Module
+Decides which cached cities to refresh ahead of (or just after) expiry
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+# Request counts are halved every this many seconds, so "hot" follows recent traffic
+POPULARITY_HALF_LIFE = 60
+
+
+class RefreshScheduler:
+    """
+    Tracks request frequency per cache key and plans background refreshes
+
+    Two kinds of refresh share one upstream-call budget per minute:
+    revalidating a stale entry that was just served, and proactively
+    refreshing the top-N most requested keys shortly before they expire.
+    The scheduler only decides; the client runs the refreshes on its own
+    thread pool or event loop.
+    """
+
+    def __init__(
+        self,
+        ttl_remaining: Callable[[Hashable], Optional[float]],
+        top_n: int,
+        budget_per_minute: int,
+        lead_time: float
+    ):
+        """
+        Args:
+            ttl_remaining: Returns seconds until a key expires (None if not cached
+                or past its stale grace period)
+            top_n: Number of hottest keys refreshed proactively (0 disables)
+            budget_per_minute: Maximum background upstream calls per minute
+            lead_time: Refresh hot keys this many seconds before they expire
+        """
+        self.ttl_remaining = ttl_remaining
+        self.top_n = top_n
+        self.budget_per_minute = budget_per_minute
+        self.lead_time = lead_time
+
+        self._lock = threading.Lock()
+        self._scores: Dict[Hashable, float] = {}
+        self._cities: Dict[Hashable, str] = {}
+        self._last_decay = time.monotonic()
+        self._calls: deque = deque()  # start times of recent background calls
+        self._in_flight = set()
+
+        # Counters
+        self.refreshes = 0
+        self.skipped_over_budget = 0
+
+    def record(self, key: Hashable, city: str) -> None:
+        """Count one request for key (city is what a refresh will ask for)"""
+        with self._lock:
+            self._scores[key] = self._scores.get(key, 0.0) + 1
+            self._cities[key] = city
+
+    def forget(self, key: Hashable) -> None:
+        """Stop tracking a key (it left the cache or is not a valid city)"""
+        with self._lock:
+            self._scores.pop(key, None)
+            self._cities.pop(key, None)
+
+    def claim(self, key: Hashable) -> bool:
+        """
+        Reserve budget to refresh a stale key right now
+
+        Args:
+            key: Cache key that was just served stale
+
+        Returns:
+            True if the caller should start the refresh
+        """
+        with self._lock:
+            return self._claim(key, time.monotonic())
+
+    def release(self, key: Hashable) -> None:
+        """Mark a refresh started via claim() or due() as finished"""
+        with self._lock:
+            self._in_flight.discard(key)
+
+    def due(self) -> List[Tuple[Hashable, str]]:
+        """
+        Pick hot keys that expire within the lead time and fit the budget
+
+        Returns:
+            (key, city) pairs to refresh now; each must be release()d afterwards
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._decay(now)
+            hottest = sorted(self._scores, key=self._scores.get, reverse=True)[:self.top_n]
+            candidates = [(key, self._cities[key]) for key in hottest]
+
+        picked = []
+        for key, city in candidates:
+            remaining = self.ttl_remaining(key)
+            if remaining is None:
+                # Only live entries are refreshed; unknown cities and failed
+                # lookups are fetched again by the next request, not by us
+                self.forget(key)
+                continue
+            if remaining > self.lead_time:
+                continue
+            with self._lock:
+                if self._claim(key, now):
+                    picked.append((key, city))
+        return picked
+
+    def stats(self) -> Dict:
+        """Return refresh counters and budget usage"""
+        with self._lock:
+            self._expire_calls(time.monotonic())
+            return {
+                "refreshes": self.refreshes,
+                "skipped_over_budget": self.skipped_over_budget,
+                "budget_used": len(self._calls),
+                "budget_per_minute": self.budget_per_minute,
+                "tracked_keys": len(self._scores)
+            }
+
+    def _claim(self, key: Hashable, now: float) -> bool:
+        if key in self._in_flight:
+            return False
+        self._expire_calls(now)
+        if len(self._calls) >= self.budget_per_minute:
+            self.skipped_over_budget += 1
+            return False
+        self._calls.append(now)
+        self._in_flight.add(key)
+        self.refreshes += 1
+        return True
+
+    def _expire_calls(self, now: float) -> None:
+        while self._calls and self._calls[0] <= now - 60:
+            self._calls.popleft()
+
+    def _decay(self, now: float) -> None:
+        elapsed = now - self._last_decay
+        if elapsed < 1:
+            return
+        factor = 0.5 ** (elapsed / POPULARITY_HALF_LIFE)
+        self._last_decay = now
+        for key in list(self._scores):
+            score = self._scores[key] * factor
+            if score < 0.05:
+                # Forget keys nobody has asked about for a while
+                del self._scores[key]
+                del self._cities[key]
+            else:
+                self._scores[key] = score
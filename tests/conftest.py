@@ -0,0 +1,15 @@
+"""
+Shared test setup: the project root and benchmarks/ (for the fake
+OpenWeatherMap server) on the import path, and a dummy API key
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("OPENWEATHER_API_KEY", "test-key")
+if os.environ["OPENWEATHER_API_KEY"] == "your_api_key_here":
+    os.environ["OPENWEATHER_API_KEY"] = "test-key"
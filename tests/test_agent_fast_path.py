@@ -0,0 +1,52 @@
+"""Tests for the agent's before_llm fast path (needs livekit-agents, see requirements.txt)"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("livekit.agents")
+
+import agent
+import weather_api
+from fake_owm import FakeOpenWeatherMap
+from livekit.agents import llm
+
+
+@pytest.fixture
+def fake():
+    server = FakeOpenWeatherMap(latency_ms=0, jitter_ms=0).start()
+    yield server
+    server.stop()
+
+
+def user_turn(text):
+    return llm.ChatContext().append(role="user", text=text)
+
+
+def test_cached_weather_question_is_answered_without_the_llm(fake, monkeypatch):
+    monkeypatch.setattr(agent, "AGENT_FAST_PATH", True)
+
+    async def main():
+        api = weather_api.AsyncWeatherAPI(base_url=fake.base_url)
+        monkeypatch.setattr(agent, "weather_api", api)
+        await api.get_current_weather("Pune")
+        calls = sum(fake.calls.values())
+
+        stream = agent.before_llm(None, user_turn("what's the weather in Pune"))
+        assert isinstance(stream, llm.LLMStream)
+        chunks = [chunk async for chunk in stream]
+        await api.aclose()
+        return chunks, sum(fake.calls.values()) - calls
+
+    chunks, upstream_calls = asyncio.run(main())
+    assert len(chunks) == 1
+    assert "°C" in chunks[0].choices[0].delta.content
+    assert upstream_calls == 0  # served from the cache
+
+
+def test_other_turns_go_to_the_llm(monkeypatch):
+    monkeypatch.setattr(agent, "AGENT_FAST_PATH", True)
+    monkeypatch.setattr(agent.prefetcher, "observe", lambda text: None)
+    assistant = SimpleNamespace(chat_ctx=user_turn("should I bring an umbrella to my meeting?"))
+    assert agent.before_llm(assistant, assistant.chat_ctx.copy()) is None
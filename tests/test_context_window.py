@@ -0,0 +1,104 @@
+"""Tests for context_window.py (needs livekit-agents, see requirements.txt)"""
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("livekit.agents")
+
+from context_window import SUMMARY_MAX_LINES, prune_history, trim_chat_context
+from livekit.agents import llm
+
+SYSTEM_PROMPT = "You are a weather assistant."
+SUMMARY_PREFIX = "Summary of the earlier conversation"
+
+
+def conversation(turns, tools=False):
+    """System prompt plus turns of user question and assistant reply (with a tool call if tools)"""
+    chat_ctx = llm.ChatContext().append(text=SYSTEM_PROMPT, role="system")
+    for i in range(turns):
+        chat_ctx.append(text=f"weather in city {i}?", role="user")
+        if tools:
+            call = SimpleNamespace(function_info=SimpleNamespace(name="get_weather"), raw_arguments=f'{{"city": "{i}"}}')
+            chat_ctx.messages.append(llm.ChatMessage(role="assistant", tool_calls=[call]))
+            chat_ctx.messages.append(llm.ChatMessage(role="tool", content=f"{i}°C", tool_call_id=str(i)))
+        chat_ctx.append(text=f"It is {i}°C in city {i}.", role="assistant")
+    return chat_ctx
+
+
+def contents(chat_ctx):
+    return [message.content for message in chat_ctx.messages]
+
+
+def summaries(chat_ctx):
+    return [text for text in contents(chat_ctx) if isinstance(text, str) and text.startswith(SUMMARY_PREFIX)]
+
+
+def test_keeps_system_prompt_and_last_turns():
+    chat_ctx = conversation(20)
+    result = trim_chat_context(chat_ctx, max_turns=4, max_tokens=0)
+
+    assert chat_ctx.messages[0].content == SYSTEM_PROMPT
+    assert contents(chat_ctx)[2:] == contents(conversation(20))[-8:]
+    assert (result.kept, result.summarized, result.dropped) == (4, SUMMARY_MAX_LINES, 16 - SUMMARY_MAX_LINES)
+
+
+def test_summary_is_inserted_once():
+    chat_ctx = conversation(12)
+    trim_chat_context(chat_ctx, max_turns=4, max_tokens=0)
+    once = contents(chat_ctx)
+    trim_chat_context(chat_ctx, max_turns=4, max_tokens=0)
+
+    assert contents(chat_ctx) == once
+    [summary] = summaries(chat_ctx)
+    assert chat_ctx.messages[1].role == "system"
+    assert summary.splitlines()[1] == "User: weather in city 0? / Assistant: It is 0°C in city 0."
+    assert len(summary.splitlines()) == 1 + SUMMARY_MAX_LINES
+
+
+@pytest.mark.parametrize("max_turns, turns", [(0, 12), (8, 3), (8, 8)])
+def test_no_limit_or_short_history_is_a_no_op(max_turns, turns):
+    chat_ctx = conversation(turns)
+    result = trim_chat_context(chat_ctx, max_turns=max_turns, max_tokens=0)
+    assert contents(chat_ctx) == contents(conversation(turns))
+    assert (result.kept, result.summarized, result.dropped) == (turns, 0, 0)
+
+
+def test_tool_calls_are_kept_for_the_latest_exchange_only():
+    chat_ctx = conversation(4, tools=True)
+    trim_chat_context(chat_ctx, max_turns=4, max_tokens=0)
+    tool_results = [message.content for message in chat_ctx.messages if message.role == "tool"]
+    assert tool_results == ["2°C", "3°C"]
+    assert not summaries(chat_ctx)
+
+
+def test_token_budget_moves_more_turns_into_the_summary():
+    chat_ctx = conversation(8)
+    result = trim_chat_context(chat_ctx, max_turns=8, max_tokens=60)
+    assert result.kept < 8
+    assert result.kept + result.summarized == 8
+    assert chat_ctx.messages[-1].content == "It is 7°C in city 7."
+
+
+def test_budget_never_drops_the_new_user_message():
+    chat_ctx = conversation(3)
+    chat_ctx.append(text="and tomorrow? " * 100, role="user")
+    result = trim_chat_context(chat_ctx, max_turns=8, max_tokens=10)
+    assert result.kept == 1
+    assert chat_ctx.messages[0].content == SYSTEM_PROMPT
+    assert chat_ctx.messages[-1].content.startswith("and tomorrow?")
+
+
+def test_prune_history_forgets_turns_beyond_the_summary():
+    chat_ctx = conversation(30)
+    assert prune_history(chat_ctx, max_turns=8) == 30 - 8 - SUMMARY_MAX_LINES
+    assert chat_ctx.messages[0].content == SYSTEM_PROMPT
+    assert chat_ctx.messages[1].content == f"weather in city {30 - 8 - SUMMARY_MAX_LINES}?"
+    assert len(chat_ctx.messages) == 1 + 2 * (8 + SUMMARY_MAX_LINES)
+
+
+@pytest.mark.parametrize("max_turns, turns", [(0, 30), (8, 8 + SUMMARY_MAX_LINES)])
+def test_prune_history_no_op(max_turns, turns):
+    chat_ctx = conversation(turns)
+    assert prune_history(chat_ctx, max_turns) == 0
+    assert contents(chat_ctx) == contents(conversation(turns))
@@ -0,0 +1,83 @@
+"""Tests for forecast_store.py"""
+
+from array import array
+from datetime import datetime, timezone
+
+import pytest
+
+from forecast_store import ForecastSeries
+
+HOUR = 3600
+IST = 5 * HOUR + 30 * 60
+EST = -5 * HOUR
+
+# First slot: 2024-06-10 18:00 UTC, then every 3 hours for 5 days
+FIRST_SLOT = int(datetime(2024, 6, 10, 18, tzinfo=timezone.utc).timestamp())
+# 2024-06-10 20:00 UTC = 2024-06-11 01:30 in India, 2024-06-10 15:00 in New York
+NOW = int(datetime(2024, 6, 10, 20, tzinfo=timezone.utc).timestamp())
+
+
+def make_series(tz_offset=IST, slots=40):
+    """Slot i is i °C; slots 10 and 11 forecast rain (70% and 40%)"""
+    codes = [500 if i in (10, 11) else 800 for i in range(slots)]
+    return ForecastSeries(
+        city="Pune",
+        country="IN",
+        tz_offset=tz_offset,
+        timestamps=array("q", [FIRST_SLOT + 3 * HOUR * i for i in range(slots)]),
+        temps=array("d", [float(i) for i in range(slots)]),
+        rain_pops=array("d", [{10: 0.7, 11: 0.4}.get(i, 0.0) for i in range(slots)]),
+        codes=array("H", codes),
+        descriptions={500: "light rain", 800: "clear sky"}
+    )
+
+
+@pytest.mark.parametrize("days_ahead, expected", [
+    (-1, slice(0, 1)),  # yesterday in India: only the 18:00 UTC slot is left
+    (0, slice(1, 9)),  # today: 2024-06-10 18:30 UTC to 2024-06-11 18:30 UTC
+    (1, slice(9, 17)),  # tomorrow: a full day of 8 slots, not list[4:8]
+    (4, slice(33, 40)),  # last day is partial
+    (5, slice(40, 40)),  # past the horizon
+])
+def test_day_slice_follows_local_midnight(days_ahead, expected):
+    assert make_series().day_slice(days_ahead, now=NOW) == expected
+
+
+def test_day_slice_with_negative_utc_offset():
+    # Local today in New York starts 2024-06-10 05:00 UTC, before the first slot
+    series = make_series(tz_offset=EST)
+    assert series.day_slice(0, now=NOW) == slice(0, 4)
+    assert series.day_slice(1, now=NOW) == slice(4, 12)
+
+
+def test_summary_aggregates_one_local_day():
+    summary = make_series().summary(1, now=NOW)
+    assert summary == {
+        "success": True,
+        "city": "Pune",
+        "country": "IN",
+        "temperature": 12,  # mean of 9..16
+        "min_temperature": 9,
+        "max_temperature": 16,
+        "description": "clear sky",  # most common condition of the day
+        "rain_probability": 70,
+        "date": "2024-06-12",
+        "days_ahead": 1
+    }
+
+
+def test_summary_past_the_horizon_is_unavailable():
+    summary = make_series().summary(5, now=NOW)
+    assert not summary["success"]
+    assert summary["error"] == "forecast_unavailable"
+
+
+def test_summary_of_an_empty_series_is_unavailable():
+    assert make_series(slots=0).summary(0, now=NOW)["error"] == "forecast_unavailable"
+
+
+def test_dict_round_trip_keeps_every_column():
+    series = make_series()
+    restored = ForecastSeries.from_dict(series.to_dict())
+    assert restored.summary(1, now=NOW) == series.summary(1, now=NOW)
+    assert restored.descriptions == series.descriptions
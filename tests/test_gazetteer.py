@@ -0,0 +1,75 @@
+"""Tests for gazetteer.py"""
+
+import pytest
+
+from gazetteer import City, Gazetteer, edit_distance, get_gazetteer, tokenize
+
+YORK = City(1, "York", "GB", 53.96, -1.08)
+NEW_YORK = City(2, "New York", "US", 40.71, -74.01)
+NEW_YORK_MILLS = City(3, "New York Mills", "US", 46.52, -95.38)
+
+
+@pytest.fixture
+def small():
+    return Gazetteer([(YORK, []), (NEW_YORK, ["nyc", "the big apple"]), (NEW_YORK_MILLS, [])])
+
+
+def test_tokenize_folds_case_accents_and_punctuation():
+    assert tokenize("São Paulo, BRAZIL!") == ("sao", "paulo", "brazil")
+
+
+def test_lookup_resolves_names_and_aliases_exactly():
+    gazetteer = get_gazetteer()
+    assert gazetteer.lookup("Bombay").name == "Mumbai"
+    assert gazetteer.lookup("  new   DELHI ").name == "New Delhi"
+    assert gazetteer.lookup("weather in Delhi") is None
+
+
+def test_multi_word_name_wins_over_its_last_word():
+    gazetteer = get_gazetteer()
+    assert gazetteer.find("what's the weather in New Delhi today").name == "New Delhi"
+    assert gazetteer.find("what's the weather in Delhi today").name == "Delhi"
+
+
+def test_find_span_returns_token_positions(small):
+    tokens = tokenize("is it snowing in new york mills now")
+    assert small.find_span(tokens) == (NEW_YORK_MILLS, 4, 7)
+
+
+def test_find_span_prefers_the_longest_of_overlapping_names(small):
+    # "new york" and "york" overlap, "new york mills" is not complete
+    assert small.find_span(tokenize("new york mill")) == (NEW_YORK, 0, 2)
+    assert small.find("the big apple or york") == NEW_YORK
+
+
+def test_find_all_keeps_order_and_skips_overlaps(small):
+    assert small.find_all("York, New York and nyc") == [YORK, NEW_YORK]
+    assert small.find_all("new york mills vs york") == [NEW_YORK_MILLS, YORK]
+
+
+@pytest.mark.parametrize("query", ["", "what's the weather", "new", "big apple"])
+def test_no_match(small, query):
+    assert small.find(query) is None
+    assert small.find_all(query) == []
+
+
+@pytest.mark.parametrize("typo, expected", [
+    ("Mumbay", "Mumbai"),
+    ("Chenai", "Chennai"),
+    ("Banglore", "Bengaluru"),  # alias "bangalore"
+    ("Hyderbad", "Hyderabad"),
+])
+def test_suggest_corrects_typos(typo, expected):
+    assert get_gazetteer().suggest(typo).name == expected
+
+
+@pytest.mark.parametrize("name", ["Mumbai", "Qwertyville", "Xyzzy", "", "Mumbai Central Station"])
+def test_suggest_returns_nothing_for_known_or_distant_names(name):
+    assert get_gazetteer().suggest(name) is None
+
+
+def test_edit_distance_is_bounded():
+    assert edit_distance("mumbay", "mumbai", 2) == 1
+    assert edit_distance("kitten", "sitting", 5) == 3
+    assert edit_distance("kitten", "sitting", 1) == 2  # stopped early: more than 1
+    assert edit_distance("pune", "ahmedabad", 2) == 3
@@ -0,0 +1,87 @@
+"""Tests for geotile.py"""
+
+import math
+
+import pytest
+
+from geotile import KM_PER_DEGREE, parse_tile_name, snap, tile_name, valid_coordinates
+
+TILE_KM = 5
+LAT_STEP = TILE_KM / KM_PER_DEGREE
+
+
+def km_between(a, b):
+    """Rough distance for points a few km apart"""
+    dlat = (a[0] - b[0]) * KM_PER_DEGREE
+    dlon = (a[1] - b[1]) * KM_PER_DEGREE * math.cos(math.radians((a[0] + b[0]) / 2))
+    return math.hypot(dlat, dlon)
+
+
+@pytest.mark.parametrize("lat, lon", [
+    (18.5204, 73.8567),  # Pune
+    (-33.8688, 151.2093),  # Sydney
+    (-22.9068, -43.1729),  # Rio de Janeiro
+    (40.7128, -74.0060),  # New York
+    (64.1466, -21.9426),  # Reykjavik
+])
+def test_center_is_within_the_tile(lat, lon):
+    center = snap(lat, lon, TILE_KM)
+    # Half the cell diagonal, plus slack for the rounded column width
+    assert km_between((lat, lon), center) <= TILE_KM * 0.75
+    assert (center[0] < 0) == (lat < 0) and (center[1] < 0) == (lon < 0)
+
+
+def test_nearby_points_share_a_tile():
+    assert snap(-33.8688, 151.2093, TILE_KM) == snap(-33.8690, 151.2095, TILE_KM)
+
+
+def test_row_edge_splits_tiles():
+    edge = -90 + 1300 * LAT_STEP  # a row boundary near 26.9°N
+    below, above = snap(edge - 1e-6, 75.8, TILE_KM), snap(edge + 1e-6, 75.8, TILE_KM)
+    assert above[0] - below[0] == pytest.approx(LAT_STEP, abs=1e-4)
+
+
+def test_row_edge_splits_tiles_south_of_the_equator():
+    edge = -90 + 600 * LAT_STEP  # a row boundary near 36.1°S
+    below, above = snap(edge - 1e-6, -60.0, TILE_KM), snap(edge + 1e-6, -60.0, TILE_KM)
+    assert above[0] - below[0] == pytest.approx(LAT_STEP, abs=1e-4)
+    assert below[0] < edge < above[0] < 0
+
+
+def test_rows_count_from_the_south_pole_not_the_equator():
+    # The equator falls inside a row, so points just either side share a tile
+    assert snap(1e-6, 10.0, TILE_KM) == snap(-1e-6, 10.0, TILE_KM)
+
+
+def test_antimeridian_wraps_around():
+    # 180 and -180 are the same meridian
+    assert snap(-17.7, 180.0, TILE_KM) == snap(-17.7, -180.0, TILE_KM)
+    west, east = snap(-17.7, 179.9999, TILE_KM), snap(-17.7, -179.9999, TILE_KM)
+    assert -180 < east[1] < -179.9 and 179.9 < west[1] < 180
+
+
+@pytest.mark.parametrize("lat", [90.0, -90.0, 89.9999, -89.9999])
+def test_poles_stay_on_the_globe(lat):
+    center = snap(lat, 45.0, TILE_KM)
+    assert valid_coordinates(*center)
+    assert abs(center[0]) > 89.9
+
+
+def test_zero_tile_size_rounds_to_about_ten_metres():
+    assert snap(18.520449, -73.856749, 0) == (18.5204, -73.8567)
+
+
+@pytest.mark.parametrize("lat, lon", [(18.5204, 73.8567), (-33.8688, -151.2093), (0.0, -180.0)])
+def test_tile_name_round_trip(lat, lon):
+    center = snap(lat, lon, TILE_KM)
+    assert parse_tile_name(tile_name(*center)) == center
+
+
+@pytest.mark.parametrize("name", ["Pune", "@", "@18.5", "@18.5,", "18.5,73.8", "@a,b"])
+def test_city_names_are_not_tiles(name):
+    assert parse_tile_name(name) is None
+
+
+@pytest.mark.parametrize("lat, lon", [(91, 0), (-90.01, 0), (0, 180.5), (0, -181), (math.nan, 0), (0, math.inf)])
+def test_invalid_coordinates(lat, lon):
+    assert not valid_coordinates(lat, lon)
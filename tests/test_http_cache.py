@@ -0,0 +1,84 @@
+"""Tests for http_cache.py, through the Flask app's responses"""
+
+import gzip
+
+import pytest
+
+import app as flask_app
+import weather_api
+from config import HTTP_GZIP_MIN_BYTES, WEATHER_CACHE_STALE_TTL, WEATHER_CACHE_TTL_CURRENT
+from fake_owm import FakeOpenWeatherMap
+from http_cache import cache_control, etag, gzip_body
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeOpenWeatherMap(latency_ms=0, jitter_ms=0).start()
+    api = weather_api.WeatherAPI(base_url=fake.base_url)
+    monkeypatch.setattr(flask_app, "weather_api", api)
+    yield flask_app.app.test_client()
+    api.close()
+    fake.stop()
+
+
+def test_cache_control_follows_remaining_freshness():
+    assert cache_control(299.7) == f"public, max-age=299, stale-while-revalidate={WEATHER_CACHE_STALE_TTL}"
+    assert cache_control(0.5) == "no-cache"
+    assert cache_control(-10) == "no-cache"
+
+
+def test_etag_depends_only_on_the_body():
+    assert etag(b'{"a": 1}') == etag(b'{"a": 1}')
+    assert etag(b'{"a": 1}') != etag(b'{"a": 2}')
+
+
+def test_gzip_body_skips_small_and_binary_bodies():
+    large = b"x" * HTTP_GZIP_MIN_BYTES
+    assert gzip_body(large[:-1], "application/json", True) is None
+    assert gzip_body(large, "image/png", True) is None
+    assert gzip_body(large, "application/json", False) is None
+    assert gzip.decompress(gzip_body(large, "application/json; charset=utf-8", True)) == large
+
+
+def test_weather_answer_is_cacheable_for_its_remaining_ttl(client):
+    response = client.get("/api/weather?query=weather in Pune")
+    assert response.status_code == 200
+    max_age = int(response.headers["Cache-Control"].split("max-age=")[1].split(",")[0])
+    assert WEATHER_CACHE_TTL_CURRENT - 5 <= max_age <= WEATHER_CACHE_TTL_CURRENT
+    assert response.headers["ETag"].startswith('W/"')
+
+
+def test_unanswerable_query_must_be_revalidated(client):
+    response = client.get("/api/weather?query=what is the weather")
+    assert response.headers["Cache-Control"] == "no-cache"
+
+
+def test_matching_if_none_match_gets_304(client):
+    first = client.get("/api/weather?query=weather in Pune")
+    second = client.get("/api/weather?query=weather in Pune", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 304
+    assert second.data == b""
+
+    other = client.get("/api/weather?query=weather in Pune", headers={"If-None-Match": 'W/"other"'})
+    assert other.status_code == 200
+
+
+def test_small_body_is_not_gzipped(client):
+    response = client.get("/api/weather?query=weather in Pune", headers={"Accept-Encoding": "gzip"})
+    assert len(response.data) < HTTP_GZIP_MIN_BYTES
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+
+def test_large_body_is_gzipped_only_if_accepted(client):
+    url = "/api/weather/batch?" + "&".join(f"city={city}" for city in ["Pune", "Delhi", "Mumbai", "Chennai"])
+    plain = client.get(url)
+    compressed = client.get(url, headers={"Accept-Encoding": "gzip"})
+
+    assert len(plain.data) >= HTTP_GZIP_MIN_BYTES
+    assert "Content-Encoding" not in plain.headers
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed.data) == plain.data
+    assert "Accept-Encoding" in plain.headers["Vary"]
+    # Both encodings share one weak validator
+    assert compressed.headers["ETag"] == plain.headers["ETag"]
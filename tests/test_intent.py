@@ -0,0 +1,68 @@
+"""Tests for comparison detection in intent.py and how comparisons are phrased"""
+
+import pytest
+
+from answers import plan_query
+from intent import detect_comparison
+from weather_api import format_comparison_response
+
+
+@pytest.mark.parametrize("query, cities, ranking", [
+    ("is it warmer in pune or delhi", ["Pune", "Delhi"], "warmest"),
+    ("compare mumbai, chennai and kolkata", ["Mumbai", "Chennai", "Kolkata"], "warmest"),
+    ("pune vs delhi humidity", ["Pune", "Delhi"], "most_humid"),
+    ("which is colder, new delhi or jaipur?", ["New Delhi", "Jaipur"], "coldest"),
+    ("is bombay windier than madras", ["Mumbai", "Chennai"], "windiest"),
+])
+def test_comparisons_are_detected(query, cities, ranking):
+    comparison = detect_comparison(query)
+    assert comparison.cities == cities
+    assert comparison.ranking == ranking
+
+
+@pytest.mark.parametrize("query", [
+    "i'm in pune, what's the weather in mumbai",
+    "i'm flying from delhi to chennai, is it hot there",
+    "weather in new delhi",  # one city, not also read as Delhi
+    "which is warmer, pune or atlantis",  # only one known city
+    "what's the weather like",
+])
+def test_other_questions_are_not_comparisons(query):
+    assert detect_comparison(query) is None
+
+
+def test_non_comparison_with_two_cities_is_a_single_city_lookup():
+    plan = plan_query(None, "I'm in Pune, what's the weather in Mumbai")
+    assert plan.method == "get_current_weather"
+
+
+def result(city, temperature, humidity=50, wind_speed=2.0):
+    return {
+        "success": True, "city": city, "country": "IN", "temperature": temperature, "feels_like": temperature,
+        "description": "clear sky", "humidity": humidity, "wind_speed": wind_speed, "main_weather": "Clear"
+    }
+
+
+NOT_FOUND = {"success": False, "error": "city_not_found", "message": "Sorry, I couldn't find weather data for Xyz."}
+
+
+def test_two_cities_are_phrased_with_the_comparative():
+    response = format_comparison_response([result("Pune", 24), result("Delhi", 38)], "warmest")
+    assert response == "Delhi is warmer at 38°C, compared with 24°C in Pune."
+
+
+def test_more_cities_are_ranked():
+    results = [result("Pune", 24, humidity=60), result("Mumbai", 30, humidity=85), result("Delhi", 38, humidity=20)]
+    response = format_comparison_response(results, "most_humid")
+    assert response == "Mumbai is the most humid at 85% humidity, followed by Pune at 60% humidity and Delhi at 20% humidity."
+
+
+def test_equal_values_are_about_the_same():
+    response = format_comparison_response([result("Pune", 30), result("Mumbai", 30)], "coldest")
+    assert response == "Pune and Mumbai are about the same, at 30°C."
+
+
+def test_failed_cities_are_mentioned():
+    response = format_comparison_response([result("Pune", 24), result("Delhi", 38), NOT_FOUND], "coldest")
+    assert response == "Pune is colder at 24°C, compared with 38°C in Delhi. " + NOT_FOUND["message"]
+    assert format_comparison_response([NOT_FOUND, NOT_FOUND]) == NOT_FOUND["message"]
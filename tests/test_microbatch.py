@@ -0,0 +1,85 @@
+"""Tests for microbatch.py and the group requests WeatherAPI makes with it"""
+
+import threading
+
+import pytest
+import requests
+
+import weather_api
+from fake_owm import FakeOpenWeatherMap
+from microbatch import MicroBatcher
+
+KNOWN_CITIES = ["Pune", "Delhi", "Mumbai", "Chennai", "Kolkata"]
+
+
+@pytest.fixture
+def fake():
+    server = FakeOpenWeatherMap(latency_ms=20, jitter_ms=0).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def api(fake, monkeypatch):
+    monkeypatch.setattr(weather_api, "WEATHER_GROUP_BATCH_WINDOW_MS", 50)
+    client = weather_api.WeatherAPI(base_url=fake.base_url)
+    yield client
+    client.close()
+
+
+def run_concurrently(func, args):
+    barrier = threading.Barrier(len(args))
+    results = [None] * len(args)
+
+    def run(index, arg):
+        barrier.wait()
+        results[index] = func(arg)
+
+    threads = [threading.Thread(target=run, args=item) for item in enumerate(args)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return results
+
+
+def test_concurrent_known_cities_share_one_group_request(api, fake):
+    results = run_concurrently(api.get_current_weather, KNOWN_CITIES)
+
+    assert all(result["success"] for result in results)
+    assert fake.calls["group"] == 1
+    assert fake.calls["weather"] == 0
+
+
+def test_failed_group_call_falls_back_to_single_lookups(api, fake, monkeypatch):
+    def fail(city_ids):
+        raise requests.exceptions.ConnectionError("group call failed")
+
+    for batcher in api.batchers.values():
+        monkeypatch.setattr(batcher, "fetch_many", fail)
+    results = run_concurrently(api.get_current_weather, KNOWN_CITIES)
+
+    assert all(result["success"] for result in results)
+    assert fake.calls["weather"] == len(KNOWN_CITIES)
+
+
+def test_batcher_exception_resolves_every_waiter_with_none():
+    calls = []
+
+    def fail(keys):
+        calls.append(keys)
+        raise TimeoutError("upstream timed out")
+
+    batcher = MicroBatcher(fail, window=0.05, max_batch=10)
+    results = run_concurrently(batcher.submit, [1, 2, 3])
+
+    assert results == [None, None, None]
+    assert len(calls) == 1 and sorted(calls[0]) == [1, 2, 3]
+
+
+def test_full_batch_is_sent_without_waiting_for_the_window():
+    batcher = MicroBatcher(lambda keys: {key: key * 10 for key in keys}, window=5, max_batch=3)
+    results = run_concurrently(batcher.submit, [1, 2, 3])
+
+    assert results == [10, 20, 30]
+    assert batcher.stats() == {"batches": 1, "items": 3}
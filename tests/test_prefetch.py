@@ -0,0 +1,52 @@
+"""Tests for prefetch.py"""
+
+import asyncio
+
+import pytest
+
+import weather_api
+from fake_owm import FakeOpenWeatherMap
+from prefetch import WeatherPrefetcher
+
+
+@pytest.fixture
+def fake():
+    server = FakeOpenWeatherMap(latency_ms=0, jitter_ms=0).start()
+    yield server
+    server.stop()
+
+
+def prefetch(fake, transcript):
+    """Prefetch for transcript; return the upstream calls made and the client"""
+    async def main():
+        api = weather_api.AsyncWeatherAPI(base_url=fake.base_url)
+        api.refresher.top_n = 5
+        prefetcher = WeatherPrefetcher(api)
+        prefetcher.observe(transcript)
+        await asyncio.gather(*prefetcher._tasks)
+        await api.aclose()
+        return api
+
+    api = asyncio.run(main())
+    return dict(fake.calls), api
+
+
+def test_current_weather_question_prefetches_current_weather_only(fake):
+    calls, _ = prefetch(fake, "what's the weather like in Pune right now")
+    assert calls == {"weather": 1}
+
+
+def test_forecast_question_prefetches_the_forecast_only(fake):
+    calls, _ = prefetch(fake, "will it rain tomorrow in Pune")
+    assert calls == {"forecast": 1}
+
+
+def test_unknown_city_is_not_prefetched(fake):
+    calls, _ = prefetch(fake, "what's the weather in Atlantis")
+    assert calls == {}
+
+
+def test_prefetches_do_not_make_a_city_hot(fake):
+    _, api = prefetch(fake, "what's the weather in Pune")
+    assert api.refresher.due() == []
+    assert api.refresher._scores == {}
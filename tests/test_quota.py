@@ -0,0 +1,111 @@
+"""Tests for quota.py"""
+
+import threading
+import time
+
+import pytest
+
+from quota import BACKGROUND, BATCH, INTERACTIVE, QuotaExceeded, QuotaScheduler
+
+
+def take_all(scheduler, lane):
+    """Acquire tokens for lane until refused; return how many were granted"""
+    granted = 0
+    while granted < 1000:
+        try:
+            scheduler.acquire(lane)
+        except QuotaExceeded:
+            return granted
+        granted += 1
+    return granted
+
+
+@pytest.mark.parametrize("lane, granted", [(INTERACTIVE, 100), (BATCH, 80), (BACKGROUND, 50)])
+def test_lane_reserves_per_minute(lane, granted):
+    # A slow refill (100 per minute) keeps the count exact during the test
+    scheduler = QuotaScheduler(per_minute=100, per_day=0, max_wait=0)
+
+    assert take_all(scheduler, lane) == granted
+    assert scheduler.stats()["denied"][("interactive", "batch", "background")[lane]] == 1
+
+
+def test_lower_lanes_leave_their_reserve_to_interactive():
+    scheduler = QuotaScheduler(per_minute=100, per_day=0, max_wait=0)
+
+    assert take_all(scheduler, BACKGROUND) == 50
+    assert take_all(scheduler, BATCH) == 30
+    assert take_all(scheduler, INTERACTIVE) == 20
+
+
+def test_lane_reserves_per_day():
+    scheduler = QuotaScheduler(per_minute=0, per_day=10, max_wait=0)
+
+    assert take_all(scheduler, BACKGROUND) == 5
+    assert take_all(scheduler, BATCH) == 3
+    assert take_all(scheduler, INTERACTIVE) == 2
+
+
+def test_waiting_interactive_caller_goes_before_lower_lanes():
+    scheduler = QuotaScheduler(per_minute=0, per_day=1000, max_wait=2)
+    scheduler.penalize(retry_after=0.3)
+    order = []
+
+    def acquire(lane):
+        scheduler.acquire(lane)
+        order.append(lane)
+
+    # The batch caller starts waiting first, but the interactive one is served first
+    batch = threading.Thread(target=acquire, args=(BATCH,))
+    batch.start()
+    time.sleep(0.05)
+    interactive = threading.Thread(target=acquire, args=(INTERACTIVE,))
+    interactive.start()
+    batch.join(3)
+    interactive.join(3)
+
+    assert order == [INTERACTIVE, BATCH]
+
+
+def test_unlimited_quota_never_makes_lower_lanes_wait():
+    scheduler = QuotaScheduler(per_minute=0, per_day=0, max_wait=2)
+    scheduler._waiting[INTERACTIVE] += 1  # an interactive caller is queued
+
+    start = time.monotonic()
+    scheduler.acquire(BACKGROUND)
+    assert time.monotonic() - start < 0.01
+    assert scheduler.stats()["granted"]["background"] == 1
+
+
+def test_penalize_pauses_every_lane_for_retry_after():
+    scheduler = QuotaScheduler(per_minute=600, per_day=0, max_wait=1)
+    scheduler.penalize(retry_after=0.2)
+
+    stats = scheduler.stats()
+    assert stats["rate_limited"] == 1
+    assert 0 < stats["cooldown"] <= 0.2
+    assert stats["tokens"] < 1
+
+    # Background never waits; interactive waits out the pause
+    with pytest.raises(QuotaExceeded):
+        scheduler.acquire(BACKGROUND)
+    start = time.monotonic()
+    scheduler.acquire(INTERACTIVE)
+    assert time.monotonic() - start >= 0.15
+
+
+def test_penalize_without_retry_after_pauses_a_minute():
+    scheduler = QuotaScheduler(per_minute=0, per_day=0, max_wait=0)
+    scheduler.penalize()
+
+    assert scheduler.stats()["cooldown"] > 59
+    with pytest.raises(QuotaExceeded):
+        scheduler.acquire(INTERACTIVE)
+
+
+def test_daily_allowance_resets_at_utc_midnight(monkeypatch):
+    scheduler = QuotaScheduler(per_minute=0, per_day=3, max_wait=0)
+    assert take_all(scheduler, INTERACTIVE) == 3
+
+    monkeypatch.setattr(scheduler, "_today", lambda: "2099-01-01")
+    assert take_all(scheduler, INTERACTIVE) == 3
+    assert scheduler.stats()["day_used"] == 3
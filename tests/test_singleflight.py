@@ -0,0 +1,152 @@
+"""Tests for singleflight.py and how WeatherAPI shares fetches through it"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+import weather_api
+from quota import BACKGROUND, INTERACTIVE
+from singleflight import AsyncSingleFlight, SingleFlight
+
+CALLERS = 8
+
+
+def run_threads(target):
+    """Start CALLERS threads running target together; return their results and errors"""
+    barrier = threading.Barrier(CALLERS)
+    results, errors = [], []
+
+    def run():
+        barrier.wait()
+        try:
+            results.append(target())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(CALLERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results, errors
+
+
+def test_concurrent_calls_run_once():
+    flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return "sunny"
+
+    results, errors = run_threads(lambda: flight.do("pune", fetch))
+
+    assert results == ["sunny"] * CALLERS and not errors
+    assert len(calls) == 1
+    assert flight.coalesced == CALLERS - 1
+
+
+def test_error_reaches_every_waiter():
+    flight = SingleFlight()
+
+    def fetch():
+        time.sleep(0.1)
+        raise ConnectionError("upstream down")
+
+    results, errors = run_threads(lambda: flight.do("pune", fetch))
+
+    assert not results
+    assert len(errors) == CALLERS
+    assert all(isinstance(e, ConnectionError) for e in errors)
+
+
+def test_key_is_released_after_completion():
+    flight = SingleFlight()
+    assert flight.do("pune", lambda: 1) == 1
+    assert flight.do("pune", lambda: 2) == 2
+
+    with pytest.raises(ValueError):
+        flight.do("delhi", lambda: int("x"))
+    assert flight.do("delhi", lambda: 3) == 3
+    assert flight.coalesced == 0
+
+
+def test_async_concurrent_calls_run_once():
+    async def main():
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "sunny"
+
+        results = await asyncio.gather(*(flight.do("pune", fetch) for _ in range(CALLERS)))
+        return results, calls, flight
+
+    results, calls, flight = asyncio.run(main())
+    assert results == ["sunny"] * CALLERS
+    assert len(calls) == 1
+    assert flight.coalesced == CALLERS - 1
+
+
+def test_async_error_reaches_every_waiter():
+    async def main():
+        flight = AsyncSingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            raise ConnectionError("upstream down")
+
+        return await asyncio.gather(*(flight.do("pune", fetch) for _ in range(CALLERS)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert len(results) == CALLERS
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+def test_async_key_is_released_after_completion():
+    async def main():
+        flight = AsyncSingleFlight()
+
+        async def value(result):
+            return result
+
+        first = await flight.do("pune", lambda: value(1))
+        second = await flight.do("pune", lambda: value(2))
+        return first, second, flight
+
+    first, second, flight = asyncio.run(main())
+    assert (first, second) == (1, 2)
+    assert flight.coalesced == 0
+
+
+def rate_limited_fetches(leader_lane, follower_lane):
+    """Upstream calls made when a follower joins a leader's fetch that is refused quota"""
+    api = weather_api.WeatherAPI()
+    calls = []
+
+    def fetch(city, lane):
+        calls.append(lane)
+        time.sleep(0.1)
+        return api._rate_limited()
+
+    leader = threading.Thread(target=api._cached, args=("current", "Pune", fetch, leader_lane))
+    leader.start()
+    time.sleep(0.03)
+    result = api._cached("current", "Pune", fetch, follower_lane)
+    leader.join(5)
+    api.close()
+    assert result["error"] == "rate_limited"
+    return calls
+
+
+def test_follower_on_the_same_lane_keeps_the_shared_result():
+    assert rate_limited_fetches(INTERACTIVE, INTERACTIVE) == [INTERACTIVE]
+
+
+def test_higher_priority_follower_refetches_on_its_own_lane():
+    assert rate_limited_fetches(BACKGROUND, INTERACTIVE) == [BACKGROUND, INTERACTIVE]
@@ -0,0 +1,74 @@
+"""Tests for the SQLite tier of weather_cache.py"""
+
+import sqlite3
+import threading
+import time
+
+from weather_cache import SQLiteCache, TTLCache, TieredCache
+
+
+def make_tiered(path):
+    return TieredCache(TTLCache(max_entries=10), SQLiteCache(str(path)), encode=str, decode=str)
+
+
+def test_threads_share_one_connection(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"))
+    cache.set("pune", "sunny", 60)
+    results = []
+
+    def read():
+        results.append(cache.get_entry("pune"))
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [value for value, _ in results] == ["sunny"] * 8
+    assert cache.stats()["errors"] == 0
+
+
+def test_unopenable_file_is_a_miss_not_an_error(tmp_path):
+    (tmp_path / "garbage.db").write_bytes(b"not a sqlite database" * 100)
+    for path in (tmp_path / "missing" / "cache.db", tmp_path / "garbage.db"):
+        cache = SQLiteCache(str(path))
+        assert not cache.available
+        cache.set("pune", "sunny", 60)
+        assert cache.get_entry("pune") is None
+        assert cache.ttl_remaining("pune") is None
+
+
+def test_tiered_cache_counts_one_result_per_lookup(tmp_path):
+    path = tmp_path / "cache.db"
+    writer = make_tiered(path)
+    writer.set("pune", "sunny", 60)
+    writer.disk.flush()
+
+    # A second process: empty memory tier, same file
+    cache = make_tiered(path)
+    assert cache.get_entry("pune")[0] == "sunny"  # disk hit
+    assert cache.get_entry("pune")[0] == "sunny"  # memory hit
+    assert cache.get_entry("delhi") is None  # miss in both tiers
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["stale_hits"], stats["misses"]) == (2, 0, 1)
+    assert stats["memory"]["misses"] == 2
+    assert stats["disk"]["hits"] == 1
+
+
+def test_writes_do_not_wait_for_a_locked_database(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = SQLiteCache(path)
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN EXCLUSIVE")  # another process holds the write lock
+
+    start = time.monotonic()
+    cache.set("pune", "sunny", 60)
+    assert time.monotonic() - start < 0.1
+    assert cache.get_entry("pune")[0] == "sunny"  # queued writes are visible
+
+    other.execute("COMMIT")
+    other.close()
+    cache.flush()
+    assert SQLiteCache(path).get_entry("pune")[0] == "sunny"
@@ -0,0 +1,316 @@
+"""
+Voice Turn Tracing Module
+Timestamps every stage of a voice turn (end of user speech, transcript, LLM
+first token, tool calls, TTS first audio, playout) under one turn ID, and
+exports each finished turn as a JSON line plus latency histograms
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from livekit.agents import llm, stt, tts, utils
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Stage timestamps, in the order they normally happen
+STAGES = ("speech_end", "transcript", "llm_first_token", "tts_first_audio", "playout_start", "playout_end")
+
+TURN_STAGE_SECONDS = REGISTRY.histogram(
+    "agent_turn_stage_seconds", "Time from end of user speech to each stage of a voice turn", ["stage"]
+)
+TURNS_TRACED = REGISTRY.counter(
+    "agent_turns_traced_total", "Voice turns traced by route and outcome", ["route", "outcome"]
+)
+
+
+class TraceWriter:
+    """Appends finished turns as JSON lines to one file per host (shared by all worker processes)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, record: Dict) -> None:
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        try:
+            # One short append per turn; O_APPEND keeps lines from different
+            # processes whole
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError:
+            logger.warning("Could not write turn trace to %s", self.path)
+
+
+class _Turn:
+    """Timestamps of one turn (time.perf_counter() values)"""
+
+    def __init__(self):
+        self.id = utils.shortuuid()
+        self.route = "say"
+        self.marks: Dict[str, float] = {}
+        self.spans: List[Dict] = []
+
+    def has_reply(self) -> bool:
+        return bool(self.spans) or "playout_start" in self.marks
+
+
+class TurnTracer:
+    """
+    Collects the stage timestamps of one room's voice turns
+
+    A turn starts at the end of user speech (or at the first agent activity,
+    for the greeting) and is finished when the agent's reply is committed to
+    the chat context or interrupted. All methods run on the event loop.
+    """
+
+    def __init__(self, room: str, writer: Optional[TraceWriter] = None):
+        """
+        Args:
+            room: Room name recorded with every turn
+            writer: JSON lines export (None keeps only the histograms)
+        """
+        self.room = room
+        self.writer = writer
+        self._turn: Optional[_Turn] = None
+
+    def _current(self) -> _Turn:
+        if self._turn is None:
+            self._turn = _Turn()
+        return self._turn
+
+    @property
+    def turn_id(self) -> Optional[str]:
+        return self._turn.id if self._turn is not None else None
+
+    def mark(self, stage: str, latest: bool = False) -> None:
+        """
+        Record when a stage happened in the current turn
+
+        Args:
+            stage: One of STAGES
+            latest: Overwrite an earlier timestamp of the stage instead of keeping the first
+        """
+        turn = self._current()
+        if latest or stage not in turn.marks:
+            turn.marks[stage] = time.perf_counter()
+
+    def speech_ended(self) -> None:
+        """The user stopped speaking: a new turn, unless the reply has not started yet"""
+        if self._turn is not None and self._turn.has_reply():
+            # The user spoke over a reply that never got committed
+            self.finish(interrupted=True)
+        self.mark("speech_end", latest=True)
+
+    def set_route(self, route: str) -> None:
+        """Record how the turn is answered ("llm" or "fast_path")"""
+        self._current().route = route
+
+    def start_span(self, name: str) -> Dict:
+        """
+        Start timing an operation of the current turn
+
+        Args:
+            name: Span name, e.g. "llm" or "tool:get_weather"
+
+        Returns:
+            The span record; the caller sets its "first" (first result) and
+            "end" keys to time.perf_counter() values
+        """
+        span = {"name": name, "start": time.perf_counter()}
+        self._current().spans.append(span)
+        return span
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[Dict]:
+        """Time an operation of the current turn, such as a tool call, as a with-block"""
+        span = self.start_span(name)
+        try:
+            yield span
+        finally:
+            span["end"] = time.perf_counter()
+
+    def finish(self, interrupted: bool = False) -> None:
+        """
+        Close the current turn, observe its histograms and export it
+
+        Args:
+            interrupted: The reply was cut off by the user
+        """
+        turn, self._turn = self._turn, None
+        if turn is None:
+            return
+
+        now = time.perf_counter()
+        origin = turn.marks.get("speech_end")
+        if origin is None:
+            origin = min(list(turn.marks.values()) + [span["start"] for span in turn.spans] + [now])
+        else:
+            for stage in STAGES[1:]:
+                if stage in turn.marks:
+                    TURN_STAGE_SECONDS.observe(turn.marks[stage] - origin, stage)
+        TURNS_TRACED.inc(turn.route, "interrupted" if interrupted else "completed")
+
+        if self.writer is None:
+            return
+
+        def ms(timestamp: float) -> float:
+            return round((timestamp - origin) * 1000, 1)
+
+        spans = []
+        for span in turn.spans:
+            record = {"name": span["name"], "start_ms": ms(span["start"]), "end_ms": ms(span.get("end", now))}
+            if "first" in span:
+                record["first_ms"] = ms(span["first"])
+            spans.append(record)
+
+        first_audio = turn.marks.get("playout_start")
+        self.writer.write({
+            "turn_id": turn.id,
+            "room": self.room,
+            "ts": round(time.time() - (now - origin), 3),
+            "route": turn.route,
+            "interrupted": interrupted,
+            "marks_ms": {stage: ms(turn.marks[stage]) for stage in STAGES if stage in turn.marks},
+            "spans": spans,
+            "first_audio_ms": ms(first_audio) if first_audio is not None and "speech_end" in turn.marks else None
+        })
+
+    def attach(self, assistant) -> None:
+        """
+        Follow a VoiceAssistant's events
+
+        Args:
+            assistant: VoiceAssistant of the room (before start())
+        """
+        assistant.on("user_stopped_speaking", self.speech_ended)
+        assistant.on("agent_started_speaking", lambda: self.mark("playout_start"))
+        assistant.on("agent_stopped_speaking", lambda: self.mark("playout_end", latest=True))
+        assistant.on("agent_speech_committed", lambda msg: self.finish())
+        assistant.on("agent_speech_interrupted", lambda msg: self.finish(interrupted=True))
+
+
+class TracedSTT(stt.STT):
+    """
+    STT wrapper marking when each final transcript arrives
+
+    Only recognize() is timed, which is what the voice pipeline uses for a
+    non-streaming STT such as OpenAI's; streaming is passed through untimed.
+    """
+
+    def __init__(self, wrapped: stt.STT, tracer: TurnTracer):
+        super().__init__(capabilities=wrapped.capabilities)
+        self.wrapped = wrapped
+        self.tracer = tracer
+
+    async def recognize(self, buffer, *, language: Optional[str] = None) -> stt.SpeechEvent:
+        event = await self.wrapped.recognize(buffer, language=language)
+        self.tracer.mark("transcript", latest=True)
+        return event
+
+    def stream(self, *, language: Optional[str] = None) -> stt.SpeechStream:
+        return self.wrapped.stream(language=language)
+
+    async def aclose(self) -> None:
+        await self.wrapped.aclose()
+
+
+class TracedLLM(llm.LLM):
+    """LLM wrapper timing each completion and its first token"""
+
+    def __init__(self, wrapped: llm.LLM, tracer: TurnTracer):
+        super().__init__()
+        self.wrapped = wrapped
+        self.tracer = tracer
+
+    @property
+    def capabilities(self):
+        return self.wrapped.capabilities
+
+    def chat(self, *, chat_ctx: llm.ChatContext, fnc_ctx: Optional[llm.FunctionContext] = None, **kwargs) -> llm.LLMStream:
+        return _TracedLLMStream(self.wrapped.chat(chat_ctx=chat_ctx, fnc_ctx=fnc_ctx, **kwargs), self.tracer)
+
+
+class _TracedLLMStream(llm.LLMStream):
+    """Passes an LLM stream through, recording an "llm" span of the turn"""
+
+    def __init__(self, inner: llm.LLMStream, tracer: TurnTracer):
+        super().__init__(chat_ctx=inner.chat_ctx, fnc_ctx=inner.fnc_ctx)
+        self._inner = inner
+        self._tracer = tracer
+        self._span = tracer.start_span("llm")
+
+    @property
+    def function_calls(self) -> List[llm.FunctionCallInfo]:
+        return self._inner.function_calls
+
+    def execute_functions(self):
+        return self._inner.execute_functions()
+
+    async def __anext__(self) -> llm.ChatChunk:
+        try:
+            chunk = await self._inner.__anext__()
+        except StopAsyncIteration:
+            self._span.setdefault("end", time.perf_counter())
+            raise
+        if "first" not in self._span:
+            self._span["first"] = time.perf_counter()
+            self._tracer.mark("llm_first_token")
+        return chunk
+
+    async def aclose(self) -> None:
+        self._span.setdefault("end", time.perf_counter())
+        await self._inner.aclose()
+
+
+class TracedTTS(tts.TTS):
+    """
+    TTS wrapper marking the first synthesized audio of each turn
+
+    Only synthesize() is timed, which is what the voice pipeline uses for a
+    non-streaming TTS; streaming is passed through untimed.
+    """
+
+    def __init__(self, wrapped: tts.TTS, tracer: TurnTracer):
+        super().__init__(
+            capabilities=wrapped.capabilities,
+            sample_rate=wrapped.sample_rate,
+            num_channels=wrapped.num_channels
+        )
+        self.wrapped = wrapped
+        self.tracer = tracer
+
+    def synthesize(self, text: str) -> tts.ChunkedStream:
+        return _TracedChunkedStream(self.wrapped.synthesize(text), self.tracer)
+
+    def stream(self) -> tts.SynthesizeStream:
+        return self.wrapped.stream()
+
+    async def aclose(self) -> None:
+        await self.wrapped.aclose()
+
+
+class _TracedChunkedStream(tts.ChunkedStream):
+    """Passes synthesized audio through, marking the first frame"""
+
+    def __init__(self, inner: tts.ChunkedStream, tracer: TurnTracer):
+        self._inner = inner
+        self._tracer = tracer
+        super().__init__()
+
+    async def _main_task(self) -> None:
+        try:
+            async for event in self._inner:
+                self._tracer.mark("tts_first_audio")
+                self._event_ch.send_nowait(event)
+        finally:
+            await self._inner.aclose()
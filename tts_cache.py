@@ -0,0 +1,277 @@
+"""
+TTS Audio Cache Module
+Replays previously synthesized audio for repeated utterances (the greeting,
+fixed error messages, identical weather sentences) instead of calling the
+TTS provider again
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from livekit import rtc
+from livekit.agents import tts, utils
+
+logger = logging.getLogger(__name__)
+
+# (sample_rate, num_channels, 16-bit PCM bytes)
+CachedAudio = Tuple[int, int, bytes]
+
+# The streams below fill ChunkedStream's _event_ch from _main_task, as the
+# provider plugins of livekit-agents 0.8 do (pinned in requirements.txt)
+
+# Replayed audio is cut into frames of this length
+REPLAY_FRAME_MS = 100
+
+# Disk entries start with sample rate and channel count
+_DISK_HEADER = struct.Struct("<II")
+
+
+class AudioLRU:
+    """LRU of synthesized audio bounded by total PCM bytes"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, CachedAudio]" = OrderedDict()
+        self._bytes = 0
+
+        # Counters
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[CachedAudio]:
+        audio = self._data.get(key)
+        if audio is not None:
+            self._data.move_to_end(key)
+        return audio
+
+    def set(self, key: str, audio: CachedAudio) -> None:
+        size = len(audio[2])
+        if size > self.max_bytes:
+            return
+
+        old = self._data.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old[2])
+        self._data[key] = audio
+        self._bytes += size
+
+        while self._bytes > self.max_bytes:
+            _, evicted = self._data.popitem(last=False)
+            self._bytes -= len(evicted[2])
+            self.evictions += 1
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class AudioDiskCache:
+    """
+    Directory of synthesized utterances shared by all worker processes
+
+    Each entry is one file written atomically. Once the directory holds more
+    than max_bytes, the least recently written files are removed.
+    """
+
+    # The directory size is checked every N writes
+    PRUNE_EVERY = 50
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._writes = 0
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key + ".pcm")
+
+    def get(self, key: str) -> Optional[CachedAudio]:
+        try:
+            with open(self._file(key), "rb") as f:
+                blob = f.read()
+        except OSError:
+            return None
+        if len(blob) < _DISK_HEADER.size:
+            return None
+        sample_rate, num_channels = _DISK_HEADER.unpack_from(blob)
+        return sample_rate, num_channels, blob[_DISK_HEADER.size:]
+
+    def set(self, key: str, audio: CachedAudio) -> None:
+        sample_rate, num_channels, pcm = audio
+        target = self._file(key)
+        tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(_DISK_HEADER.pack(sample_rate, num_channels))
+                f.write(pcm)
+            os.replace(tmp, target)
+        except OSError:
+            logger.warning("Could not write TTS cache entry to %s", self.path)
+            return
+
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self._prune()
+
+    def _prune(self) -> None:
+        try:
+            entries = [(e.stat().st_mtime, e.stat().st_size, e.path)
+                       for e in os.scandir(self.path) if e.name.endswith(".pcm")]
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+
+class CachedTTS(tts.TTS):
+    """
+    TTS wrapper that caches synthesized audio by (voice, text)
+
+    Drop-in replacement for the wrapped non-streaming TTS. The voice pipeline
+    wraps it in a StreamAdapter that synthesizes one sentence at a time, so a
+    sentence repeated inside a longer reply is replayed from the cache too.
+    Only complete syntheses are stored; a failed or interrupted one is not.
+    """
+
+    def __init__(
+        self,
+        wrapped: tts.TTS,
+        voice: str,
+        max_bytes: int,
+        disk_path: str = "",
+        disk_max_bytes: int = 0
+    ):
+        """
+        Args:
+            wrapped: TTS plugin doing the actual synthesis
+            voice: Identifies the provider, model and voice (part of the key)
+            max_bytes: Memory budget for cached PCM audio
+            disk_path: Directory for the shared on-disk tier ("" disables it)
+            disk_max_bytes: Size budget of the on-disk tier
+        """
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=wrapped.sample_rate,
+            num_channels=wrapped.num_channels
+        )
+        self.wrapped = wrapped
+        self.voice = voice
+        self.memory = AudioLRU(max_bytes)
+        self.disk = AudioDiskCache(disk_path, disk_max_bytes) if disk_path else None
+
+        # Counters
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.voice}\0{' '.join(text.split())}".encode("utf-8")).hexdigest()
+
+    def synthesize(self, text: str) -> tts.ChunkedStream:
+        key = self._key(text)
+        audio = self.memory.get(key)
+        if audio is not None:
+            self.hits += 1
+            return _ReplayStream(audio)
+        return _CachingStream(self, key, text)
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and memory usage"""
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "entries": len(self.memory),
+            "bytes": self.memory.size_bytes,
+            "max_bytes": self.memory.max_bytes,
+            "evictions": self.memory.evictions
+        }
+
+    async def aclose(self) -> None:
+        await self.wrapped.aclose()
+
+
+def _replay(stream: tts.ChunkedStream, audio: CachedAudio) -> None:
+    """Send cached PCM to a stream's consumer as frames of REPLAY_FRAME_MS"""
+    sample_rate, num_channels, pcm = audio
+    bytes_per_sample = 2 * num_channels
+    step = sample_rate * REPLAY_FRAME_MS // 1000 * bytes_per_sample
+    request_id = utils.shortuuid()
+    for offset in range(0, len(pcm), step):
+        chunk = pcm[offset:offset + step]
+        frame = rtc.AudioFrame(
+            data=chunk,
+            sample_rate=sample_rate,
+            num_channels=num_channels,
+            samples_per_channel=len(chunk) // bytes_per_sample
+        )
+        stream._event_ch.send_nowait(tts.SynthesizedAudio(request_id=request_id, segment_id="", frame=frame))
+
+
+class _ReplayStream(tts.ChunkedStream):
+    """Emits cached audio without calling the provider"""
+
+    def __init__(self, audio: CachedAudio):
+        self._audio = audio
+        super().__init__()
+
+    async def _main_task(self) -> None:
+        _replay(self, self._audio)
+
+
+class _CachingStream(tts.ChunkedStream):
+    """Checks the disk tier, else synthesizes with the wrapped TTS and records the audio"""
+
+    def __init__(self, owner: CachedTTS, key: str, text: str):
+        self._owner = owner
+        self._key = key
+        self._text = text
+        super().__init__()
+
+    async def _main_task(self) -> None:
+        owner = self._owner
+        if owner.disk is not None:
+            audio = await asyncio.to_thread(owner.disk.get, self._key)
+            if audio is not None:
+                owner.disk_hits += 1
+                owner.memory.set(self._key, audio)
+                _replay(self, audio)
+                return
+
+        owner.misses += 1
+        stream = owner.wrapped.synthesize(self._text)
+        chunks = []
+        sample_rate = num_channels = 0
+        try:
+            async for event in stream:
+                frame = event.frame
+                sample_rate, num_channels = frame.sample_rate, frame.num_channels
+                chunks.append(bytes(frame.data))
+                self._event_ch.send_nowait(event)
+        finally:
+            await stream.aclose()
+
+        # A provider error ends the inner stream early without raising here;
+        # only cache audio from a synthesis that completed
+        if not chunks or stream._task.cancelled() or stream._task.exception() is not None:
+            return
+
+        audio = (sample_rate, num_channels, b"".join(chunks))
+        owner.memory.set(self._key, audio)
+        if owner.disk is not None:
+            await asyncio.to_thread(owner.disk.set, self._key, audio)
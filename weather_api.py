@@ -3,84 +3,746 @@ Weather API Integration Module
 Fetches real-time weather data from OpenWeatherMap API
 """
 
+import abc
+import asyncio
+import functools
+import json
 import os
+import random
+import threading
+import time
+import aiohttp
+from datetime import date
 import requests
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from config import (
+    WEATHER_API_BASE_URL,
+    WEATHER_CACHE_DISK_MAX_ENTRIES,
+    WEATHER_CACHE_MAX_ENTRIES,
+    WEATHER_CACHE_PATH,
+    WEATHER_CACHE_STALE_TTL,
+    WEATHER_CACHE_TTL_CURRENT,
+    WEATHER_CACHE_TTL_FORECAST,
+    WEATHER_CONNECT_TIMEOUT,
+    WEATHER_GEO_TILE_KM,
+    WEATHER_GROUP_BATCH_MAX,
+    WEATHER_GROUP_BATCH_WINDOW_MS,
+    WEATHER_HTTP_POOL_SIZE,
+    WEATHER_NEGATIVE_CACHE_TTL,
+    WEATHER_QUOTA_MAX_WAIT,
+    WEATHER_QUOTA_PER_DAY,
+    WEATHER_QUOTA_PER_MINUTE,
+    WEATHER_READ_TIMEOUT,
+    WEATHER_REFRESH_BUDGET_PER_MINUTE,
+    WEATHER_REFRESH_INTERVAL,
+    WEATHER_REFRESH_LEAD_TIME,
+    WEATHER_REFRESH_TOP_N,
+    WEATHER_RETRY_BACKOFF,
+    WEATHER_RETRY_TOTAL,
+    WEATHER_UNITS,
+)
+from forecast_store import ForecastSeries
+from gazetteer import get_gazetteer
+from geotile import parse_tile_name, snap, tile_name, valid_coordinates
+from metrics import REGISTRY
+from microbatch import MicroBatcher
+from quota import BACKGROUND, BATCH, INTERACTIVE, LANE_NAMES, QuotaExceeded, QuotaScheduler
+from refresh import RefreshScheduler
+from singleflight import AsyncSingleFlight, SingleFlight
+from weather_cache import SQLiteCache, TTLCache, TieredCache, normalize_city
 
 # Load environment variables
 load_dotenv()
 
-class WeatherAPI:
-    """Handles weather data fetching from OpenWeatherMap"""
+# Upstream statuses worth retrying (transient server errors). A 429 is not
+# retried: it pauses the quota scheduler instead
+RETRY_STATUSES = (500, 502, 503, 504)
+
+# Upstream instrumentation (status is the HTTP code, "timeout" or "connection_error")
+UPSTREAM_REQUESTS = REGISTRY.counter(
+    "weather_upstream_requests_total",
+    "OpenWeatherMap requests by endpoint and outcome",
+    ["endpoint", "status"]
+)
+UPSTREAM_SECONDS = REGISTRY.histogram(
+    "weather_upstream_request_seconds",
+    "OpenWeatherMap request latency including retries",
+    ["endpoint"]
+)
+
+
+def create_session(pool_size: int = WEATHER_HTTP_POOL_SIZE) -> requests.Session:
+    """
+    Create a keep-alive HTTP session
+    
+    Retries are not done by the session but by WeatherAPI, so that every
+    attempt takes its own upstream quota token.
     
-    def __init__(self):
+    Args:
+        pool_size: Maximum pooled connections kept open per host
+        
+    Returns:
+        Configured requests.Session
+    """
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+    
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds (HTTP dates are ignored)"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _encode_result(result: Dict) -> str:
+    """Serialize a cached result for the shared disk cache"""
+    if "series" in result:
+        result = dict(result, series=result["series"].to_dict())
+    return json.dumps(result)
+
+
+def _decode_result(text: str) -> Dict:
+    """Restore a result serialized with _encode_result()"""
+    result = json.loads(text)
+    if "series" in result:
+        result["series"] = ForecastSeries.from_dict(result["series"])
+    return result
+
+
+class _BaseWeatherAPI(abc.ABC):
+    """Configuration, caching and response parsing shared by the sync and async clients"""
+    
+    def __init__(
+        self,
+        cache_max_entries: int = WEATHER_CACHE_MAX_ENTRIES,
+        cache_path: str = WEATHER_CACHE_PATH,
+        base_url: str = WEATHER_API_BASE_URL,
+        pool_size: int = WEATHER_HTTP_POOL_SIZE,
+        connect_timeout: float = WEATHER_CONNECT_TIMEOUT,
+        read_timeout: float = WEATHER_READ_TIMEOUT
+    ):
         self.api_key = os.getenv("OPENWEATHER_API_KEY")
-        self.base_url = "https://api.openweathermap.org/data/2.5/weather"
-        self.forecast_url = "https://api.openweathermap.org/data/2.5/forecast"
+        self.base_url = f"{base_url}/weather"
+        self.forecast_url = f"{base_url}/forecast"
+        self.group_url = f"{base_url}/group"
         
         if not self.api_key or self.api_key == "your_api_key_here":
             raise ValueError(
                 "OpenWeatherMap API key not found. "
                 "Please set OPENWEATHER_API_KEY in .env file"
             )
+        
+        # Known cities are requested by ID rather than ambiguous free text
+        self.gazetteer = get_gazetteer()
+        
+        # Successful responses are cached per (endpoint, normalized city) and
+        # served stale for a grace period while a background refresh runs
+        self.cache = TTLCache(max_entries=cache_max_entries, stale_ttl=WEATHER_CACHE_STALE_TTL)
+        if cache_path:
+            # Shared with other processes on the host and kept across restarts;
+            # a file that cannot be opened leaves the memory tier on its own
+            disk = SQLiteCache(
+                cache_path, max_entries=WEATHER_CACHE_DISK_MAX_ENTRIES, stale_ttl=WEATHER_CACHE_STALE_TTL
+            )
+            if disk.available:
+                self.cache = TieredCache(self.cache, disk, encode=_encode_result, decode=_decode_result)
+        self.cache_ttl = {
+            "current": WEATHER_CACHE_TTL_CURRENT,
+            "forecast": WEATHER_CACHE_TTL_FORECAST
+        }
+        
+        # Unknown cities (404s) are remembered briefly, keyed by normalized city
+        self.negative_cache = TTLCache(max_entries=cache_max_entries)
+        self.negative_cache_ttl = WEATHER_NEGATIVE_CACHE_TTL
+        
+        # Plans stale revalidations and proactive refreshes of hot cities
+        self.refresher = RefreshScheduler(
+            self.cache.ttl_remaining,
+            top_n=WEATHER_REFRESH_TOP_N,
+            budget_per_minute=WEATHER_REFRESH_BUDGET_PER_MINUTE,
+            lead_time=WEATHER_REFRESH_LEAD_TIME
+        )
+        
+        # Client-side token bucket for the provider's quota, shared by all lanes
+        self.quota = QuotaScheduler(
+            per_minute=WEATHER_QUOTA_PER_MINUTE,
+            per_day=WEATHER_QUOTA_PER_DAY,
+            max_wait=WEATHER_QUOTA_MAX_WAIT
+        )
+        
+        # Coordinate lookups are snapped to grid cells of this size, and each
+        # cell is cached like a city, so nearby users share one upstream call
+        self.tile_km = WEATHER_GEO_TILE_KM
+        
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        
+        # Connection errors and 5xx responses are retried with jittered
+        # exponential backoff; each attempt takes a quota token
+        self.retries = WEATHER_RETRY_TOTAL
+        self.backoff = WEATHER_RETRY_BACKOFF
+    
+    def cache_stats(self) -> Dict:
+        """Return hit/miss counters of the response cache and coalesced call count"""
+        stats = self.cache.stats()
+        stats["coalesced"] = self.flight.coalesced
+        stats["negative_hits"] = self.negative_cache.hits
+        stats["refresh"] = self.refresher.stats()
+        stats["quota"] = self.quota.stats()
+        return stats
     
-    def get_current_weather(self, city: str) -> Dict:
+    def collect_metrics(self) -> List[Tuple]:
+        """Expose cache, coalescing and refresh counters to a metrics registry"""
+        stats = self.cache_stats()
+        refresh = stats["refresh"]
+        quota = stats["quota"]
+        metrics = [
+            ("weather_cache_lookups_total", "counter", "Response cache lookups by result", [
+                ({"result": "hit"}, stats["hits"]),
+                ({"result": "stale"}, stats["stale_hits"]),
+                ({"result": "miss"}, stats["misses"])
+            ]),
+            ("weather_cache_entries", "gauge", "Entries in the in-process response cache",
+             [({}, stats["size"])]),
+            ("weather_cache_evictions_total", "counter", "LRU evictions from the response cache",
+             [({}, stats["evictions"])]),
+            ("weather_negative_cache_hits_total", "counter", "Lookups answered from the unknown-city cache",
+             [({}, stats["negative_hits"])]),
+            ("weather_coalesced_calls_total", "counter", "Lookups that joined an in-flight fetch",
+             [({}, stats["coalesced"])]),
+            ("weather_background_refreshes_total", "counter", "Background refreshes started",
+             [({}, refresh["refreshes"])]),
+            ("weather_background_refreshes_skipped_total", "counter", "Background refreshes skipped over budget",
+             [({}, refresh["skipped_over_budget"])]),
+            ("weather_quota_requests_total", "counter", "Upstream quota decisions by lane",
+             [({"lane": lane, "result": "granted"}, quota["granted"][lane]) for lane in LANE_NAMES] +
+             [({"lane": lane, "result": "denied"}, quota["denied"][lane]) for lane in LANE_NAMES]),
+            ("weather_quota_day_used", "gauge", "Upstream calls made today (UTC)",
+             [({}, quota["day_used"])]),
+            ("weather_quota_cooldown_seconds", "gauge", "Seconds left in a provider-imposed pause",
+             [({}, quota["cooldown"])]),
+            ("weather_upstream_rate_limited_total", "counter", "429 responses from the provider",
+             [({}, quota["rate_limited"])])
+        ]
+        if quota["tokens"] is not None:
+            metrics.append(("weather_quota_tokens", "gauge", "Tokens left in the per-minute bucket",
+                            [({}, quota["tokens"])]))
+        return metrics
+    
+    def freshness(self, endpoint: str, city: str) -> float:
         """
-        Fetch current weather for a given city
+        Seconds until the cached answer for a city expires
         
         Args:
+            endpoint: "current" or "forecast"
             city: Name of the city
             
+        Returns:
+            Remaining freshness of the cached (or unknown-city) entry; 0 if
+            it is stale or was never cached (e.g. after a timeout)
+        """
+        key = self._cache_key(endpoint, city)
+        remaining = self.cache.ttl_remaining(key)
+        if remaining is None:
+            remaining = self.negative_cache.ttl_remaining(key[1])
+        return max(0.0, remaining or 0.0)
+    
+    def geo_tile(self, lat: float, lon: float) -> Optional[str]:
+        """
+        Name the grid cell a coordinate falls in
+        
+        The name can be passed wherever a city name is expected: it is cached,
+        coalesced and refreshed per cell, and requested by the cell's center.
+        
+        Args:
+            lat: Latitude in degrees
+            lon: Longitude in degrees
+            
+        Returns:
+            Tile name, or None if the coordinate is invalid
+        """
+        if not valid_coordinates(lat, lon):
+            return None
+        return tile_name(*snap(lat, lon, self.tile_km))
+    
+    def _cache_key(self, endpoint: str, city: str) -> Tuple[str, str]:
+        # Aliases of a known city (Bangalore/Bengaluru) share one entry
+        known = self.gazetteer.lookup(city)
+        return (endpoint, normalize_city(known.name if known else city))
+    
+    def _from_cache(self, key: Tuple[str, str], city: str, lane: int) -> Optional[Dict]:
+        """
+        Return a cached result, or a not-found answer for a recently unknown city
+        
+        A stale entry is returned immediately and a background refresh is
+        started for it (subject to the refresh budget).
+        """
+        return self._serve_entry(key, city, self._lookup(key, city, lane))
+    
+    def _lookup(self, key: Tuple[str, str], city: str, lane: int) -> Optional[Tuple[Dict, float]]:
+        # Background lookups (prefetches) are speculative and do not make a city hot
+        if self.refresher.top_n > 0 and lane != BACKGROUND:
+            self.refresher.record(key, city)
+        return self.cache.get_entry(key)
+    
+    def _serve_entry(self, key: Tuple[str, str], city: str, entry: Optional[Tuple[Dict, float]]) -> Optional[Dict]:
+        if entry is not None:
+            result, remaining = entry
+            if remaining <= 0 and self.refresher.claim(key):
+                self._revalidate(key, city)
+            return result
+        
+        suggestion = self.negative_cache.get(key[1])
+        if suggestion is not None:
+            return self._city_not_found(key[0], city, suggestion=suggestion)
+        return None
+    
+    @abc.abstractmethod
+    def _revalidate(self, key: Tuple[str, str], city: str) -> None:
+        """Refresh a cache entry in the background (implemented per transport)"""
+    
+    def _retry_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number attempt (1-based)"""
+        return random.uniform(0, self.backoff * 2 ** (attempt - 1))
+    
+    def _store(self, key: Tuple[str, str], result: Dict) -> Dict:
+        # Successful lookups are cached; unknown cities go to the short-lived
+        # negative cache; other errors are retried next time
+        if result["success"]:
+            self.cache.set(key, result, self.cache_ttl[key[0]])
+        elif result["error"] == "city_not_found":
+            self.negative_cache.set(key[1], result.get("suggestion", ""), self.negative_cache_ttl)
+            self.refresher.forget(key)
+        return result
+    
+    def _city_not_found(self, endpoint: str, city: str, suggestion: Optional[str] = None) -> Dict:
+        """
+        Build the city_not_found result, with a "did you mean" hint when possible
+        
+        Args:
+            endpoint: "current" or "forecast"
+            city: Name of the city that was requested
+            suggestion: Known suggestion ("" for none); looked up locally if omitted
+            
+        Returns:
+            Error dictionary
+        """
+        if parse_tile_name(city) is not None:
+            return {
+                "success": False,
+                "error": "city_not_found",
+                "message": "Sorry, I couldn't find weather data for that location."
+            }
+        
+        if endpoint == "current":
+            message = f"Sorry, I couldn't find weather data for {city}. Please check the city name."
+        else:
+            message = f"Sorry, I couldn't find forecast data for {city}."
+        
+        result = {
+            "success": False,
+            "error": "city_not_found",
+            "message": message
+        }
+        
+        if suggestion is None:
+            match = self.gazetteer.suggest(city)
+            suggestion = match.name if match else ""
+        if suggestion:
+            result["suggestion"] = suggestion
+            result["message"] += f" Did you mean {suggestion}?"
+        return result
+    
+    @staticmethod
+    def _rate_limited() -> Dict:
+        """Error result for a lookup refused by (or over) the upstream quota"""
+        return {
+            "success": False,
+            "error": "rate_limited",
+            "message": "The weather service is busy right now. Please try again in a minute."
+        }
+    
+    @staticmethod
+    def _invalid_coordinates() -> Dict:
+        """Error result for a latitude/longitude outside the globe"""
+        return {
+            "success": False,
+            "error": "invalid_coordinates",
+            "message": "Sorry, that location doesn't look valid. Latitude must be between -90 and 90 and longitude between -180 and 180."
+        }
+    
+    def _params(self, city: str, **extra) -> Dict:
+        known = self.gazetteer.lookup(city)
+        coordinates = parse_tile_name(city)
+        params = {
+            "appid": self.api_key,
+            "units": WEATHER_UNITS  # Use Celsius
+        }
+        if known:
+            params["id"] = known.id
+        elif coordinates:
+            params["lat"], params["lon"] = coordinates
+        else:
+            params["q"] = city
+        params.update(extra)
+        return params
+    
+    def _current_weather_result(self, city: str, status: int, data: Optional[Dict]) -> Dict:
+        """
+        Turn an OpenWeatherMap current weather response into a result dictionary
+        
+        Args:
+            city: Name of the city that was requested
+            status: HTTP status code of the response
+            data: Decoded JSON body (only read when status is 200)
+            
         Returns:
             Dictionary with weather information
         """
-        try:
-            params = {
-                "q": city,
-                "appid": self.api_key,
-                "units": "metric"  # Use Celsius
+        # Handle HTTP errors
+        if status == 404:
+            return self._city_not_found("current", city)
+        elif status == 429:
+            return self._rate_limited()
+        elif status == 401:
+            return {
+                "success": False,
+                "error": "api_key_invalid",
+                "message": "API authentication failed. Please check your API key."
             }
+        elif status != 200:
+            return {
+                "success": False,
+                "error": "api_error",
+                "message": f"Weather service returned an error: {status}"
+            }
+        
+        # Extract relevant weather information
+        weather_info = {
+            "success": True,
+            "city": data["name"],
+            "country": data["sys"]["country"],
+            "temperature": round(data["main"]["temp"]),
+            "feels_like": round(data["main"]["feels_like"]),
+            "description": data["weather"][0]["description"],
+            "humidity": data["main"]["humidity"],
+            "wind_speed": data["wind"]["speed"],
+            "main_weather": data["weather"][0]["main"],
+            "city_id": data.get("id")
+        }
+        
+        return weather_info
+    
+    def _forecast_result(self, city: str, status: int, data: Optional[Dict]) -> Dict:
+        """
+        Turn an OpenWeatherMap forecast response into a cacheable result
+        
+        Args:
+            city: Name of the city that was requested
+            status: HTTP status code of the response
+            data: Decoded JSON body (only read when status is 200)
             
-            response = requests.get(self.base_url, params=params, timeout=10)
-            
-            # Handle HTTP errors
-            if response.status_code == 404:
-                return {
-                    "success": False,
-                    "error": "city_not_found",
-                    "message": f"Sorry, I couldn't find weather data for {city}. Please check the city name."
-                }
-            elif response.status_code == 401:
-                return {
-                    "success": False,
-                    "error": "api_key_invalid",
-                    "message": "API authentication failed. Please check your API key."
-                }
-            elif response.status_code != 200:
-                return {
-                    "success": False,
-                    "error": "api_error",
-                    "message": f"Weather service returned an error: {response.status_code}"
-                }
-            
-            data = response.json()
-            
-            # Extract relevant weather information
-            weather_info = {
-                "success": True,
-                "city": data["name"],
-                "country": data["sys"]["country"],
-                "temperature": round(data["main"]["temp"]),
-                "feels_like": round(data["main"]["feels_like"]),
-                "description": data["weather"][0]["description"],
-                "humidity": data["main"]["humidity"],
-                "wind_speed": data["wind"]["speed"],
-                "main_weather": data["weather"][0]["main"]
+        Returns:
+            Dictionary holding the full ForecastSeries under "series", or an error
+        """
+        if status == 404:
+            return self._city_not_found("forecast", city)
+        elif status == 429:
+            return self._rate_limited()
+        elif status != 200:
+            return {
+                "success": False,
+                "error": "api_error",
+                "message": f"Weather service returned an error: {status}"
             }
+        
+        return {"success": True, "series": ForecastSeries.from_response(data)}
+    
+    def _forecast_summary(self, result: Dict, days_ahead: int) -> Dict:
+        # The full 5-day series is cached once; each question aggregates one day of it
+        if not result["success"]:
+            return result
+        return result["series"].summary(days_ahead)
+
+
+class WeatherAPI(_BaseWeatherAPI):
+    """Handles weather data fetching from OpenWeatherMap"""
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        
+        # One pooled keep-alive session shared by all threads; requests only
+        # reads session state while sending, so concurrent GETs are safe
+        self.session = create_session(pool_size=self.pool_size)
+        self.timeout = (self.connect_timeout, self.read_timeout)
+        
+        # Concurrent misses for the same city share one upstream request
+        self.flight = SingleFlight()
+        
+        # Background refreshes run on a small pool, never on request threads
+        self._refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="weather-refresh")
+        
+        # Multi-city lookups fan out on their own pool (callers may already be
+        # running on a shared request pool, which must not wait on itself)
+        self._fanout_pool = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="weather-fanout")
+        self._closed = threading.Event()
+        if self.refresher.top_n > 0:
+            threading.Thread(target=self._refresh_loop, name="weather-refresh-scheduler", daemon=True).start()
+        
+        # Optional micro-batchers folding concurrent lookups of known city IDs
+        # into one group request; IDs come from the gazetteer or are learned
+        # from earlier responses. Each quota lane batches separately, so a
+        # group call draws quota on the lane of every lookup it carries
+        # (background refreshes are never batched)
+        self.city_ids: Dict[str, int] = {}
+        self.batchers: Dict[int, MicroBatcher] = {}
+        if WEATHER_GROUP_BATCH_WINDOW_MS > 0:
+            self.batchers = {
+                lane: MicroBatcher(
+                    functools.partial(self._fetch_group, lane=lane),
+                    window=WEATHER_GROUP_BATCH_WINDOW_MS / 1000,
+                    max_batch=WEATHER_GROUP_BATCH_MAX
+                )
+                for lane in (INTERACTIVE, BATCH)
+            }
+    
+    def close(self):
+        """Stop background refreshes and close pooled upstream connections"""
+        self._closed.set()
+        self._refresh_pool.shutdown(wait=False)
+        self._fanout_pool.shutdown(wait=False)
+        self.session.close()
+    
+    def collect_metrics(self) -> List[Tuple]:
+        metrics = super().collect_metrics()
+        if self.batchers:
+            stats = [batcher.stats() for batcher in self.batchers.values()]
+            metrics.append(("weather_group_batches_total", "counter", "Group requests made by the micro-batcher",
+                            [({}, sum(s["batches"] for s in stats))]))
+            metrics.append(("weather_group_batch_items_total", "counter", "Lookups served by group requests",
+                            [({}, sum(s["items"] for s in stats))]))
+        return metrics
+    
+    def _revalidate(self, key: Tuple[str, str], city: str) -> None:
+        self._refresh_pool.submit(self._refresh, key, city)
+    
+    def _refresh(self, key: Tuple[str, str], city: str) -> None:
+        fetch = self._fetch_current_weather if key[0] == "current" else self._fetch_forecast
+        try:
+            # Joins a foreground fetch for the same key instead of duplicating it;
+            # refreshes only use quota left over by interactive and batch calls
+            self.flight.do(key, lambda: (self._store(key, fetch(city, BACKGROUND)), BACKGROUND))
+        finally:
+            self.refresher.release(key)
+    
+    def _refresh_loop(self) -> None:
+        while not self._closed.wait(WEATHER_REFRESH_INTERVAL):
+            for key, city in self.refresher.due():
+                self._revalidate(key, city)
+    
+    def _cached(self, endpoint: str, city: str, fetch, lane: int) -> Dict:
+        """
+        Serve a lookup from the cache, calling fetch on a miss
+        
+        Args:
+            endpoint: "current" or "forecast"
+            city: Name of the city
+            fetch: Callable performing the upstream request for city and lane
+            lane: Quota priority lane of the lookup
+            
+        Returns:
+            Cached or freshly fetched result dictionary (concurrent misses for
+            the same key wait for a single fetch and share its result)
+        """
+        key = self._cache_key(endpoint, city)
+        result = self._from_cache(key, city, lane)
+        if result is not None:
+            return result
+        
+        # Shared fetches return (result, lane the fetch ran on)
+        def run():
+            return self._store(key, fetch(city, lane)), lane
+        
+        result, fetch_lane = self.flight.do(key, run)
+        if result.get("error") == "rate_limited" and lane < fetch_lane:
+            # The shared fetch ran on a lower-priority lane (e.g. a background
+            # refresh) and was refused quota; ours may still have budget
+            result, _ = self.flight.do(key, run)
+        return result
+    
+    def get_current_weather(self, city: str, lane: int = INTERACTIVE) -> Dict:
+        """
+        Fetch current weather for a given city
+        
+        Args:
+            city: Name of the city
+            lane: Quota priority lane (INTERACTIVE, BATCH or BACKGROUND)
+            
+        Returns:
+            Dictionary with weather information
+        """
+        return self._cached("current", city, self._fetch_current_weather, lane)
+    
+    def get_current_weather_many(self, cities: List[str], lane: int = INTERACTIVE) -> List[Dict]:
+        """
+        Fetch current weather for several cities concurrently
+        
+        Args:
+            cities: Names of the cities
+            lane: Quota priority lane (INTERACTIVE, BATCH or BACKGROUND)
             
-            return weather_info
+        Returns:
+            Result dictionaries in the order of cities (with micro-batching
+            enabled, known cities share one group request)
+        """
+        if len(cities) <= 1:
+            return [self.get_current_weather(city, lane) for city in cities]
+        return list(self._fanout_pool.map(lambda city: self.get_current_weather(city, lane), cities))
+    
+    def get_forecast(self, city: str, days_ahead: int = 1, lane: int = INTERACTIVE) -> Dict:
+        """
+        Fetch weather forecast for a given city
+        
+        Args:
+            city: Name of the city
+            days_ahead: Day to summarize in the city's local time (1 = tomorrow)
+            lane: Quota priority lane (INTERACTIVE, BATCH or BACKGROUND)
             
+        Returns:
+            Dictionary with forecast information
+        """
+        result = self._cached("forecast", city, self._fetch_forecast, lane)
+        return self._forecast_summary(result, days_ahead)
+    
+    def get_current_weather_at(self, lat: float, lon: float, lane: int = INTERACTIVE) -> Dict:
+        """
+        Fetch current weather for a GPS coordinate, shared by its whole geo tile
+        
+        Args:
+            lat: Latitude in degrees
+            lon: Longitude in degrees
+            lane: Quota priority lane (INTERACTIVE, BATCH or BACKGROUND)
+            
+        Returns:
+            Dictionary with weather information
+        """
+        tile = self.geo_tile(lat, lon)
+        if tile is None:
+            return self._invalid_coordinates()
+        return self.get_current_weather(tile, lane)
+    
+    def get_forecast_at(self, lat: float, lon: float, days_ahead: int = 1, lane: int = INTERACTIVE) -> Dict:
+        """
+        Fetch weather forecast for a GPS coordinate, shared by its whole geo tile
+        
+        Args:
+            lat: Latitude in degrees
+            lon: Longitude in degrees
+            days_ahead: Day to summarize in local time (1 = tomorrow)
+            lane: Quota priority lane (INTERACTIVE, BATCH or BACKGROUND)
+            
+        Returns:
+            Dictionary with forecast information
+        """
+        tile = self.geo_tile(lat, lon)
+        if tile is None:
+            return self._invalid_coordinates()
+        return self.get_forecast(tile, days_ahead, lane)
+    
+    def _get(self, url: str, params: Dict, lane: int = INTERACTIVE) -> Tuple[int, Optional[Dict]]:
+        endpoint = url.rsplit("/", 1)[-1]
+        start = time.perf_counter()
+        try:
+            status, data = self._get_with_retries(url, params, lane)
+        except requests.exceptions.Timeout:
+            UPSTREAM_REQUESTS.inc(endpoint, "timeout")
+            raise
+        except requests.exceptions.ConnectionError:
+            UPSTREAM_REQUESTS.inc(endpoint, "connection_error")
+            raise
+        finally:
+            UPSTREAM_SECONDS.observe(time.perf_counter() - start, endpoint)
+        
+        UPSTREAM_REQUESTS.inc(endpoint, str(status))
+        return status, data
+    
+    def _get_with_retries(self, url: str, params: Dict, lane: int) -> Tuple[int, Optional[Dict]]:
+        """GET with a bounded, jittered retry policy; every attempt takes a quota token"""
+        attempt = 0
+        while True:
+            # Raises QuotaExceeded if no budget frees up within the lane's wait limit
+            self.quota.acquire(lane)
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except requests.exceptions.ConnectionError:
+                # Includes connect timeouts; a slow upstream (read timeout) is
+                # reported as a timeout, not retried
+                if attempt >= self.retries:
+                    raise
+            else:
+                if response.status_code == 429:
+                    self.quota.penalize(_retry_after(response.headers.get("Retry-After")))
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    data = response.json() if response.status_code == 200 else None
+                    return response.status_code, data
+                response.close()
+            attempt += 1
+            time.sleep(self._retry_delay(attempt))
+    
+    def _fetch_group(self, city_ids: List[int], lane: int = INTERACTIVE) -> Dict[int, Dict]:
+        """
+        Request current weather for several city IDs in one group call
+        
+        Args:
+            city_ids: OpenWeatherMap city IDs (at most the provider's per-call limit)
+            lane: Quota priority lane shared by the batched lookups
+            
+        Returns:
+            Raw weather payloads keyed by city ID; empty if the call failed
+        """
+        params = {
+            "id": ",".join(str(city_id) for city_id in city_ids),
+            "appid": self.api_key,
+            "units": WEATHER_UNITS
+        }
+        status, data = self._get(self.group_url, params, lane)
+        if status != 200:
+            # Callers fall back to individual lookups, which report the error
+            return {}
+        return {item["id"]: item for item in data["list"]}
+    
+    def _fetch_current_weather(self, city: str, lane: int = INTERACTIVE) -> Dict:
+        """Request current weather for a city from OpenWeatherMap"""
+        try:
+            city_key = normalize_city(city)
+            known = self.gazetteer.lookup(city)
+            city_id = known.id if known else self.city_ids.get(city_key)
+            batcher = self.batchers.get(lane)
+            if batcher is not None and city_id is not None:
+                data = batcher.submit(city_id)
+                if data is not None:
+                    return self._current_weather_result(city, 200, data)
+            
+            status, data = self._get(self.base_url, self._params(city), lane)
+            result = self._current_weather_result(city, status, data)
+            if result["success"] and result["city_id"] is not None and \
+                    len(self.city_ids) < self.cache.max_entries:
+                self.city_ids[city_key] = result["city_id"]
+            return result
+            
+        except QuotaExceeded:
+            return self._rate_limited()
         except requests.exceptions.Timeout:
             return {
                 "success": False,
@@ -100,67 +762,300 @@ class WeatherAPI:
                 "message": f"An unexpected error occurred: {str(e)}"
             }
     
-    def get_forecast(self, city: str) -> Dict:
+    def _fetch_forecast(self, city: str, lane: int = INTERACTIVE) -> Dict:
+        """Request the forecast for a city from OpenWeatherMap"""
+        try:
+            # Full 5-day series (40 x 3-hour intervals), fetched once per TTL
+            status, data = self._get(self.forecast_url, self._params(city), lane)
+            return self._forecast_result(city, status, data)
+            
+        except QuotaExceeded:
+            return self._rate_limited()
+        except Exception as e:
+            return {
+                "success": False,
+                "error": "unknown",
+                "message": f"An unexpected error occurred: {str(e)}"
+            }
+
+
+class AsyncWeatherAPI(_BaseWeatherAPI):
+    """
+    Non-blocking OpenWeatherMap client for asyncio code (the LiveKit agent)
+    
+    Returns the same result dictionaries as WeatherAPI. The aiohttp session
+    and its connection pool are created lazily on the running event loop and
+    shared by every coroutine of the worker process.
+    """
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.flight = AsyncSingleFlight()
+        self._refresh_tasks = set()
+        self._refresh_loop_task: Optional[asyncio.Task] = None
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            # One refresh loop per session: stop the previous one (which may
+            # belong to an earlier event loop) before starting a new one
+            await self._stop_refresh_loop()
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=30)
+            # connect also bounds the wait for a free connection in the pool,
+            # and total bounds each attempt as a whole
+            timeout = aiohttp.ClientTimeout(
+                total=self.connect_timeout + self.read_timeout,
+                connect=self.connect_timeout,
+                sock_connect=self.connect_timeout,
+                sock_read=self.read_timeout
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            self._session_loop = loop
+            
+            if self.refresher.top_n > 0:
+                self._refresh_loop_task = loop.create_task(self._refresh_loop())
+        return self._session
+    
+    async def _stop_refresh_loop(self) -> None:
+        task, self._refresh_loop_task = self._refresh_loop_task, None
+        if task is None or task.done():
+            return
+        if task.get_loop() is asyncio.get_running_loop():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        elif not task.get_loop().is_closed():
+            # Owned by another (still open) loop: it can only be cancelled there
+            task.get_loop().call_soon_threadsafe(task.cancel)
+    
+    async def aclose(self):
+        """Stop background refreshes and close pooled upstream connections"""
+        await self._stop_refresh_loop()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    async def _from_cache_async(self, key: Tuple[str, str], city: str, lane: int) -> Optional[Dict]:
+        """_from_cache() that reads the on-disk tier, if any, on a worker thread"""
+        if isinstance(self.cache, TieredCache):
+            remaining = self.cache.memory.ttl_remaining(key)
+            if remaining is None or remaining <= 0:
+                # Not fresh in memory: the lookup falls through to SQLite,
+                # which can wait up to its busy timeout on a locked file
+                entry = await asyncio.to_thread(self._lookup, key, city, lane)
+                return self._serve_entry(key, city, entry)
+        return self._from_cache(key, city, lane)
+    
+    def _revalidate(self, key: Tuple[str, str], city: str) -> None:
+        task = asyncio.get_running_loop().create_task(self._refresh(key, city))
+        # Keep a reference so the task is not garbage collected mid-flight
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+    
+    async def _refresh(self, key: Tuple[str, str], city: str) -> None:
+        fetch = self._fetch_current_weather if key[0] == "current" else self._fetch_forecast
+        
+        async def run():
+            return self._store(key, await fetch(city, BACKGROUND)), BACKGROUND
+        
+        try:
+            await self.flight.do(key, run)
+        finally:
+            self.refresher.release(key)
+    
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(WEATHER_REFRESH_INTERVAL)
+            for key, city in self.refresher.due():
+                self._revalidate(key, city)
+    
+    async def _cached(self, endpoint: str, city: str, fetch, lane: int) -> Dict:
         """
-        Fetch weather forecast for a given city
+        Serve a lookup from the cache, awaiting fetch on a miss
+        
+        Args:
+            endpoint: "current" or "forecast"
+            city: Name of the city
+            fetch: Coroutine function performing the upstream request for city and lane
+            lane: Quota priority lane of the lookup
+            
+        Returns:
+            Cached or freshly fetched result dictionary (concurrent misses for
+            the same key wait for a single fetch and share its result)
+        """
+        key = self._cache_key(endpoint, city)
+        result = await self._from_cache_async(key, city, lane)
+        if result is not None:
+            return result
+        
+        # Shared fetches return (result, lane the fetch ran on)
+        async def run():
+            return self._store(key, await fetch(city, lane)), lane
+        
+        result, fetch_lane = await self.flight.do(key, run)
+        if result.get("error") == "rate_limited" and lane < fetch_lane:
+            # The shared fetch ran on a lower-priority lane (e.g. a background
+            # refresh) and was refused quota; ours may still have budget
+            result, _ = await self.flight.do(key, run)
+        return result
+    
+    async def get_current_weather(self, city: str, lane: int = INTERACTIVE) -> Dict:
+        """
+        Fetch current weather for a given city without blocking the event loop
+        
+        Args:
+            city: Name of the city
+            lane: Quota priority lane (INTERACTIVE, BATCH or BACKGROUND)
+            
+        Returns:
+            Dictionary with weather information
+        """
+        return await self._cached("current", city, self._fetch_current_weather, lane)
+    
+    async def get_current_weather_many(self, cities: List[str], lane: int = INTERACTIVE) -> List[Dict]:
+        """
+        Fetch current weather for several cities concurrently
+        
+        Args:
+            cities: Names of the cities
+            lane: Quota priority lane (INTERACTIVE, BATCH or BACKGROUND)
+            
+        Returns:
+            Result dictionaries in the order of cities
+        """
+        return list(await asyncio.gather(*(self.get_current_weather(city, lane) for city in cities)))
+    
+    async def get_forecast(self, city: str, days_ahead: int = 1, lane: int = INTERACTIVE) -> Dict:
+        """
+        Fetch weather forecast for a given city without blocking the event loop
         
         Args:
             city: Name of the city
+            days_ahead: Day to summarize in the city's local time (1 = tomorrow)
+            lane: Quota priority lane (INTERACTIVE, BATCH or BACKGROUND)
+            
+        Returns:
+            Dictionary with forecast information
+        """
+        result = await self._cached("forecast", city, self._fetch_forecast, lane)
+        return self._forecast_summary(result, days_ahead)
+    
+    async def get_current_weather_at(self, lat: float, lon: float, lane: int = INTERACTIVE) -> Dict:
+        """
+        Fetch current weather for a GPS coordinate, shared by its whole geo tile
+        
+        Args:
+            lat: Latitude in degrees
+            lon: Longitude in degrees
+            lane: Quota priority lane (INTERACTIVE, BATCH or BACKGROUND)
+            
+        Returns:
+            Dictionary with weather information
+        """
+        tile = self.geo_tile(lat, lon)
+        if tile is None:
+            return self._invalid_coordinates()
+        return await self.get_current_weather(tile, lane)
+    
+    async def get_forecast_at(self, lat: float, lon: float, days_ahead: int = 1, lane: int = INTERACTIVE) -> Dict:
+        """
+        Fetch weather forecast for a GPS coordinate, shared by its whole geo tile
+        
+        Args:
+            lat: Latitude in degrees
+            lon: Longitude in degrees
+            days_ahead: Day to summarize in local time (1 = tomorrow)
+            lane: Quota priority lane (INTERACTIVE, BATCH or BACKGROUND)
             
         Returns:
             Dictionary with forecast information
         """
+        tile = self.geo_tile(lat, lon)
+        if tile is None:
+            return self._invalid_coordinates()
+        return await self.get_forecast(tile, days_ahead, lane)
+    
+    async def _get(self, url: str, params: Dict, lane: int = INTERACTIVE) -> Tuple[int, Optional[Dict]]:
+        endpoint = url.rsplit("/", 1)[-1]
+        start = time.perf_counter()
         try:
-            params = {
-                "q": city,
-                "appid": self.api_key,
-                "units": "metric",
-                "cnt": 8  # Get next 24 hours (8 x 3-hour intervals)
-            }
+            status, data = await self._get_with_retries(url, params, lane)
+        except asyncio.TimeoutError:
+            UPSTREAM_REQUESTS.inc(endpoint, "timeout")
+            raise
+        except aiohttp.ClientConnectionError:
+            UPSTREAM_REQUESTS.inc(endpoint, "connection_error")
+            raise
+        finally:
+            UPSTREAM_SECONDS.observe(time.perf_counter() - start, endpoint)
+        
+        UPSTREAM_REQUESTS.inc(endpoint, str(status))
+        return status, data
+    
+    async def _get_with_retries(self, url: str, params: Dict, lane: int) -> Tuple[int, Optional[Dict]]:
+        """GET with the same bounded, jittered retry policy as the sync client; every attempt takes a quota token"""
+        session = await self._get_session()
+        attempt = 0
+        while True:
+            # Raises QuotaExceeded if no budget frees up within the lane's wait limit
+            await self.quota.acquire_async(lane)
+            try:
+                async with session.get(url, params=params) as response:
+                    if response.status == 429:
+                        self.quota.penalize(_retry_after(response.headers.get("Retry-After")))
+                    if response.status not in RETRY_STATUSES or attempt >= self.retries:
+                        data = await response.json(content_type=None) if response.status == 200 else None
+                        return response.status, data
+            except asyncio.TimeoutError as e:
+                # Connect timeouts are retried like the sync client's; a slow
+                # upstream (read timeout) is reported as a timeout, not retried
+                if not isinstance(e, aiohttp.ConnectionTimeoutError) or attempt >= self.retries:
+                    raise
+            except aiohttp.ClientConnectionError:
+                if attempt >= self.retries:
+                    raise
+            attempt += 1
+            await asyncio.sleep(self._retry_delay(attempt))
+    
+    async def _fetch_current_weather(self, city: str, lane: int = INTERACTIVE) -> Dict:
+        """Request current weather for a city from OpenWeatherMap"""
+        try:
+            status, data = await self._get(self.base_url, self._params(city), lane)
+            return self._current_weather_result(city, status, data)
             
-            response = requests.get(self.forecast_url, params=params, timeout=10)
-            
-            if response.status_code == 404:
-                return {
-                    "success": False,
-                    "error": "city_not_found",
-                    "message": f"Sorry, I couldn't find forecast data for {city}."
-                }
-            elif response.status_code != 200:
-                return {
-                    "success": False,
-                    "error": "api_error",
-                    "message": f"Weather service returned an error: {response.status_code}"
-                }
-            
-            data = response.json()
-            
-            # Get tomorrow's forecast (next day's average)
-            forecasts = data["list"]
-            tomorrow_data = forecasts[4:8] if len(forecasts) >= 8 else forecasts  # 12-24 hours ahead
-            
-            # Calculate averages for tomorrow
-            avg_temp = sum(f["main"]["temp"] for f in tomorrow_data) / len(tomorrow_data)
-            descriptions = [f["weather"][0]["description"] for f in tomorrow_data]
-            most_common_desc = max(set(descriptions), key=descriptions.count)
-            
-            # Check for rain probability
-            rain_chance = 0
-            for forecast in tomorrow_data:
-                if "rain" in forecast:
-                    rain_chance = max(rain_chance, forecast.get("pop", 0) * 100)
-            
-            forecast_info = {
-                "success": True,
-                "city": data["city"]["name"],
-                "country": data["city"]["country"],
-                "temperature": round(avg_temp),
-                "description": most_common_desc,
-                "rain_probability": round(rain_chance)
+        except QuotaExceeded:
+            return self._rate_limited()
+        except asyncio.TimeoutError:
+            return {
+                "success": False,
+                "error": "timeout",
+                "message": "Weather service request timed out. Please try again."
             }
+        except aiohttp.ClientConnectionError:
+            return {
+                "success": False,
+                "error": "connection_error",
+                "message": "Unable to connect to weather service. Please check your internet connection."
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": "unknown",
+                "message": f"An unexpected error occurred: {str(e)}"
+            }
+    
+    async def _fetch_forecast(self, city: str, lane: int = INTERACTIVE) -> Dict:
+        """Request the forecast for a city from OpenWeatherMap"""
+        try:
+            status, data = await self._get(self.forecast_url, self._params(city), lane)
+            return self._forecast_result(city, status, data)
             
-            return forecast_info
-            
+        except QuotaExceeded:
+            return self._rate_limited()
         except Exception as e:
             return {
                 "success": False,
@@ -219,7 +1114,15 @@ def format_forecast_response(forecast_data: Dict) -> str:
     description = forecast_data["description"]
     rain_prob = forecast_data["rain_probability"]
     
-    response = f"Tomorrow in {city}, it's expected to be {temp}°C with {description}."
+    days_ahead = forecast_data.get("days_ahead", 1)
+    if days_ahead == 0:
+        day = "Later today"
+    elif days_ahead == 1:
+        day = "Tomorrow"
+    else:
+        day = "On " + date.fromisoformat(forecast_data["date"]).strftime("%A")
+    
+    response = f"{day} in {city}, it's expected to be {temp}°C with {description}."
     
     if rain_prob > 50:
         response += f" There's a {rain_prob}% chance of rain."
@@ -229,6 +1132,63 @@ def format_forecast_response(forecast_data: Dict) -> str:
     return response
 
 
+# How a comparison can be ranked: (result field, highest first, comparative, unit)
+RANKINGS = {
+    "warmest": ("temperature", True, "warmer", "°C"),
+    "coldest": ("temperature", False, "colder", "°C"),
+    "most_humid": ("humidity", True, "more humid", "% humidity"),
+    "driest": ("humidity", False, "drier", "% humidity"),
+    "windiest": ("wind_speed", True, "windier", " m/s wind"),
+    "calmest": ("wind_speed", False, "calmer", " m/s wind"),
+}
+
+
+def _join_words(items: List[str]) -> str:
+    """Join items for speech: a, b and c"""
+    if len(items) <= 1:
+        return "".join(items)
+    return ", ".join(items[:-1]) + " and " + items[-1]
+
+
+def format_comparison_response(results: List[Dict], ranking: str = "warmest") -> str:
+    """
+    Rank current weather results and phrase them as one answer
+    
+    Args:
+        results: Results of get_current_weather() for each compared city
+        ranking: Key of RANKINGS to order the cities by
+        
+    Returns:
+        Natural language string comparing the cities
+    """
+    field, highest_first, comparative, unit = RANKINGS[ranking]
+    found = [result for result in results if result["success"]]
+    failed = [result for result in results if not result["success"]]
+    if not found:
+        return failed[0]["message"]
+    
+    ranked = sorted(found, key=lambda result: result[field], reverse=highest_first)
+    top, rest = ranked[0], ranked[1:]
+    
+    def value(result: Dict) -> str:
+        return f"{result[field]}{unit}"
+    
+    if not rest:
+        response = format_weather_response(top)
+    elif all(result[field] == top[field] for result in rest):
+        response = f"{_join_words([result['city'] for result in ranked])} are about the same, at {value(top)}."
+    elif len(ranked) == 2:
+        response = f"{top['city']} is {comparative} at {value(top)}, compared with {value(rest[0])} in {rest[0]['city']}."
+    else:
+        followers = _join_words([f"{result['city']} at {value(result)}" for result in rest])
+        response = f"{top['city']} is the {ranking.replace('_', ' ')} at {value(top)}, followed by {followers}."
+    
+    # Cities that could not be looked up are mentioned, not silently dropped
+    for message in dict.fromkeys(result["message"] for result in failed):
+        response += f" {message}"
+    return response
+
+
 # Test function
 if __name__ == "__main__":
     # Test the weather API
@@ -0,0 +1,461 @@
+"""
+Weather Response Cache Module
+Bounded in-process cache for OpenWeatherMap responses, with an optional
+SQLite tier shared by all processes on a host
+"""
+
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_city(city: str) -> str:
+    """
+    Normalize a city name so equivalent spellings share a cache entry
+
+    Args:
+        city: Raw city name as typed or transcribed
+
+    Returns:
+        Lower-cased city name with collapsed whitespace
+    """
+    return " ".join(city.lower().split())
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a per-entry TTL
+
+    With stale_ttl > 0, expired entries are kept for that many extra seconds
+    so callers using get_entry() can serve them while a refresh is running.
+    """
+
+    def __init__(self, max_entries: int = 1024, stale_ttl: float = 0):
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up a fresh entry
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None if missing or expired
+        """
+        entry = self.get_entry(key, allow_stale=False)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: Hashable, allow_stale: bool = True) -> Optional[Tuple[Any, float]]:
+        """
+        Look up an entry together with its remaining freshness
+
+        Args:
+            key: Cache key
+            allow_stale: Also return expired entries still within stale_ttl
+
+        Returns:
+            (value, seconds until expiry, negative once stale), or None
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            remaining = expires_at - time.monotonic()
+            if remaining <= 0:
+                if remaining <= -self.stale_ttl:
+                    del self._data[key]
+                    self.misses += 1
+                    return None
+                if not allow_stale:
+                    self.misses += 1
+                    return None
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+
+            # Mark as most recently used
+            self._data.move_to_end(key)
+            return value, remaining
+
+    def ttl_remaining(self, key: Hashable) -> Optional[float]:
+        """
+        Seconds until an entry expires, without touching LRU order or counters
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Remaining seconds (negative once stale), or None if absent or
+            past the stale grace period
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            remaining = entry[0] - time.monotonic()
+            return remaining if remaining > -self.stale_ttl else None
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """
+        Store a value, evicting the least recently used entries if full
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Time to live in seconds
+        """
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict:
+        """Return cache size and hit/miss counters"""
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class SQLiteCache:
+    """
+    TTL cache stored in a SQLite file (WAL mode) shared by all processes on a host
+
+    Values are strings (callers serialize them). Expiry uses wall-clock time so
+    entries stay valid across restarts. Database errors such as a busy lock
+    are treated as misses or skipped writes, never raised to the caller; if
+    the file cannot be opened at all, available is False and every lookup
+    misses.
+
+    All threads of a process share one connection, serialized by a lock:
+    lookups take microseconds, while opening a connection per thread (a new
+    thread per request under Flask's threaded server) costs far more.
+
+    Writes are queued and applied by a background writer thread, one
+    transaction per batch, so set() never waits on the connection or on
+    another process's lock. Lookups see queued writes immediately.
+    """
+
+    # Expired rows and rows over the size budget are pruned every N writes
+    PRUNE_EVERY = 100
+
+    def __init__(self, path: str, max_entries: int = 10000, stale_ttl: float = 0):
+        self.path = path
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._writes = 0
+
+        # Write-behind queue: key -> (value, expires_at), the newest write wins
+        self._pending: Dict[str, Tuple[str, float]] = {}
+        self._pending_cond = threading.Condition()
+        self._flush_lock = threading.Lock()  # keeps batches in order
+        self._writer_pid: Optional[int] = None
+
+        # Counters
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.errors = 0
+
+        self.available = True
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS weather_cache ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS weather_cache_expires ON weather_cache (expires_at)")
+        except sqlite3.Error as e:
+            self.available = False
+            self.errors += 1
+            logger.warning("Disk cache %s unavailable, using memory only: %s", path, e)
+        else:
+            atexit.register(self.flush)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Called with the lock held; reopened after a fork
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _row(self, key: str) -> Optional[Tuple[str, float]]:
+        """(value, expires_at) of a key, queued or stored; None on a miss or a database error"""
+        if not self.available:
+            return None
+        with self._pending_cond:
+            pending = self._pending.get(key)
+        if pending is not None:
+            return pending
+        try:
+            with self._lock:
+                return self._connect().execute(
+                    "SELECT value, expires_at FROM weather_cache WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error:
+            self._count("errors")
+            return None
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get_entry(self, key: str, allow_stale: bool = True) -> Optional[Tuple[str, float]]:
+        """
+        Look up an entry together with its remaining freshness
+
+        Args:
+            key: Cache key
+            allow_stale: Also return expired entries still within stale_ttl
+
+        Returns:
+            (value, seconds until expiry, negative once stale), or None
+        """
+        row = self._row(key)
+        if row is None:
+            self._count("misses")
+            return None
+
+        value, expires_at = row
+        remaining = expires_at - time.time()
+        if remaining <= 0 and (not allow_stale or remaining <= -self.stale_ttl):
+            self._count("misses")
+            return None
+
+        self._count("hits" if remaining > 0 else "stale_hits")
+        return value, remaining
+
+    def ttl_remaining(self, key: str) -> Optional[float]:
+        """Seconds until an entry expires (negative once stale), or None if absent or past the stale grace period"""
+        row = self._row(key)
+        if row is None:
+            return None
+        remaining = row[1] - time.time()
+        return remaining if remaining > -self.stale_ttl else None
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        """
+        Queue a value for the background writer
+
+        Args:
+            key: Cache key
+            value: Serialized value
+            ttl: Time to live in seconds
+        """
+        if ttl <= 0 or self.max_entries <= 0 or not self.available:
+            return
+
+        with self._pending_cond:
+            self._pending[key] = (value, time.time() + ttl)
+            if self._writer_pid != os.getpid():
+                # First write in this process (threads do not survive a fork)
+                self._writer_pid = os.getpid()
+                threading.Thread(target=self._write_loop, name="weather-cache-writer", daemon=True).start()
+            self._pending_cond.notify()
+
+    def _write_loop(self) -> None:
+        while True:
+            with self._pending_cond:
+                while not self._pending:
+                    self._pending_cond.wait()
+            self.flush()
+
+    def flush(self) -> None:
+        """Write all queued values now"""
+        with self._flush_lock:
+            with self._pending_cond:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return
+            try:
+                with self._lock:
+                    conn = self._connect()
+                    with conn:
+                        conn.execute("BEGIN")
+                        conn.executemany(
+                            "INSERT OR REPLACE INTO weather_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                            [(key, value, expires_at) for key, (value, expires_at) in batch.items()]
+                        )
+                        self._writes += len(batch)
+                        if self._writes >= self.PRUNE_EVERY:
+                            self._writes = 0
+                            self._prune(conn)
+            except sqlite3.Error:
+                self._count("errors")
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM weather_cache WHERE expires_at <= ?", (time.time() - self.stale_ttl,))
+        # Over budget: drop the entries closest to expiry
+        conn.execute(
+            "DELETE FROM weather_cache WHERE key IN ("
+            "SELECT key FROM weather_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)"""
+        if not self.available:
+            return
+        with self._pending_cond:
+            self._pending.clear()
+        try:
+            with self._lock:
+                self._connect().execute("DELETE FROM weather_cache")
+        except sqlite3.Error:
+            self._count("errors")
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters"""
+        with self._lock:
+            return {
+                "path": self.path,
+                "available": self.available,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "errors": self.errors
+            }
+
+
+class TieredCache:
+    """
+    In-process TTLCache in front of a shared SQLiteCache
+
+    Exposes the TTLCache interface. Reads try memory first and fall back to
+    disk, copying disk hits into memory; writes go to both tiers. The
+    top-level hit/miss counters count one result per lookup; each tier's own
+    counters are under "memory" and "disk" in stats().
+    """
+
+    def __init__(
+        self,
+        memory: TTLCache,
+        disk: SQLiteCache,
+        encode: Callable[[Any], str],
+        decode: Callable[[str], Any]
+    ):
+        """
+        Args:
+            memory: Per-process LRU tier
+            disk: Shared on-disk tier
+            encode: Serializes a value for the disk tier
+            decode: Restores a value read from the disk tier
+        """
+        self.memory = memory
+        self.disk = disk
+        self.encode = encode
+        self.decode = decode
+        self.max_entries = memory.max_entries
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _disk_key(key: Hashable) -> str:
+        return "|".join(key) if isinstance(key, tuple) else str(key)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self.get_entry(key, allow_stale=False)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: Hashable, allow_stale: bool = True) -> Optional[Tuple[Any, float]]:
+        entry = self._lookup(key, allow_stale)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            elif entry[1] > 0:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+        return entry
+
+    def _lookup(self, key: Hashable, allow_stale: bool) -> Optional[Tuple[Any, float]]:
+        entry = self.memory.get_entry(key, allow_stale)
+        if entry is not None and entry[1] > 0:
+            return entry
+
+        # Another process may have refreshed it since
+        stored = self.disk.get_entry(self._disk_key(key), allow_stale)
+        if stored is None or (entry is not None and stored[1] <= entry[1]):
+            return entry
+
+        value, remaining = self.decode(stored[0]), stored[1]
+        if remaining > 0:
+            self.memory.set(key, value, remaining)
+        return value, remaining
+
+    def ttl_remaining(self, key: Hashable) -> Optional[float]:
+        # Memory only: a fresh entry just read from disk was copied into
+        # memory, and this is called on the async client's event loop
+        return self.memory.ttl_remaining(key)
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        self.memory.set(key, value, ttl)
+        self.disk.set(self._disk_key(key), self.encode(value), ttl)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        self.disk.clear()
+
+    def stats(self) -> Dict:
+        memory = self.memory.stats()
+        stats = dict(memory)
+        with self._lock:
+            stats.update(hits=self.hits, stale_hits=self.stale_hits, misses=self.misses)
+        stats["memory"] = {name: memory[name] for name in ("hits", "stale_hits", "misses")}
+        stats["disk"] = self.disk.stats()
+        return stats
+
+    def __len__(self) -> int:
+        return len(self.memory)